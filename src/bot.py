@@ -1,13 +1,43 @@
 import asyncio
 import aiohttp
 import json
+from dataclasses import dataclass
+from typing import Any, Optional
 from twitchio.ext import commands
-from src.translator import translate_text, should_filter, apply_translation_dictionary, get_stats
+from src.translator import translate_text_shared, should_filter, apply_translation_dictionary, get_stats, get_api_key_endpoints, start_budget_tracking, prewarm_engine
+from src.http_session import get_session, prewarm, close_session
 from src.logger import logger
 from src.tts import get_tts_instance, is_japanese
 from src.participant_tracker import get_tracker
-from src.comment_data import create_twitch_comment
-from src.config import load_config
+from src.comment_data import create_twitch_comment, get_twitch_priority
+from src.config import config_store
+from src.dedup_window import DedupWindow
+from src.emote_ranges import wrap_emotes
+from src.chat_pipeline import ChatPipeline, DEFAULT_TRANSLATE_CONCURRENCY, DEFAULT_QUEUE_SIZE
+from src.chat_sender import ChatSender, PRIORITY_CHAT, PRIORITY_SYSTEM
+
+
+HELIX_BASE_URL = "https://api.twitch.tv/helix"
+SHUTDOWN_TIMEOUT = 3.0  # stop()で後片付けの完了を待つ秒数
+DEFAULT_LATENCY_BUDGET_MS = 1500  # 翻訳を待つ時間。超えたら原文を先に表示し、翻訳は後から反映する
+BACKFILL_TIMEOUT = 30.0  # 後から反映する翻訳を待つ上限秒数（超えたら取り消す）
+
+# チャット処理パイプラインのジョブの種類
+JOB_TRANSLATE = "translate"  # 翻訳して表示・送信・読み上げ
+JOB_PLAIN = "plain"  # チャット翻訳が無効（原文のみ表示・読み上げ）
+JOB_JOIN = "join"  # 参加キーワードを検知（参加登録メッセージを表示・読み上げ）
+
+
+@dataclass
+class _ChatJob:
+    """パイプラインの段階間で受け渡すチャット1件分の処理内容"""
+    message: Any
+    kind: str
+    content: str  # エモートを<k>タグで囲んだ翻訳用テキスト
+    display_name: Optional[str] = None
+    translated: Optional[str] = None
+    late_translation: Any = None  # latency budget内に届かなかった翻訳（後から反映する）
+    emote_only: bool = False  # エモートだけのメッセージ（翻訳・読み上げを省略する）
 
 
 class EventSubHandler:
@@ -70,36 +100,36 @@ class EventSubHandler:
 
     async def _get_user_id(self, login: str) -> str | None:
         """ユーザー名からユーザーIDを取得"""
-        url = f"https://api.twitch.tv/helix/users?login={login}"
+        url = f"{HELIX_BASE_URL}/users?login={login}"
         headers = {
             "Authorization": f"Bearer {self.token}",
             "Client-Id": self.client_id,
         }
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        if data.get("data"):
-                            return data["data"][0]["id"]
+            session = get_session()
+            async with session.get(url, headers=headers) as resp:
+                if resp.status == 200:
+                    data = await resp.json()
+                    if data.get("data"):
+                        return data["data"][0]["id"]
         except Exception as e:
             logger.error(f"Failed to get user ID for {login}: {e}")
         return None
 
     async def _get_token_user_id(self) -> str | None:
         """トークンの所有者のユーザーIDを取得"""
-        url = "https://api.twitch.tv/helix/users"
+        url = f"{HELIX_BASE_URL}/users"
         headers = {
             "Authorization": f"Bearer {self.token}",
             "Client-Id": self.client_id,
         }
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        if data.get("data"):
-                            return data["data"][0]["id"]
+            session = get_session()
+            async with session.get(url, headers=headers) as resp:
+                if resp.status == 200:
+                    data = await resp.json()
+                    if data.get("data"):
+                        return data["data"][0]["id"]
         except Exception as e:
             logger.error(f"Failed to get token user ID: {e}")
         return None
@@ -108,23 +138,23 @@ class EventSubHandler:
         """WebSocket接続を維持"""
         while self._running:
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.ws_connect(self.EVENTSUB_URL) as ws:
-                        self._ws = ws
-                        logger.info("EventSub WebSocket connected")
-
-                        async for msg in ws:
-                            if not self._running:
-                                break
-
-                            if msg.type == aiohttp.WSMsgType.TEXT:
-                                await self._handle_message(msg.data)
-                            elif msg.type == aiohttp.WSMsgType.ERROR:
-                                logger.error(f"EventSub WebSocket error: {ws.exception()}")
-                                break
-                            elif msg.type == aiohttp.WSMsgType.CLOSED:
-                                logger.info("EventSub WebSocket closed")
-                                break
+                session = get_session()
+                async with session.ws_connect(self.EVENTSUB_URL) as ws:
+                    self._ws = ws
+                    logger.info("EventSub WebSocket connected")
+
+                    async for msg in ws:
+                        if not self._running:
+                            break
+
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            await self._handle_message(msg.data)
+                        elif msg.type == aiohttp.WSMsgType.ERROR:
+                            logger.error(f"EventSub WebSocket error: {ws.exception()}")
+                            break
+                        elif msg.type == aiohttp.WSMsgType.CLOSED:
+                            logger.info("EventSub WebSocket closed")
+                            break
 
             except asyncio.CancelledError:
                 break
@@ -161,7 +191,7 @@ class EventSubHandler:
 
     async def _subscribe_to_follows(self):
         """フォローイベントを購読"""
-        url = "https://api.twitch.tv/helix/eventsub/subscriptions"
+        url = f"{HELIX_BASE_URL}/eventsub/subscriptions"
         headers = {
             "Authorization": f"Bearer {self.token}",
             "Client-Id": self.client_id,
@@ -181,13 +211,13 @@ class EventSubHandler:
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=headers, json=body) as resp:
-                    if resp.status in (200, 202):
-                        logger.info("EventSub: Subscribed to channel.follow")
-                    else:
-                        error = await resp.text()
-                        logger.error(f"EventSub subscription failed: {resp.status} - {error}")
+            session = get_session()
+            async with session.post(url, headers=headers, json=body) as resp:
+                if resp.status in (200, 202):
+                    logger.info("EventSub: Subscribed to channel.follow")
+                else:
+                    error = await resp.text()
+                    logger.error(f"EventSub subscription failed: {resp.status} - {error}")
         except Exception as e:
             logger.error(f"Failed to subscribe to follows: {e}", exc_info=True)
 
@@ -220,8 +250,17 @@ class TranslateBot(commands.Bot):
         # 実行中のイベントループは event_ready でセットする
         self._running_loop = None
         # 処理済みメッセージIDを記録（重複防止）
-        self._processed_message_ids = set()
-        self._max_processed_ids = 1000  # メモリ制限
+        self._processed_message_ids = DedupWindow()
+        # 時間内に届かず、後から反映する翻訳のタスク
+        self._backfill_tasks = set()
+        # 受信したチャットは 分類 → 翻訳（並行） → 出力（受信順） の段階で処理する
+        self._pipeline = ChatPipeline(
+            self._classify_message, self._translate_job, self._publish_job,
+            translate_concurrency=config_store.get("chat_translate_concurrency", DEFAULT_TRANSLATE_CONCURRENCY),
+            queue_size=config_store.get("chat_pipeline_queue_size", DEFAULT_QUEUE_SIZE),
+        )
+        # BOTの発言は送信キューを通す（Twitchの送信制限内で、詰まった翻訳はまとめて送る）
+        self._chat_sender = ChatSender()
         # 停止フラグ
         self._stopped = False
         # EventSub handler（フォロー検知用）
@@ -235,6 +274,16 @@ class TranslateBot(commands.Bot):
             self._running_loop = None
         logger.info(f"Bot logged in as {self.nick}")
 
+        # DeepL・Helixへの接続を事前に確立（初回翻訳のハンドシェイク待ちを避ける）
+        # DeepLへの送信は翻訳エンジンのループで行うため、エンジン側のセッションで接続する
+        asyncio.create_task(prewarm([HELIX_BASE_URL]))
+        if self.deepl_api_key:
+            prewarm_engine(get_api_key_endpoints(self.deepl_api_key))
+
+        # DeepLの文字数予算を使用量APIと定期的に突き合わせる
+        if self.deepl_api_key:
+            start_budget_tracking(self.deepl_api_key)
+
         # EventSub接続を開始（フォロー検知）
         if self.client_id:
             try:
@@ -251,6 +300,10 @@ class TranslateBot(commands.Bot):
         else:
             logger.warning("client_id not provided, follow detection disabled")
 
+    async def event_userstate(self, user):
+        # BOTのモデレーター権限（配信者を含む）に合わせて送信レートを切り替える
+        self._chat_sender.set_moderator(getattr(user, "is_mod", False))
+
     def _on_follow_event(self, follower_name: str):
         """フォローイベントのコールバック"""
         follow_msg = f"{follower_name} さんがフォローしました"
@@ -260,30 +313,64 @@ class TranslateBot(commands.Bot):
         # 停止済みの場合は処理しない
         if self._stopped:
             return
+        # 受信順の番号を付けてパイプラインに渡す（分類→翻訳→出力。キューが満杯なら空くまで待つ）
+        await self._pipeline.submit(message)
+
+    def get_pipeline_stats(self) -> dict:
+        """チャット処理パイプラインの段階ごとのキューの長さと処理時間（送信キューは send_ 付き）"""
+        stats = self._pipeline.get_stats()
+        stats.update({f"send_{key}": value for key, value in self._chat_sender.get_stats().items()})
+        return stats
+
+    def send_chat(self, text, priority=PRIORITY_CHAT, prefix="", channel=None):
+        """
+        BOTの発言を送信キューに積む（BOTのループ上で呼ぶ）
+
+        Args:
+            text: 本文
+            priority: PRIORITY_CHAT / PRIORITY_SYSTEM
+            prefix: 接頭辞（"[Chat] " など）
+            channel: 送信先（省略時は最初に接続したチャンネル）
+
+        Returns:
+            asyncio.Future（送信できたらTrue）。送信先がなければNone
+        """
+        if channel is None:
+            connection = getattr(self, '_connection', None)
+            channels = connection.connected_channels if connection else None
+            if not channels:
+                logger.warning("BOTが接続されていないため、チャットに送信できません")
+                return None
+            channel = channels[0]
+        return self._chat_sender.enqueue(channel, text, priority=priority, prefix=prefix)
+
+    async def _classify_message(self, message):
+        """
+        パイプラインの分類・フィルタ段階（重複・BOT自身の発言を除き、翻訳するかを決める）
+
+        Returns:
+            _ChatJob or None: 処理しないメッセージはNone
+        """
+        if self._stopped:
+            return None
 
         # message.authorがNoneの場合は処理しない（BOTのエコーメッセージなど）
         if message.author is None:
             logger.debug("Skipped: message.author is None")
-            return
+            return None
 
         # メッセージIDによる重複チェック（BOT再起動時の二重処理防止）
         msg_id = message.tags.get('id') if message.tags else None
         if msg_id:
-            if msg_id in self._processed_message_ids:
+            # 件数・時間の上限を超えた古いIDから順に忘れる
+            if self._processed_message_ids.check_and_add(msg_id):
                 logger.debug(f"Duplicate message skipped: {msg_id}")
-                return
-            self._processed_message_ids.add(msg_id)
-            # メモリ制限: 古いIDを削除
-            if len(self._processed_message_ids) > self._max_processed_ids:
-                # セットの最初の半分を削除
-                to_remove = list(self._processed_message_ids)[:self._max_processed_ids // 2]
-                for old_id in to_remove:
-                    self._processed_message_ids.discard(old_id)
+                return None
 
         # BOTが送信した翻訳結果をスキップ（ゼロ幅スペースで判定）
         if '\u200B' in message.content:
             logger.debug(f"Skipped (zero-width space): {message.author.name}")
-            return
+            return None
 
         # BOTが送信したエコーメッセージのみスキップ
         # ※配信者アカウント＝BOTアカウントの場合、配信者の手入力は翻訳対象
@@ -292,83 +379,53 @@ class TranslateBot(commands.Bot):
         is_bot_echo = message.echo and self.nick and message.author.name.lower() == self.nick.lower()
         if is_bot_echo:
             logger.debug(f"Skipped (bot echo): {message.author.name}")
-            return
+            return None
 
         # 配信者の手入力（echo=False, 名前一致）は翻訳対象として処理を継続
         if self.nick and message.author.name.lower() == self.nick.lower():
             logger.debug(f"Processing broadcaster's own message: {message.author.name}")
 
-        original_content = message.content
-        content = message.content
-        if message.tags:
-            # Emote ranges are stored in 'emotes' tag as 'id:start-end,start-end/id:start-end'
-            # We want to wrap these ranges in <k>...</k> tags for DeepL xml handling
-            
-            # Create a list of (start, end, type) tuples to handle replacements
-            replacements = []
-            
-            # Handle standard Twitch emotes
-            if message.tags.get('emotes'):
-                emote_str = message.tags['emotes']
-                # format: id:start-end,start-end/id:start-end
-                for emote_group in emote_str.split('/'):
-                    if ':' in emote_group:
-                        _, positions = emote_group.split(':')
-                        for pos in positions.split(','):
-                            start, end = map(int, pos.split('-'))
-                            replacements.append((start, end + 1, 'emote'))
-
-            # Sort replacements by start index in reverse order to avoid offsetting indices
-            replacements.sort(key=lambda x: x[0], reverse=True)
-            
-            # Apply replacements
-            temp_content = list(content)
-            for start, end, _ in replacements:
-                # Wrap emote in <k> tag
-                # Need to handle potential overlap or adjacent emotes if any (though twitch usually handles this)
-                original = "".join(temp_content[start:end])
-                temp_content[start:end] = list(f"<k>{original}</k>")
-            
-            content = "".join(temp_content)
+        # エモートを<k>タグで囲む（DeepLのxmlタグ処理で翻訳させない）
+        emotes = wrap_emotes(message.content, message.tags.get('emotes') if message.tags else None)
+        content = emotes.text
 
         # チャット発言者を参加者として記録（キーワード検知のみ）
         participant_name = getattr(message.author, "display_name", None) or message.author.name
-        added_by_keyword = self.tracker.check_message(participant_name, message.content)
-
-        # 参加キーワードを検知した場合は専用メッセージを表示・読み上げ
-        if added_by_keyword:
-            join_msg = f"{participant_name}さんが参加希望登録しました。"
-            # コメントログに追加するため、専用CommentDataを生成
-            join_comment = create_twitch_comment(
-                username=message.author.name,
-                message=join_msg,
-                tags=message.tags,
-                display_name=participant_name,
-                translated=None
-            )
-            self.gui.on_comment_received(join_comment)
-            self.gui.log_message(join_msg, log_type="system")
+        if self.tracker.check_message(participant_name, message.content):
+            return _ChatJob(message, JOB_JOIN, content, display_name=participant_name)
 
-            # 参加者リストを即時送信
-            try:
-                self.gui.send_participant_list_to_chat()
-            except Exception as e:
-                logger.error(f"Failed to auto-send participant list: {e}", exc_info=True)
+        # チャット翻訳が無効の場合は翻訳をスキップ（設定はメモリ上のスナップショットを参照）
+        if not config_store.get("chat_translation_enabled", False):
+            return _ChatJob(message, JOB_PLAIN, content, emote_only=emotes.emote_only)
+        return _ChatJob(message, JOB_TRANSLATE, content, emote_only=emotes.emote_only)
 
-            # TTSで読み上げ（設定ONの場合）
-            if self.tts_enabled_getter():
-                speak_text = join_msg
-                try:
-                    self.tts.speak(speak_text)
-                    logger.debug(f"TTS speak (join): {speak_text[:30]}...")
-                except Exception as e:
-                    logger.error(f"TTS speak error: {e}", exc_info=True)
+    async def _translate_job(self, job):
+        """パイプラインの翻訳段階（翻訳を待つのは latency budget まで。超えたら後から反映する）"""
+        if job.kind != JOB_TRANSLATE or job.emote_only:
+            return
+        message = job.message
+        lang_mode = self.get_lang_mode()
+        translation = asyncio.ensure_future(translate_text_shared(job.content, lang_mode, self.deepl_api_key,
+                                                                  priority=get_twitch_priority(message.tags)))
+        latency_budget = config_store.get("translation_latency_budget_ms", DEFAULT_LATENCY_BUDGET_MS) / 1000
+        try:
+            if latency_budget > 0:
+                job.translated = await asyncio.wait_for(asyncio.shield(translation), latency_budget)
+            else:
+                job.translated = await translation
+        except asyncio.TimeoutError:
+            # 時間内に翻訳が届かなければ原文を先に表示・読み上げし、翻訳は届き次第反映する
+            logger.info(f"Translation exceeded latency budget ({latency_budget:.1f}s), showing original first")
+            job.late_translation = translation
+
+    async def _publish_job(self, job):
+        """パイプラインの出力段階（受信順に呼ばれる。GUI・チャット送信・読み上げ）"""
+        message = job.message
+        if job.kind == JOB_JOIN:
+            self._publish_join(message, job.display_name)
             return
 
-        # ここから通常の翻訳処理
-        # チャット翻訳が無効の場合は翻訳をスキップ
-        config = load_config()
-        if not config.get("chat_translation_enabled", False):
+        if job.kind == JOB_PLAIN:
             # 翻訳せずに原文のみ表示
             comment = create_twitch_comment(
                 username=message.author.name,
@@ -379,8 +436,8 @@ class TranslateBot(commands.Bot):
             )
             self.gui.on_comment_received(comment)
 
-            # TTS: チャット読み上げ（翻訳無効時も原文を読み上げる）
-            if self.tts_enabled_getter():
+            # TTS: チャット読み上げ（翻訳無効時も原文を読み上げる。エモートだけのメッセージは読まない）
+            if self.tts_enabled_getter() and not job.emote_only:
                 speak_text = message.content
                 if self.tts_include_name_getter():
                     display_name = message.author.display_name if hasattr(message.author, 'display_name') else message.author.name
@@ -393,8 +450,8 @@ class TranslateBot(commands.Bot):
                         logger.error(f"TTS speak error: {e}", exc_info=True)
             return
 
-        lang_mode = self.get_lang_mode()
-        translated = await translate_text(content, lang_mode, self.deepl_api_key)
+        translated = job.translated
+        original_content = message.content
 
         # フィルタでスキップされた場合
         if translated == "":
@@ -416,7 +473,7 @@ class TranslateBot(commands.Bot):
 
         # チャットに翻訳結果を送信（翻訳がある場合のみ）
         if translated and translated != message.content:
-            await message.channel.send(f"[Chat] {translated}" + '\u200B')
+            self.send_chat(translated, prefix="[Chat] ", channel=message.channel)
 
         # CommentDataオブジェクトを作成（全てのコメントを表示）
         comment = create_twitch_comment(
@@ -430,8 +487,13 @@ class TranslateBot(commands.Bot):
         # GUIにコメントデータを渡す（全てのコメントをタイル表示）
         self.gui.on_comment_received(comment)
 
-        # TTS: チャット読み上げ
-        if self.tts_enabled_getter():
+        if job.late_translation is not None:
+            task = asyncio.ensure_future(self._backfill_translation(job.late_translation, message, comment))
+            self._backfill_tasks.add(task)
+            task.add_done_callback(self._backfill_tasks.discard)
+
+        # TTS: チャット読み上げ（エモートだけのメッセージは読まない）
+        if self.tts_enabled_getter() and not job.emote_only:
             # デフォルトは原文
             speak_text = message.content
 
@@ -474,6 +536,35 @@ class TranslateBot(commands.Bot):
 
             self._notify_special_event(bits_msg, event_type="bits")
 
+    def _publish_join(self, message, participant_name):
+        """参加キーワードを検知したメッセージの代わりに、専用メッセージを表示・読み上げる"""
+        join_msg = f"{participant_name}さんが参加希望登録しました。"
+        # コメントログに追加するため、専用CommentDataを生成
+        join_comment = create_twitch_comment(
+            username=message.author.name,
+            message=join_msg,
+            tags=message.tags,
+            display_name=participant_name,
+            translated=None
+        )
+        self.gui.on_comment_received(join_comment)
+        self.gui.log_message(join_msg, log_type="system")
+
+        # 参加者リストを即時送信
+        try:
+            self.gui.send_participant_list_to_chat()
+        except Exception as e:
+            logger.error(f"Failed to auto-send participant list: {e}", exc_info=True)
+
+        # TTSで読み上げ（設定ONの場合）
+        if self.tts_enabled_getter():
+            speak_text = join_msg
+            try:
+                self.tts.speak(speak_text)
+                logger.debug(f"TTS speak (join): {speak_text[:30]}...")
+            except Exception as e:
+                logger.error(f"TTS speak error: {e}", exc_info=True)
+
     async def event_usernotice(self, message):
         """サブスクやギフトなどのUSERNOTICEイベントを処理"""
         msg_id = message.tags.get("msg-id") if message.tags else None
@@ -559,15 +650,59 @@ class TranslateBot(commands.Bot):
             participant_str = "→".join(participants)
             message = f"【待機参加者リスト】{participant_str}"
 
+        # 最初のチャンネルに、翻訳結果より優先して送信
+        sent = self.send_chat(message, priority=PRIORITY_SYSTEM)
+        if sent is None or not await sent:
+            logger.error("参加者リスト送信エラー")
+            return False
+        logger.info(f"参加者リストを送信: {message}")
+        return True
+
+    async def _backfill_translation(self, translation, message, comment):
+        """
+        遅れて届いた翻訳をコメントタイル・オーバーレイ・チャットに反映する
+
+        BACKFILL_TIMEOUT を過ぎたら翻訳を取り消す（待機中の要求はレート制限の枠を使わない）
+        """
         try:
-            # 最初のチャンネルに送信
-            if self._connection and self._connection.connected_channels:
-                channel = self._connection.connected_channels[0]
-                await channel.send(message)
-                logger.info(f"参加者リストを送信: {message}")
-                return True
+            translated = await asyncio.wait_for(translation, BACKFILL_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("Late translation abandoned")
+            return
         except Exception as e:
-            logger.error(f"参加者リスト送信エラー: {e}", exc_info=True)
+            logger.error(f"Late translation failed: {e}", exc_info=True)
+            return
+
+        if not translated:
+            return
+        translated = translated.replace("<k>", "").replace("</k>", "")
+        if translated == message.content:
+            return
+
+        comment.translated = translated
+        self.gui.on_translation_backfilled(comment)
+        if not self._stopped:
+            self.send_chat(translated, prefix="[Chat] ", channel=message.channel)
+
+    async def _shutdown_async(self):
+        """ループ上で行う後片付け（EventSub停止・HTTPセッションのクローズ）"""
+        # 反映待ちの翻訳は取り消す
+        for task in list(self._backfill_tasks):
+            task.cancel()
+        await self._pipeline.stop()
+        await self._chat_sender.stop()
+        if self._eventsub_handler:
+            try:
+                await self._eventsub_handler.stop()
+            except Exception as e:
+                logger.warning(f"Exception stopping EventSub handler: {e}")
+        await close_session()
+
+    @staticmethod
+    def _is_loop_thread(loop) -> bool:
+        try:
+            return asyncio.get_running_loop() is loop
+        except RuntimeError:
             return False
 
     def stop(self):
@@ -581,17 +716,17 @@ class TranslateBot(commands.Bot):
 
         loop = self._running_loop
 
-        # EventSubハンドラーを停止
-        if self._eventsub_handler and loop and loop.is_running():
+        # EventSubハンドラーの停止と共有HTTPセッションのクローズ
+        if loop and loop.is_running():
             try:
-                asyncio.run_coroutine_threadsafe(
-                    self._eventsub_handler.stop(),
-                    loop
-                )
-                logger.info("EventSub handler stop requested")
+                future = asyncio.run_coroutine_threadsafe(self._shutdown_async(), loop)
+                logger.info("EventSub handler / HTTP session shutdown requested")
+                # ループのスレッド外から呼ばれた場合のみ完了を待つ（同一スレッドだとデッドロックする）
+                if not self._is_loop_thread(loop):
+                    future.result(timeout=SHUTDOWN_TIMEOUT)
             except Exception as e:
-                logger.warning(f"Exception stopping EventSub handler: {e}")
-            self._eventsub_handler = None
+                logger.warning(f"Exception during async shutdown: {e}")
+        self._eventsub_handler = None
 
         # ループが存在しない場合は何もしない
         if loop is None:
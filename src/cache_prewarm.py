@@ -0,0 +1,76 @@
+"""
+翻訳キャッシュ事前読み込みモジュール
+export_log_json で書き出したチャットログから、よく出るメッセージと翻訳を取り出す
+"""
+import glob
+import json
+import os
+from collections import Counter
+from typing import Iterable, List, Optional, Tuple
+from src.logger import logger
+
+DEFAULT_TOP_N = 500  # キャッシュに投入する最大件数
+
+
+def _expand_paths(paths: Iterable[str]) -> List[str]:
+    """ファイルパス・globパターンを実在するファイルの一覧にする"""
+    files = []
+    for path in paths:
+        if not isinstance(path, str):
+            continue
+        matched = glob.glob(os.path.expanduser(path))
+        for file_path in sorted(matched) if matched else [path]:
+            if os.path.isfile(file_path) and file_path not in files:
+                files.append(file_path)
+    return files
+
+
+def _iter_log_pairs(data: dict):
+    """ログ1ファイル分から (原文, モード, 翻訳, emotesタグ) を取り出す"""
+    mode = (data.get("export_info") or {}).get("translate_mode")
+    if not mode:
+        return
+    for entry in data.get("logs") or []:
+        comment = entry.get("comment_data") if isinstance(entry, dict) else None
+        if not isinstance(comment, dict):
+            continue
+        message = comment.get("message")
+        translated = comment.get("translated")
+        # 未翻訳・原文フォールバック（翻訳失敗やスキップ）は使わない
+        if not message or not translated or translated == message:
+            continue
+        yield message, mode, translated, comment.get("emote_tag") or None
+
+
+def load_log_pairs(paths: Iterable[str],
+                   top_n: int = DEFAULT_TOP_N) -> List[Tuple[str, str, str, int, Optional[str]]]:
+    """
+    チャットログから出現回数の多い (原文, モード, emotesタグ) を取り出す
+
+    ログのモードは書き出し時点の翻訳モード（export_info.translate_mode）を使う。
+    同じ組み合わせが複数回あれば最後の翻訳を採用する。
+    emotesタグは翻訳時と同じくエモートを<k>タグで囲んでキャッシュキーを作るために使う（古いログにはない）。
+
+    Args:
+        paths: ログファイルのパスまたはglobパターン
+        top_n: 取り出す最大件数
+
+    Returns:
+        [(原文, モード, 翻訳, 出現回数, emotesタグ), ...]（出現回数の多い順）
+    """
+    counts = Counter()
+    latest = {}
+    for file_path in _expand_paths(paths):
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipped chat log for cache prewarm: {file_path} ({e})")
+            continue
+        if not isinstance(data, dict):
+            continue
+        for message, mode, translated, emote_tag in _iter_log_pairs(data):
+            counts[(message, mode, emote_tag)] += 1
+            latest[(message, mode, emote_tag)] = translated
+    return [(message, mode, latest[(message, mode, emote_tag)], count, emote_tag)
+            for (message, mode, emote_tag), count in counts.most_common(top_n)]
@@ -0,0 +1,159 @@
+"""
+チャット処理パイプラインモジュール
+受信 → 分類・フィルタ → 翻訳 → 出力 の各段階をつなぎ、出力は受信順に並べ直す
+"""
+import asyncio
+import itertools
+import time
+from src.logger import logger
+
+DEFAULT_TRANSLATE_CONCURRENCY = 50  # 同時に翻訳待ちにできるメッセージ数（DeepLのバッチ上限に合わせる）
+DEFAULT_QUEUE_SIZE = 100  # 分類・出力キューの上限（満杯なら前の段階が空くまで待つ）
+
+STAGES = ("classify", "translate", "publish")
+
+
+class ChatPipeline:
+    """
+    段階ごとにワーカーを持つチャット処理パイプライン
+
+    submit() は受信順の番号を付けて分類キューに積む。分類・出力は1ワーカーで処理し、翻訳は分類が終わった
+    メッセージごとにすぐ開始する（同時に翻訳待ちにできるのは translate_concurrency 件まで。
+    同じ時間窓の要求は翻訳エンジン側でまとめて送られる）。翻訳は並行して終わるため、
+    出力段階は番号順に並べ直してから publish を呼ぶ（分類で捨てたメッセージも番号だけは出力段階に渡し、
+    後続を待たせない）。
+
+    各段階の関数は async で、classify はジョブ（Noneなら破棄）を返し、translate はジョブを更新する。
+    """
+
+    def __init__(self, classify, translate, publish, translate_concurrency=DEFAULT_TRANSLATE_CONCURRENCY,
+                 queue_size=DEFAULT_QUEUE_SIZE):
+        """
+        初期化
+
+        Args:
+            classify: async classify(item) -> job or None
+            translate: async translate(job)
+            publish: async publish(job)（受信順に呼ばれる）
+            translate_concurrency: 同時に翻訳待ちにできるメッセージ数
+            queue_size: 分類・出力キューの上限
+        """
+        self._handlers = {"classify": classify, "translate": translate, "publish": publish}
+        self.translate_concurrency = max(1, translate_concurrency)
+        self.queue_size = max(1, queue_size)
+        self._queues = None
+        self._tasks = []
+        self._translating = set()  # 翻訳中のタスク
+        self._translate_slots = None
+        self._seq = itertools.count()
+        self._next_seq = 0
+        self._pending = {}  # 番号 -> ジョブ（出力待ちの並べ替えバッファ）
+        self._stats = {stage: {"processed": 0, "wait": 0.0, "run": 0.0, "run_max": 0.0} for stage in STAGES}
+
+    @property
+    def running(self):
+        return bool(self._tasks)
+
+    def start(self):
+        """実行中のイベントループでワーカーを起動する"""
+        if self._tasks:
+            return
+        loop = asyncio.get_running_loop()
+        self._queues = {stage: asyncio.Queue(self.queue_size) for stage in ("classify", "publish")}
+        self._translate_slots = asyncio.Semaphore(self.translate_concurrency)
+        self._tasks = [loop.create_task(self._classify_worker()), loop.create_task(self._publish_worker())]
+        logger.info(f"Chat pipeline started: {self.translate_concurrency} concurrent translations, "
+                    f"queue size {self.queue_size}")
+
+    async def stop(self):
+        """ワーカーと翻訳中のタスクを止め、処理待ちのメッセージを捨てる（番号は振り直す）"""
+        tasks = self._tasks + list(self._translating)
+        self._tasks = []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._translating.clear()
+        self._pending.clear()
+        # 再起動後に、もう届かない番号を待ち続けないようにする
+        self._seq = itertools.count()
+        self._next_seq = 0
+
+    async def submit(self, item):
+        """受信したメッセージを受信順の番号付きで分類キューに積む（未起動なら起動する）"""
+        if not self._tasks:
+            self.start()
+        await self._queues["classify"].put((next(self._seq), item, time.monotonic()))
+
+    def get_stats(self) -> dict:
+        """各段階のキューの長さ（翻訳は翻訳中の件数）と処理時間（平均待ち・平均/最大処理時間、ミリ秒）"""
+        stats = {"reorder_pending": len(self._pending)}
+        for stage, counters in self._stats.items():
+            processed = counters["processed"]
+            if stage == "translate":
+                stats["translate_depth"] = len(self._translating)
+            else:
+                queue = self._queues[stage] if self._queues else None
+                stats[f"{stage}_depth"] = queue.qsize() if queue is not None else 0
+            stats[f"{stage}_processed"] = processed
+            stats[f"{stage}_wait_avg_ms"] = counters["wait"] / processed * 1000 if processed else 0.0
+            stats[f"{stage}_run_avg_ms"] = counters["run"] / processed * 1000 if processed else 0.0
+            stats[f"{stage}_run_max_ms"] = counters["run_max"] * 1000
+        return stats
+
+    async def _run(self, stage, enqueued_at, *args):
+        """段階の関数を実行し、キューでの待ち時間と処理時間を記録する（例外はログに残してNone）"""
+        started = time.monotonic()
+        try:
+            return await self._handlers[stage](*args)
+        except asyncio.CancelledError:
+            # パイプライン自身の停止以外（段階の関数から漏れたキャンセル）ではワーカーを止めない
+            task = asyncio.current_task()
+            if task is None or task.cancelling():
+                raise
+            logger.error(f"Chat pipeline {stage} was cancelled unexpectedly")
+            return None
+        except Exception as e:
+            logger.error(f"Chat pipeline {stage} failed: {e}", exc_info=True)
+            return None
+        finally:
+            elapsed = time.monotonic() - started
+            counters = self._stats[stage]
+            counters["processed"] += 1
+            counters["wait"] += started - enqueued_at
+            counters["run"] += elapsed
+            counters["run_max"] = max(counters["run_max"], elapsed)
+
+    async def _classify_worker(self):
+        queue = self._queues["classify"]
+        while True:
+            seq, item, enqueued_at = await queue.get()
+            job = await self._run("classify", enqueued_at, item)
+            if job is None:
+                # 破棄したメッセージも番号だけは渡し、並べ替えで後続を待たせない
+                await self._queues["publish"].put((seq, None, time.monotonic()))
+                continue
+            # 翻訳待ちが上限に達していれば空くまで待ち、空いたらすぐ翻訳を始める
+            classified_at = time.monotonic()
+            await self._translate_slots.acquire()
+            task = asyncio.get_running_loop().create_task(self._translate(seq, job, classified_at))
+            self._translating.add(task)
+            task.add_done_callback(self._translating.discard)
+
+    async def _translate(self, seq, job, enqueued_at):
+        try:
+            # 翻訳に失敗しても原文のまま出力する
+            await self._run("translate", enqueued_at, job)
+        finally:
+            self._translate_slots.release()
+        await self._queues["publish"].put((seq, job, time.monotonic()))
+
+    async def _publish_worker(self):
+        queue = self._queues["publish"]
+        while True:
+            seq, job, enqueued_at = await queue.get()
+            self._pending[seq] = (job, enqueued_at)
+            while self._next_seq in self._pending:
+                job, enqueued_at = self._pending.pop(self._next_seq)
+                self._next_seq += 1
+                if job is not None:
+                    await self._run("publish", enqueued_at, job)
@@ -0,0 +1,208 @@
+"""
+チャット送信キューモジュール
+Twitchの送信レート制限内に収まるよう、BOTの発言をまとめて順番に送る
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from src.logger import logger
+
+# Twitchの送信制限（30秒あたりの件数）。モデレーター・配信者は上限が高い
+TWITCH_RATE_WINDOW = 30.0
+TWITCH_NON_MOD_LIMIT = 20
+TWITCH_MOD_LIMIT = 100
+# 連続して送れる件数。補充レートは (上限 - 連続件数) / 30秒 とし、どの30秒間でも上限を超えないようにする
+NON_MOD_BURST = 1
+MOD_BURST = 10
+TWITCH_MAX_MESSAGE_CHARS = 500  # 1メッセージの最大文字数
+
+# 優先度（大きいほど先に送信）
+PRIORITY_CHAT = 0  # 翻訳結果（キューが詰まったらまとめて送る）
+PRIORITY_SYSTEM = 1  # 参加者リストなどのシステムメッセージ（まとめない）
+
+BOT_MARKER = '\u200B'  # BOT自身の発言の目印（受信時に翻訳対象から外す）
+COALESCE_SEPARATOR = " / "
+
+
+class _TokenBucket:
+    """送信数のトークンバケット（rate 件/秒で補充、capacity 件まで貯める）"""
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self._clock = clock
+        self.configure(rate, capacity)
+        self._tokens = float(capacity)
+        self._updated = clock()
+
+    def configure(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self):
+        """次のトークンまでの秒数（0なら今すぐ送れる）"""
+        self._refill()
+        return 0.0 if self._tokens >= 1.0 else (1.0 - self._tokens) / self.rate
+
+    def take(self):
+        self._refill()
+        self._tokens -= 1.0
+
+
+def _channel_key(channel):
+    """
+    まとめて送れる送信先かを判定するキー
+
+    twitchioは受信メッセージごとに別のChannelを作るため、オブジェクトではなくチャンネル名で比べる
+    """
+    return getattr(channel, "name", None) or channel
+
+
+def _rate_for(moderator):
+    limit, burst = (TWITCH_MOD_LIMIT, MOD_BURST) if moderator else (TWITCH_NON_MOD_LIMIT, NON_MOD_BURST)
+    return (limit - burst) / TWITCH_RATE_WINDOW, burst
+
+
+class ChatSender:
+    """
+    BOTの発言の送信キュー
+
+    優先度順（同じなら到着順）に、Twitchの送信制限に合わせたトークンバケットで1件ずつ送る。
+    送信待ちの間に同じチャンネル・同じ接頭辞の翻訳結果がたまっていれば、
+    最大文字数まで1メッセージにまとめる（システムメッセージはまとめず、翻訳より先に送る）。
+    """
+
+    def __init__(self, moderator=False, max_chars=TWITCH_MAX_MESSAGE_CHARS, clock=time.monotonic):
+        """
+        初期化
+
+        Args:
+            moderator: BOTのアカウントがモデレーター・配信者か（送信上限が変わる）
+            max_chars: 1メッセージの最大文字数
+            clock: 時刻関数（テスト用）
+        """
+        self.moderator = moderator
+        self.max_chars = max_chars
+        self._bucket = _TokenBucket(*_rate_for(moderator), clock=clock)
+        self._queue = []  # (-priority, seq, channel, prefix, body, future)
+        self._seq = itertools.count()
+        self._dispatcher = None
+        self._wakeup = None
+        self._stats = {"sent": 0, "coalesced": 0, "failed": 0, "truncated": 0}
+
+    def set_moderator(self, moderator):
+        """BOTのモデレーター権限に合わせて送信レートを切り替える"""
+        moderator = bool(moderator)
+        if moderator == self.moderator:
+            return
+        self.moderator = moderator
+        self._bucket.configure(*_rate_for(moderator))
+        logger.info(f"Chat send rate: {'moderator' if moderator else 'non-moderator'} limits")
+
+    def enqueue(self, channel, body, priority=PRIORITY_CHAT, prefix=""):
+        """
+        送信キューに追加する（実行中のイベントループから呼ぶ）
+
+        Args:
+            channel: 送信先（send(text) を持つTwitchチャンネル）
+            body: 本文
+            priority: PRIORITY_CHAT / PRIORITY_SYSTEM
+            prefix: 接頭辞（"[Chat] " など。同じ接頭辞の翻訳同士をまとめる）
+
+        Returns:
+            asyncio.Future: 送信できたらTrue、失敗したらFalse
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._queue, (-priority, next(self._seq), channel, prefix, body, future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = loop.create_task(self._dispatch())
+        elif self._wakeup is not None and not self._wakeup.done():
+            # 優先度の高いメッセージが来たら待機をやり直す
+            self._wakeup.set_result(None)
+        return future
+
+    async def flush(self):
+        """送信待ちのメッセージがすべて送られるまで待つ"""
+        futures = [item[5] for item in self._queue]
+        if futures:
+            await asyncio.gather(*futures, return_exceptions=True)
+
+    async def stop(self):
+        """送信を止め、送信待ちのメッセージを破棄する"""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+        for item in self._queue:
+            if not item[5].done():
+                item[5].set_result(False)
+        self._queue.clear()
+
+    def get_stats(self) -> dict:
+        return dict(self._stats, queued=len(self._queue), moderator=self.moderator)
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while self._queue:
+            delay = self._bucket.delay()
+            if delay > 0:
+                self._wakeup = loop.create_future()
+                try:
+                    await asyncio.wait_for(self._wakeup, delay)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    self._wakeup = None
+                continue
+            self._bucket.take()
+            text, futures = self._next_message()
+            channel = futures[0][0]
+            try:
+                await channel.send(text)
+                self._stats["sent"] += 1
+                ok = True
+            except Exception as e:
+                logger.error(f"Failed to send chat message: {e}", exc_info=True)
+                self._stats["failed"] += 1
+                ok = False
+            for _, future in futures:
+                if not future.done():
+                    future.set_result(ok)
+
+    def _next_message(self):
+        """
+        次に送るメッセージを取り出す（詰まっている翻訳結果は最大文字数までまとめる）
+
+        Returns:
+            (text, [(channel, future), ...])
+        """
+        priority, _, channel, prefix, body, future = heapq.heappop(self._queue)
+        bodies = [body]
+        futures = [(channel, future)]
+        channel_key = _channel_key(channel)
+        if -priority == PRIORITY_CHAT:
+            length = len(prefix) + len(body) + len(BOT_MARKER)
+            while self._queue:
+                head = self._queue[0]
+                if -head[0] != PRIORITY_CHAT or _channel_key(head[2]) != channel_key or head[3] != prefix:
+                    break
+                added = len(COALESCE_SEPARATOR) + len(head[4])
+                if length + added > self.max_chars:
+                    break
+                heapq.heappop(self._queue)
+                bodies.append(head[4])
+                futures.append((head[2], head[5]))
+                length += added
+            if len(bodies) > 1:
+                self._stats["coalesced"] += len(bodies) - 1
+        text = prefix + COALESCE_SEPARATOR.join(bodies)
+        limit = self.max_chars - len(BOT_MARKER)
+        if len(text) > limit:
+            self._stats["truncated"] += 1
+            text = text[:limit - 1] + "…"
+        return text + BOT_MARKER, futures
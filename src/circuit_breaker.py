@@ -0,0 +1,132 @@
+"""
+サーキットブレーカーモジュール
+DeepLの障害時に送信を止め、キャッシュや原文で即座に応答する
+"""
+import threading
+import time
+from collections import deque
+from src.logger import logger
+
+# 状態
+STATE_CLOSED = "closed"  # 通常（送信する）
+STATE_OPEN = "open"  # 遮断中（送信しない）
+STATE_HALF_OPEN = "half_open"  # 復旧確認中（1件だけ試しに送信する）
+
+# 既定値
+DEFAULT_FAILURE_RATIO = 0.5  # 直近の失敗率がこれ以上で遮断
+DEFAULT_MIN_REQUESTS = 5  # 失敗率を判定する最小件数
+DEFAULT_WINDOW_SECONDS = 60.0  # 失敗率を計算する期間
+DEFAULT_OPEN_SECONDS = 30.0  # 遮断してから復旧確認を始めるまでの秒数
+
+
+class CircuitBreaker:
+    """
+    失敗率で開閉するサーキットブレーカー
+
+    closed: 直近 window 秒の結果を記録し、失敗率が failure_ratio 以上になったら open にする。
+    open: open_seconds の間は allow() が False を返す。経過後は half_open に移る。
+    half_open: 試験送信を1件だけ許可し、成功なら closed、失敗なら再び open にする。
+    試験送信の結果が open_seconds 以内に届かなければ、次の1件を試験送信とする。
+    """
+
+    def __init__(self, failure_ratio: float = DEFAULT_FAILURE_RATIO, min_requests: int = DEFAULT_MIN_REQUESTS,
+                 window: float = DEFAULT_WINDOW_SECONDS, open_seconds: float = DEFAULT_OPEN_SECONDS,
+                 clock=time.monotonic):
+        """
+        初期化
+
+        Args:
+            failure_ratio: 遮断する失敗率
+            min_requests: 失敗率を判定する最小件数
+            window: 失敗率を計算する期間（秒）
+            open_seconds: 遮断を続ける秒数
+            clock: 時刻関数（テスト用）
+        """
+        self.failure_ratio = failure_ratio
+        self.min_requests = min_requests
+        self.window = window
+        self.open_seconds = open_seconds
+        self._clock = clock
+        self.state = STATE_CLOSED
+        self._results = deque()  # (time, succeeded)
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started = None
+        self._open_count = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """送信してよいか（half_openでは試験送信の1件だけTrue）"""
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return True
+            now = self._clock()
+            if self.state == STATE_OPEN and now - self._opened_at >= self.open_seconds:
+                self._set_state(STATE_HALF_OPEN)
+            if self.state == STATE_HALF_OPEN:
+                if self._probe_started is None or now - self._probe_started >= self.open_seconds:
+                    self._probe_started = now
+                    return True
+            self._rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state == STATE_HALF_OPEN:
+                self._reset()
+                self._set_state(STATE_CLOSED)
+                return
+            self._add_result(True)
+
+    def record_failure(self):
+        with self._lock:
+            if self.state == STATE_HALF_OPEN:
+                self._open()
+                return
+            if self.state == STATE_OPEN:
+                return
+            self._add_result(False)
+            total = len(self._results)
+            if total >= self.min_requests and self._failures / total >= self.failure_ratio:
+                self._open()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            retry_in = 0.0
+            if self.state == STATE_OPEN:
+                retry_in = max(0.0, self.open_seconds - (self._clock() - self._opened_at))
+            return {
+                "state": self.state,
+                "failures": self._failures,
+                "results": len(self._results),
+                "opened": self._open_count,
+                "rejected": self._rejected,
+                "retry_in": retry_in,
+            }
+
+    def _add_result(self, succeeded):
+        now = self._clock()
+        self._results.append((now, succeeded))
+        if not succeeded:
+            self._failures += 1
+        while self._results and now - self._results[0][0] > self.window:
+            _, ok = self._results.popleft()
+            if not ok:
+                self._failures -= 1
+
+    def _open(self):
+        self._reset()
+        self._opened_at = self._clock()
+        self._open_count += 1
+        self._set_state(STATE_OPEN)
+
+    def _reset(self):
+        self._results.clear()
+        self._failures = 0
+        self._probe_started = None
+
+    def _set_state(self, state):
+        if state != self.state:
+            logger.warning(f"DeepL circuit breaker: {self.state} -> {state}")
+        self.state = state
@@ -5,7 +5,7 @@
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional, Dict, Any
-from enum import Enum
+from enum import Enum, IntEnum
 
 
 class Platform(Enum):
@@ -21,6 +21,15 @@ class Platform(Enum):
     UNKNOWN = "不明"
 
 
+class UserPriority(IntEnum):
+    """翻訳の優先度（大きいほど優先）"""
+    REGULAR = 0
+    SUBSCRIBER = 1
+    VIP = 2
+    MODERATOR = 3
+    BROADCASTER = 4
+
+
 @dataclass
 class CommentData:
     """
@@ -95,7 +104,9 @@ class CommentData:
             "is_moderator": self.is_moderator,
             "is_subscriber": self.is_subscriber,
             "is_vip": self.is_vip,
-            "color": self.color
+            "color": self.color,
+            # Twitchのemotesタグ（キャッシュの事前読み込みで翻訳時と同じ<k>タグを付けるため）
+            "emote_tag": self.raw_data.get("emotes") if isinstance(self.raw_data, dict) else None
         }
 
     def to_log_string(self) -> str:
@@ -105,6 +116,39 @@ class CommentData:
         return f"[{self.formatted_timestamp}] [{self.platform_name}] {badge_str}{self.display_username}: {self.message}{translated_str}"
 
 
+def _parse_badge_names(badge_info) -> set:
+    """Twitchのbadgesタグ（dict または "name/version,..." 形式）からバッジ名を取り出す"""
+    if isinstance(badge_info, dict):
+        return set(badge_info.keys())
+    if isinstance(badge_info, str):
+        return {b.split("/", 1)[0] for b in badge_info.split(",") if b}
+    return set()
+
+
+def get_twitch_priority(tags: Dict[str, Any]) -> UserPriority:
+    """
+    Twitchのタグから翻訳の優先度を判定
+
+    Args:
+        tags: Twitchのタグ情報
+
+    Returns:
+        UserPriority
+    """
+    if not tags:
+        return UserPriority.REGULAR
+    names = _parse_badge_names(tags.get("badges"))
+    if "broadcaster" in names:
+        return UserPriority.BROADCASTER
+    if "moderator" in names or str(tags.get("mod", "0")) == "1":
+        return UserPriority.MODERATOR
+    if "vip" in names:
+        return UserPriority.VIP
+    if "subscriber" in names or "founder" in names or str(tags.get("subscriber", "0")) == "1":
+        return UserPriority.SUBSCRIBER
+    return UserPriority.REGULAR
+
+
 def create_twitch_comment(username: str, message: str, tags: Dict[str, Any],
                          display_name: Optional[str] = None,
                          translated: Optional[str] = None) -> CommentData:
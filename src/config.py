@@ -1,15 +1,21 @@
+import copy
 import json
 import os
 import re
+import threading
+import time
 from datetime import datetime
+from types import MappingProxyType
 from src.logger import logger
 
 CONFIG_FILE = "config.json"
+CONFIG_CHECK_INTERVAL = 1.0  # 設定ファイルの更新時刻を確認する最短間隔（秒）
 
 DEFAULT_CONFIG = {
     "twitch_client_id": "",
     "twitch_access_token": "",  # 保存されたアクセストークン（自動ログイン用）
     "deepl_api_key": "",
+    "deepl_extra_api_keys": [],  # 追加のDeepL APIキー（メインのキーと合わせて、残り文字数の多いキーから使う）
     "channel_name": "",
     "channel_mode": "manual",  # auto: 認証アカウントと同じ, manual: 手動入力
     "translate_mode": "自動",
@@ -34,6 +40,22 @@ DEFAULT_CONFIG = {
     # 翻訳フィルタとカスタム辞書
     "translation_filters": [],
     "translation_dictionary": [],  # [{ "source": "原文", "target": "置換後" }]
+    "translation_phrases": [],  # 定型フレーズの対訳 [{ "source": "gg", "target": "ナイス", "target_lang": "JA" }]
+    "translation_cache_max_mb": 16,  # 翻訳キャッシュ（メモリ）の上限MB
+    "translation_segment_cache": False,  # 長いメッセージを文単位でキャッシュする
+    "translation_memory_enabled": False,  # 近いメッセージの翻訳を再利用する（数字や否定だけ違う文にも当たりうるため任意）
+    "translation_memory_threshold": 0.8,  # 再利用する類似度の下限（0〜1）
+    "translation_memory_max_entries": 5000,
+    "translation_prewarm_logs": [],  # BOT起動時に翻訳キャッシュへ読み込むチャットログ（JSON、globパターン可）
+    "translation_prewarm_top_n": 500,
+    "translation_latency_budget_ms": 1500,  # 翻訳を待つ時間（超えたら原文を先に表示し、翻訳は後から反映。0は無制限）
+    "chat_translate_concurrency": 50,  # 同時に翻訳待ちにできるチャットの数（表示・読み上げは受信順のまま）
+    "chat_pipeline_queue_size": 100,  # チャット処理の各段階で待たせる最大件数
+    # DeepL文字数予算（使用率に応じて翻訳を絞る）
+    "budget_skip_short_ratio": 0.80,  # 短いメッセージを翻訳しない
+    "budget_priority_only_ratio": 0.90,  # サブスク以上のみ翻訳
+    "budget_cache_only_ratio": 0.97,  # キャッシュのみ
+    "budget_short_message_chars": 6,
     # コメント表示/出力設定
     "comment_log_bg": "#0E1728",
     "comment_log_fg": "#E8F0FF",
@@ -131,8 +153,64 @@ def validate_config(config_data):
         validated["translation_dictionary"] = []
         changed = True
 
+    if not isinstance(validated.get("translation_phrases"), list):
+        validated["translation_phrases"] = []
+        changed = True
+
+    extra_keys = validated.get("deepl_extra_api_keys")
+    if not isinstance(extra_keys, list) or not all(isinstance(k, str) for k in extra_keys):
+        validated["deepl_extra_api_keys"] = [k for k in extra_keys if isinstance(k, str)] if isinstance(extra_keys, list) else []
+        changed = True
+
+    # 数値系
+    cache_mb = validated.get("translation_cache_max_mb")
+    if isinstance(cache_mb, bool) or not isinstance(cache_mb, (int, float)) or cache_mb <= 0:
+        validated["translation_cache_max_mb"] = DEFAULT_CONFIG["translation_cache_max_mb"]
+        changed = True
+
+    for key in ["budget_skip_short_ratio", "budget_priority_only_ratio", "budget_cache_only_ratio"]:
+        ratio = validated.get(key)
+        if isinstance(ratio, bool) or not isinstance(ratio, (int, float)) or not 0 < ratio <= 1:
+            validated[key] = DEFAULT_CONFIG[key]
+            changed = True
+
+    memory_threshold = validated.get("translation_memory_threshold")
+    if isinstance(memory_threshold, bool) or not isinstance(memory_threshold, (int, float)) or not 0 < memory_threshold <= 1:
+        validated["translation_memory_threshold"] = DEFAULT_CONFIG["translation_memory_threshold"]
+        changed = True
+
+    memory_entries = validated.get("translation_memory_max_entries")
+    if isinstance(memory_entries, bool) or not isinstance(memory_entries, int) or memory_entries < 0:
+        validated["translation_memory_max_entries"] = DEFAULT_CONFIG["translation_memory_max_entries"]
+        changed = True
+
+    if not isinstance(validated.get("translation_prewarm_logs"), list):
+        validated["translation_prewarm_logs"] = []
+        changed = True
+
+    prewarm_top_n = validated.get("translation_prewarm_top_n")
+    if isinstance(prewarm_top_n, bool) or not isinstance(prewarm_top_n, int) or prewarm_top_n < 0:
+        validated["translation_prewarm_top_n"] = DEFAULT_CONFIG["translation_prewarm_top_n"]
+        changed = True
+
+    for key in ("chat_translate_concurrency", "chat_pipeline_queue_size"):
+        value = validated.get(key)
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            validated[key] = DEFAULT_CONFIG[key]
+            changed = True
+
+    latency_budget = validated.get("translation_latency_budget_ms")
+    if isinstance(latency_budget, bool) or not isinstance(latency_budget, (int, float)) or latency_budget < 0:
+        validated["translation_latency_budget_ms"] = DEFAULT_CONFIG["translation_latency_budget_ms"]
+        changed = True
+
+    short_chars = validated.get("budget_short_message_chars")
+    if isinstance(short_chars, bool) or not isinstance(short_chars, int) or short_chars < 0:
+        validated["budget_short_message_chars"] = DEFAULT_CONFIG["budget_short_message_chars"]
+        changed = True
+
     # ブール系
-    for key in ["chat_html_output", "chat_html_newest_first"]:
+    for key in ["chat_html_output", "chat_html_newest_first", "translation_segment_cache", "translation_memory_enabled"]:
         if not isinstance(validated.get(key), bool):
             validated[key] = bool(validated.get(key))
             changed = True
@@ -154,26 +232,167 @@ def validate_config(config_data):
 
     return validated, changed
 
-def load_config():
-    if not os.path.exists(CONFIG_FILE):
-        return DEFAULT_CONFIG.copy()
+def _read_config(path):
+    """
+    設定ファイルを読み込んで検証する（ファイルへの書き戻しはしない）
+
+    Returns:
+        (validated, changed): ファイルがない・読めない場合は既定値と False
+    """
+    if not os.path.exists(path):
+        return DEFAULT_CONFIG.copy(), False
     try:
-        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+        with open(path, "r", encoding="utf-8") as f:
             raw = json.load(f)
-            validated, changed = validate_config(raw)
-            if changed:
-                save_config(validated)
-            return validated
+        return validate_config(raw)
     except Exception as e:
         logger.error(f"Failed to load config: {e}", exc_info=True)
-        return DEFAULT_CONFIG.copy()
+        return DEFAULT_CONFIG.copy(), False
+
+
+def _file_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class ConfigStore:
+    """
+    検証済み設定のスナップショットをメモリに保持するストア
+
+    get() は辞書の参照だけで返す。設定ファイルの更新時刻は CONFIG_CHECK_INTERVAL ごとにしか確認せず、
+    変わっていたときだけ読み直す。GUIが save_config() で保存した内容は publish() で即座に反映する。
+    変更があった場合は subscribe() で登録した関数を (スナップショット, 変更されたキーの集合) で呼ぶ。
+    """
+
+    def __init__(self, path=None, check_interval=CONFIG_CHECK_INTERVAL, clock=time.monotonic):
+        """
+        初期化
+
+        Args:
+            path: 設定ファイルのパス（Noneなら CONFIG_FILE）
+            check_interval: 更新時刻を確認する最短間隔（秒）
+            clock: 時刻関数（テスト用）
+        """
+        self._path = path
+        self.check_interval = check_interval
+        self._clock = clock
+        self._snapshot = None
+        self._mtime = None
+        self._next_check = 0.0
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    @property
+    def path(self):
+        return self._path or CONFIG_FILE
+
+    def get(self, key, default=None):
+        """設定値を返す（スナップショットの辞書参照）"""
+        return self.snapshot().get(key, default)
+
+    def snapshot(self):
+        """現在の設定（読み取り専用）。一定間隔でファイルの更新を確認する"""
+        if self._snapshot is None or self._clock() >= self._next_check:
+            self._check_file()
+        return self._snapshot
+
+    def publish(self, config_data):
+        """GUIで変更・保存した設定を反映する（ファイルは読み直さない）"""
+        with self._lock:
+            self._mtime = _file_mtime(self.path)
+            self._next_check = self._clock() + self.check_interval
+            changed = self._replace(config_data)
+        self._notify(changed)
+
+    def subscribe(self, callback):
+        """
+        設定変更時に呼ぶ関数を登録する
+
+        Args:
+            callback: callback(snapshot, changed_keys)。変更したスレッド（GUI/BOT等）から呼ばれる
+
+        Returns:
+            登録を解除する関数
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def _check_file(self):
+        with self._lock:
+            if self._snapshot is not None and self._clock() < self._next_check:
+                return
+            self._next_check = self._clock() + self.check_interval
+            mtime = _file_mtime(self.path)
+            if self._snapshot is not None and mtime == self._mtime:
+                return
+            validated, _ = _read_config(self.path)
+            self._mtime = mtime
+            changed = self._replace(validated)
+        if changed:
+            logger.info(f"Config reloaded from {self.path}: {', '.join(sorted(changed))}")
+        self._notify(changed)
+
+    def _replace(self, config_data):
+        """スナップショットを差し替え、変更されたキーを返す（初回は通知しないので空）"""
+        previous = self._snapshot
+        self._snapshot = MappingProxyType(copy.deepcopy(dict(config_data)))
+        if previous is None:
+            return set()
+        return {key for key in set(previous) | set(self._snapshot) if previous.get(key) != self._snapshot.get(key)}
+
+    def _notify(self, changed):
+        if not changed:
+            return
+        snapshot = self._snapshot
+        for callback in list(self._subscribers):
+            try:
+                callback(snapshot, changed)
+            except Exception as e:
+                logger.error(f"Config subscriber failed: {e}", exc_info=True)
+
+
+config_store = ConfigStore()
+
+
+def load_config():
+    validated, changed = _read_config(CONFIG_FILE)
+    # 補完した内容を書き戻せなくても、このセッションでは検証済みの設定を使う
+    if not changed or not save_config(validated):
+        config_store.publish(validated)
+    return validated
 
 def save_config(config_data):
+    """
+    設定をファイルに保存し、保存できた場合のみ config_store に反映する
+
+    一時ファイルに書いてから置き換えるため、書き込みに失敗しても既存の設定ファイルは壊れない。
+
+    Returns:
+        bool: 保存できたらTrue
+    """
+    tmp_path = f"{CONFIG_FILE}.tmp"
     try:
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
+        with open(tmp_path, "w", encoding="utf-8") as f:
             json.dump(config_data, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, CONFIG_FILE)
     except Exception as e:
         logger.error(f"Failed to save config: {e}", exc_info=True)
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+    config_store.publish(config_data)
+    return True
 
 def check_gladia_usage(config_data):
     """
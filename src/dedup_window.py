@@ -0,0 +1,69 @@
+"""
+重複排除ウィンドウモジュール
+処理済みのメッセージIDを件数と時間の上限付きで記録し、再接続時などの二重処理を防ぐ
+"""
+import time
+from collections import deque
+
+DEFAULT_MAX_ENTRIES = 5000  # 記録するIDの最大件数
+DEFAULT_TTL_SECONDS = 600.0  # IDを記録しておく秒数
+
+
+class DedupWindow:
+    """
+    件数・時間上限付きの処理済みID集合
+
+    IDは集合（判定用）と登録順のキュー（削除順）の両方に記録し、
+    上限を超えたら・期限が切れたらキューの先頭（最も古いID）から削除する。
+    登録・判定・削除はいずれもO(1)（期限切れの削除は償却O(1)）。
+    同じIDを再度見ても登録時刻は更新しない（最初に処理した時刻から数える）。
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL_SECONDS,
+                 clock=time.monotonic):
+        """
+        初期化
+
+        Args:
+            max_entries: 記録する最大件数
+            ttl: 記録しておく秒数
+            clock: 時刻関数（テスト用）
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._seen = set()
+        self._order = deque()  # (登録時刻, id) / 先頭ほど古い
+
+    def __len__(self):
+        return len(self._seen)
+
+    def __contains__(self, item_id):
+        self._expire(self._clock())
+        return item_id in self._seen
+
+    def check_and_add(self, item_id) -> bool:
+        """
+        IDを記録する
+
+        Returns:
+            bool: すでに記録済み（重複）ならTrue
+        """
+        now = self._clock()
+        self._expire(now)
+        if item_id in self._seen:
+            return True
+        self._seen.add(item_id)
+        self._order.append((now, item_id))
+        if len(self._order) > self.max_entries:
+            self._seen.discard(self._order.popleft()[1])
+        return False
+
+    def clear(self):
+        self._seen.clear()
+        self._order.clear()
+
+    def _expire(self, now):
+        order = self._order
+        while order and now - order[0][0] >= self.ttl:
+            self._seen.discard(order.popleft()[1])
@@ -0,0 +1,90 @@
+"""
+エモート範囲の書き換えモジュール
+TwitchのIRCタグ emotes（"id:start-end,start-end/id:start-end"）を解析し、エモートを<k>タグで囲む
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple
+
+EMOTE_TAG_CACHE_SIZE = 1024  # 解析済みのemotesタグを保持する件数（同じエモート連投の再解析を避ける）
+
+
+@dataclass(frozen=True)
+class EmoteRewrite:
+    """エモートを<k>タグで囲んだテキストと、エモートの割合"""
+    text: str
+    emote_count: int = 0
+    emote_chars: int = 0  # エモート部分の文字数
+    content_chars: int = 0  # 空白以外の文字数
+
+    @property
+    def emote_ratio(self) -> float:
+        """空白以外の文字に占めるエモートの割合（0〜1）"""
+        return self.emote_chars / self.content_chars if self.content_chars else 0.0
+
+    @property
+    def emote_only(self) -> bool:
+        """エモートだけのメッセージか（翻訳・読み上げを省略できる）"""
+        return self.emote_count > 0 and self.emote_chars >= self.content_chars
+
+
+@lru_cache(maxsize=EMOTE_TAG_CACHE_SIZE)
+def parse_emote_tag(emote_tag: str) -> Tuple[Tuple[int, int], ...]:
+    """
+    emotesタグを開始位置順の範囲に変換する
+
+    Returns:
+        ((開始, 終了), ...)（終了は含まない。不正な範囲・重なる範囲は除く）
+    """
+    ranges = []
+    for emote_group in emote_tag.split('/'):
+        _, sep, positions = emote_group.partition(':')
+        if not sep:
+            continue
+        for pos in positions.split(','):
+            start, sep, end = pos.partition('-')
+            if not sep or not start.isdigit() or not end.isdigit():
+                continue
+            ranges.append((int(start), int(end) + 1))
+    ranges.sort()
+    result = []
+    last_end = 0
+    for start, end in ranges:
+        if start >= last_end and end > start:
+            result.append((start, end))
+            last_end = end
+    return tuple(result)
+
+
+def wrap_emotes(content: str, emote_tag: Optional[str]) -> EmoteRewrite:
+    """
+    エモートを<k>タグで囲む（DeepLのxmlタグ処理で翻訳させないため）
+
+    範囲は文字（コードポイント）単位。開始位置順の範囲を先頭から1回たどって組み立てる。
+
+    Args:
+        content: メッセージ本文
+        emote_tag: IRCタグ emotes の値（なければNone/空文字）
+
+    Returns:
+        EmoteRewrite
+    """
+    content_chars = len("".join(content.split()))
+    if not emote_tag:
+        return EmoteRewrite(content, content_chars=content_chars)
+    parts = []
+    pos = 0
+    count = 0
+    emote_chars = 0
+    for start, end in parse_emote_tag(emote_tag):
+        if end > len(content):
+            break
+        parts.append(content[pos:start])
+        parts.append("<k>")
+        parts.append(content[start:end])
+        parts.append("</k>")
+        pos = end
+        count += 1
+        emote_chars += end - start
+    parts.append(content[pos:])
+    return EmoteRewrite("".join(parts), count, emote_chars, content_chars)
@@ -10,6 +10,7 @@ import json
 import platform
 import os
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+from collections import OrderedDict
 from datetime import datetime
 from typing import Dict
 
@@ -25,7 +26,7 @@ except Exception as e:
 
 from src.auth import run_auth_server_and_get_token, build_auth_url, validate_token, validate_token_with_info
 from src.bot import TranslateBot
-from src.config import load_config, save_config, validate_deepl_api_key, validate_twitch_client_id
+from src.config import load_config, save_config, config_store, validate_deepl_api_key, validate_twitch_client_id
 from src.voice_listener import VoiceTranslator
 from src.overlay_server import update_translation, run_server_thread
 from src.logger import logger, set_log_level
@@ -35,6 +36,7 @@ from src.participant_tracker import get_tracker
 from src.voicevox_manager import get_voicevox_manager
 from src.comment_data import CommentData
 from src import translator
+from src.chat_sender import PRIORITY_CHAT, PRIORITY_SYSTEM
 from src.resource_monitor import get_monitor
 
 # 外観設定 / テーマ
@@ -150,8 +152,12 @@ class KototsunaApp:
 
         # 設定読み込み
         self.config = load_config()
-        translator.set_translation_filters(self.config.get("translation_filters", []))
-        translator.set_translation_dictionary(self.config.get("translation_dictionary", []))
+        translator.apply_config(self.config)
+        # 以降の変更（GUIでの保存・config.jsonの直接編集）は購読して反映する
+        config_store.subscribe(translator.apply_config)
+        config_store.subscribe(self._on_config_changed)
+        # 翻訳キャッシュの永続層を有効化（前回までの翻訳でメモリキャッシュを温める）
+        translator.init_persistent_cache()
 
         # テーマ適用（widgetビルド前に実行）
         saved_theme = self.config.get("ui_theme", "default")
@@ -166,6 +172,8 @@ class KototsunaApp:
         # ログ履歴（時系列で記録）
         self.chat_log_history = []
         self.chat_history = []
+        # 翻訳が後から届く可能性のあるコメント: id(comment) -> (comment, タイル情報枠, ログ項目, チャット履歴項目)
+        self._backfill_targets = OrderedDict()
 
         # Variables
         self.channel = tk.StringVar(value=self.config.get("channel_name", ""))
@@ -1185,6 +1193,10 @@ class KototsunaApp:
         # DeepL使用状況
         self.res_deepl_label = ctk.CTkLabel(parent, text="DeepL: 取得中...", font=("Consolas", 11))
         self.res_deepl_label.pack(anchor="w", pady=2)
+        self.res_breaker_label = ctk.CTkLabel(parent, text="DeepL接続: --", font=("Consolas", 11))
+        self.res_breaker_label.pack(anchor="w", pady=2)
+        self.res_pipeline_label = ctk.CTkLabel(parent, text="チャット処理: --", font=("Consolas", 11))
+        self.res_pipeline_label.pack(anchor="w", pady=2)
 
         # Gladia使用状況
         usage_sec = self.config.get("gladia_usage_seconds", 0)
@@ -1200,6 +1212,25 @@ class KototsunaApp:
         # 初回更新
         self._update_resources_panel()
 
+    @staticmethod
+    def _format_breaker_status(stats):
+        """サーキットブレーカーの状態を表示用の文字列にする"""
+        state = stats.get("breaker_state", "closed")
+        if state == "open":
+            return f"DeepL接続: 遮断中（{stats.get('breaker_retry_in', 0):.0f}秒後に再試行 / 見送り {stats.get('breaker_rejected', 0)}件）"
+        if state == "half_open":
+            return "DeepL接続: 復旧確認中"
+        return f"DeepL接続: 正常（遮断 {stats.get('breaker_opened', 0)}回）"
+
+    @staticmethod
+    def _format_pipeline_status(stats):
+        """チャット処理パイプラインの待ち件数と翻訳時間を表示用の文字列にする"""
+        if not stats:
+            return "チャット処理: --"
+        return (f"チャット処理: 待ち 分類{stats['classify_depth']}/翻訳{stats['translate_depth']}"
+                f"/出力{stats['publish_depth'] + stats['reorder_pending']} "
+                f"翻訳 平均{stats['translate_run_avg_ms']:.0f}ms 送信待ち{stats.get('send_queued', 0)}")
+
     def _update_resources_panel(self):
         """リソースパネルの表示を更新"""
         # システムリソース更新
@@ -1216,6 +1247,12 @@ class KototsunaApp:
                 self.res_cpu_label.configure(text=f"CPU: {cpu:.1f}%")
             if hasattr(self, 'res_threads_label'):
                 self.res_threads_label.configure(text=f"スレッド: {threads}")
+            if hasattr(self, 'res_breaker_label'):
+                self.res_breaker_label.configure(text=self._format_breaker_status(translator.get_stats()))
+            if hasattr(self, 'res_pipeline_label'):
+                bot = self.bot_instance
+                stats = bot.get_pipeline_stats() if bot is not None else None
+                self.res_pipeline_label.configure(text=self._format_pipeline_status(stats))
         except Exception as e:
             logger.debug(f"Resource panel update failed: {e}")
 
@@ -1287,7 +1324,6 @@ class KototsunaApp:
                 filters.append(word)
                 self.config["translation_filters"] = filters
                 save_config(self.config)
-                translator.set_translation_filters(filters)
             self.filter_entry.delete(0, "end")
             self._refresh_filter_list()
 
@@ -1309,7 +1345,6 @@ class KototsunaApp:
             filters.remove(word)
             self.config["translation_filters"] = filters
             save_config(self.config)
-            translator.set_translation_filters(filters)
         self._refresh_filter_list()
 
     def _add_custom_dict_entry(self):
@@ -1320,7 +1355,6 @@ class KototsunaApp:
             custom.append({"before": before, "after": after})
             self.config["translation_dictionary"] = custom
             save_config(self.config)
-            translator.set_translation_dictionary(custom)
             self.custom_before_entry.delete(0, "end")
             self.custom_after_entry.delete(0, "end")
             self._refresh_custom_dict_list()
@@ -1343,7 +1377,6 @@ class KototsunaApp:
             custom.pop(index)
             self.config["translation_dictionary"] = custom
             save_config(self.config)
-            translator.set_translation_dictionary(custom)
         self._refresh_custom_dict_list()
 
     # 参加者パネル用ヘルパー
@@ -2324,6 +2357,12 @@ class KototsunaApp:
             except Exception as e:
                 logger.debug(f"Failed to trace var for auto-save: {e}")
 
+    def _on_config_changed(self, snapshot, changed):
+        """設定変更の購読（TTSの話者を反映。GUIスレッド以外から呼ばれることがある）"""
+        tts = getattr(self, "tts", None)
+        if tts is not None and "voicevox_speaker_id" in changed:
+            tts.set_speaker(snapshot.get("voicevox_speaker_id", 14))
+
     def _auto_save_settings(self):
         """config.jsonへサイレント保存"""
         try:
@@ -2420,6 +2459,9 @@ class KototsunaApp:
         try:
             stats = translator.get_stats()
             msg = f"翻訳統計: {stats.get('requests',0)} req / {stats.get('cache_hits',0)} hit / {stats.get('filtered',0)} filtered"
+            breaker_state = stats.get("breaker_state", "closed")
+            if breaker_state != "closed":
+                msg += f" / DeepL遮断中({breaker_state})"
             if hasattr(self, "stats_label"):
                 self.stats_label.configure(text=msg)
         except Exception as e:
@@ -2456,6 +2498,7 @@ class KototsunaApp:
             log_entry["comment_data"] = comment_data.to_dict()
 
         self.log_history.append(log_entry)
+        chat_entry = None
 
         # チャット履歴への反映（チャット/ボイス、またはCommentDataがあるとき）
         if log_type in ("chat", "voice") or comment_data:
@@ -2466,10 +2509,12 @@ class KototsunaApp:
                 "time": timestamp
             }
             self.chat_history.append(entry)
+            chat_entry = entry
             if len(self.chat_history) > 200:
                 self.chat_history.pop(0)
             if self.chat_html_output.get():
                 self._export_chat_html()
+        return log_entry, chat_entry
 
     def _apply_log_style(self, textbox):
         try:
@@ -3243,15 +3288,7 @@ window.onload = function() {{
 
             # 翻訳結果（明るい青色）
             if comment.translated:
-                ctk.CTkLabel(
-                    info,
-                    text=f"↳ {comment.translated}",
-                    anchor="w",
-                    justify="left",
-                    wraplength=420,
-                    font=("Arial", 13),
-                    text_color="#B3D4FF"
-                ).pack(fill="x", pady=(3, 1))
+                self._add_translation_label(info, comment.translated)
 
             tile.pack(fill="x", padx=6, pady=3)
 
@@ -3269,10 +3306,25 @@ window.onload = function() {{
                 oldest.destroy()
 
             logger.debug(f"Comment tile added: {comment.display_username}")
+            return info
 
         except Exception as e:
             logger.error(f"Failed to add comment tile: {e}", exc_info=True)
             self.log_message("⚠️ コメントタイルの描画に失敗しました。ログを確認してください。", log_type="error")
+            return None
+
+    @staticmethod
+    def _add_translation_label(info, text):
+        """コメントタイルに翻訳結果の行を追加"""
+        ctk.CTkLabel(
+            info,
+            text=f"↳ {text}",
+            anchor="w",
+            justify="left",
+            wraplength=420,
+            font=("Arial", 13),
+            text_color="#B3D4FF"
+        ).pack(fill="x", pady=(3, 1))
 
     def on_comment_received(self, comment: CommentData):
         """
@@ -3289,8 +3341,13 @@ window.onload = function() {{
                 msg += f"\n    ➡ {comment.translated}"
 
             # 通常コメントログに追加
-            self.log_message(msg, log_type="chat", comment_data=comment)
-            self._add_comment_tile(comment)
+            log_entry, chat_entry = self.log_message(msg, log_type="chat", comment_data=comment)
+            info = self._add_comment_tile(comment)
+            if not comment.translated:
+                # 翻訳が遅れて届いたときに反映できるよう控えておく
+                self._backfill_targets[id(comment)] = (comment, info, log_entry, chat_entry)
+                while len(self._backfill_targets) > self.comment_tile_limit:
+                    self._backfill_targets.popitem(last=False)
 
             # 特別イベントの検出（サブスクライバー、モデレーター、VIP）
             if comment.is_subscriber or comment.is_moderator or comment.is_vip:
@@ -3311,6 +3368,32 @@ window.onload = function() {{
         # UI操作はメインスレッドに投げる
         self.master.after(0, _update_ui)
 
+    def on_translation_backfilled(self, comment: CommentData):
+        """
+        遅れて届いた翻訳を表示済みのコメントに反映する（タイル・ログ・オーバーレイ）
+
+        Args:
+            comment: translated を設定済みのCommentData（on_comment_receivedに渡したもの）
+        """
+        def _update_ui():
+            target = self._backfill_targets.pop(id(comment), None)
+            if target is None or target[0] is not comment:
+                return
+            _, info, log_entry, chat_entry = target
+            if info is not None and info.winfo_exists():
+                self._add_translation_label(info, comment.translated)
+            # 書き出すログ・チャット履歴にも翻訳を残す
+            if log_entry and "comment_data" in log_entry:
+                log_entry["comment_data"]["translated"] = comment.translated
+            if chat_entry is not None:
+                chat_entry["translated"] = comment.translated
+                if self.chat_html_output.get():
+                    self._export_chat_html()
+            self.log_message(f"➡ (遅延翻訳) {comment.display_username}: {comment.translated}")
+
+        update_translation(comment.translated)
+        self.master.after(0, _update_ui)
+
     def log_special_event(self, message: str, event_type: str = "other"):
         """
         特別イベントをログに記録
@@ -3916,12 +3999,31 @@ window.onload = function() {{
 
         # 新しいイベントループでBOTを実行（スレッド内でBOTインスタンス作成）
         threading.Thread(target=self._run_bot_in_thread, args=bot_params, daemon=True).start()
+        # 過去のチャットログで翻訳キャッシュを温める（DeepLは呼ばない）
+        self._start_cache_prewarm()
         self.log_message(f"🤖 BOTを起動しました (Channel: {channel})")
         self._set_status(f"BOT稼働中: {channel}", "success")
         # ヘッダーUI更新
         self._update_header_bot_button(True)
         self._update_connection_badge(True)
 
+    def _start_cache_prewarm(self):
+        """設定されたチャットログから翻訳キャッシュを事前に読み込む（バックグラウンド）"""
+        paths = self.config.get("translation_prewarm_logs", [])
+        if not paths:
+            return
+        top_n = self.config.get("translation_prewarm_top_n", 500)
+
+        def prewarm():
+            try:
+                result = translator.prewarm_cache_from_logs(paths, top_n)
+                msg = f"💾 翻訳キャッシュを過去ログから準備しました: {result['seeded']}/{result['candidates']}件"
+                self.master.after(0, lambda: self.log_message(msg, log_type="system"))
+            except Exception as e:
+                logger.error(f"Translation cache prewarm failed: {e}", exc_info=True)
+
+        threading.Thread(target=prewarm, name="CachePrewarm", daemon=True).start()
+
     def stop_bot(self):
         if self.bot_instance:
             try:
@@ -3985,6 +4087,22 @@ window.onload = function() {{
         except Exception as e:
             logger.error(f"Failed to stop overlay server: {e}", exc_info=True)
 
+        try:
+            # 翻訳エンジンを停止（送信待ちの翻訳は原文で返る）
+            logger.info("Stopping translation engine...")
+            translator.stop_engine()
+            logger.info("Translation engine stopped.")
+        except Exception as e:
+            logger.error(f"Failed to stop translation engine: {e}", exc_info=True)
+
+        try:
+            # 翻訳キャッシュの未書き込み分を保存
+            logger.info("Closing translation cache...")
+            translator.close_persistent_cache()
+            logger.info("Translation cache closed.")
+        except Exception as e:
+            logger.error(f"Failed to close translation cache: {e}", exc_info=True)
+
         try:
             # VOICEVOX Engineを停止
             if hasattr(self, 'voicevox_manager') and self.voicevox_manager:
@@ -4274,7 +4392,6 @@ window.onload = function() {{
             return
         filters.append(word)
         self.config["translation_filters"] = filters
-        translator.set_translation_filters(filters)
         save_config(self.config)
         self.translation_filter_entry.delete(0, "end")
         self.refresh_translation_filters()
@@ -4285,7 +4402,6 @@ window.onload = function() {{
         if word in filters:
             filters.remove(word)
             self.config["translation_filters"] = filters
-            translator.set_translation_filters(filters)
             save_config(self.config)
             self.refresh_translation_filters()
             self.log_message(f"翻訳フィルタを削除: {word}")
@@ -4313,7 +4429,6 @@ window.onload = function() {{
         entries = list(self.config.get("translation_dictionary", []))
         entries.append({"source": src, "target": dst})
         self.config["translation_dictionary"] = entries
-        translator.set_translation_dictionary(entries)
         save_config(self.config)
         self.translation_dict_src.delete(0, "end")
         self.translation_dict_dst.delete(0, "end")
@@ -4325,7 +4440,6 @@ window.onload = function() {{
         if 0 <= index < len(entries):
             removed = entries.pop(index)
             self.config["translation_dictionary"] = entries
-            translator.set_translation_dictionary(entries)
             save_config(self.config)
             self.refresh_translation_dict_list()
             self.log_message(f"翻訳辞書を削除: {removed.get('source', '')}")
@@ -4990,7 +5104,7 @@ window.onload = function() {{
             participant_str = "→".join(participants)
             message = f"【待機参加者リスト】{participant_str}"
 
-        if self._send_text_to_chat(message):
+        if self._send_text_to_chat(message, priority=PRIORITY_SYSTEM):
             self.log_message("📢 参加者リストをチャットに送信しました")
         else:
             self.log_message("⚠️ BOTが接続されていないため、送信できませんでした")
@@ -5252,8 +5366,8 @@ window.onload = function() {{
         }
         self.log_message(f"✨ {panel_name_jp.get(panel_name, panel_name)}のサイズを'{size}'に変更しました", log_type="system")
 
-    def _send_text_to_chat(self, text: str) -> bool:
-        """BOT経由でチャットに送信（接続チェック込み）"""
+    def _send_text_to_chat(self, text: str, priority=PRIORITY_CHAT, prefix="") -> bool:
+        """BOTの送信キュー経由でチャットに送信（接続チェック込み）"""
         if not text or not text.strip():
             return False
         if not self.bot_instance:
@@ -5271,15 +5385,15 @@ window.onload = function() {{
                 return False
 
             channel = channels[0]
-            import asyncio
 
             # TwitchIOのイベントループ参照を取得（event_readyでセットしたものを優先）
             loop = getattr(self.bot_instance, "_running_loop", None) or getattr(self.bot_instance, "loop", None)
             if not loop:
                 return False
 
-            asyncio.run_coroutine_threadsafe(channel.send(text + '\u200B'), loop)
-            logger.debug(f"Sent chat message via helper: {text[:50]}...")
+            # 送信はBOTのループ上の送信キューで行う（Twitchの送信制限に合わせて順番に送る）
+            loop.call_soon_threadsafe(self.bot_instance.send_chat, text, priority, prefix, channel)
+            logger.debug(f"Queued chat message via helper: {text[:50]}...")
             return True
         except Exception as e:
             logger.error(f"Failed to send chat message: {e}", exc_info=True)
@@ -5342,5 +5456,5 @@ window.onload = function() {{
 
         # 音声翻訳結果をチャット送信（音声翻訳機能がONなら送信）
         if self.voice_var.get() and translated and translated != "(No API Key)":
-            if not self._send_text_to_chat(f"[Voice] {translated}"):
+            if not self._send_text_to_chat(translated, prefix="[Voice] "):
                 logger.warning("Voice translation could not be sent to chat (connection not ready?)")
@@ -0,0 +1,77 @@
+"""
+HTTPセッション管理モジュール
+イベントループごとにaiohttp.ClientSessionを共有し、接続を再利用する
+"""
+import asyncio
+import weakref
+import aiohttp
+from src.logger import logger
+
+# コネクションプール設定
+POOL_LIMIT = 20  # 全体の同時接続数上限
+POOL_LIMIT_PER_HOST = 8  # ホストごとの同時接続数上限
+KEEPALIVE_TIMEOUT = 60  # アイドル接続を保持する秒数
+DNS_CACHE_TTL = 300  # DNS解決結果のキャッシュ秒数
+PREWARM_TIMEOUT = 5  # 事前接続のタイムアウト秒数
+
+# ClientSessionは作成したループでしか使えないため、ループごとに保持する
+_sessions = weakref.WeakKeyDictionary()
+
+
+def _create_session() -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=POOL_LIMIT,
+        limit_per_host=POOL_LIMIT_PER_HOST,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=DNS_CACHE_TTL,
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
+def get_session() -> aiohttp.ClientSession:
+    """
+    実行中のイベントループ用の共有セッションを取得する
+
+    セッションは閉じないこと（close_sessionで一括して閉じる）
+
+    Returns:
+        aiohttp.ClientSession
+    """
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        session = _create_session()
+        _sessions[loop] = session
+        logger.debug("Created shared HTTP session")
+    return session
+
+
+async def prewarm(urls):
+    """
+    指定URLのホストへ事前に接続しておく（DNS・TCP・TLSハンドシェイクを済ませる）
+
+    Args:
+        urls: 接続しておくURLのリスト
+    """
+    session = get_session()
+    timeout = aiohttp.ClientTimeout(total=PREWARM_TIMEOUT)
+
+    async def _touch(url):
+        try:
+            async with session.head(url, timeout=timeout) as resp:
+                # ステータスは問わない（接続がプールに戻れば十分）
+                await resp.read()
+                logger.debug(f"Prewarmed connection: {url} ({resp.status})")
+        except Exception as e:
+            logger.debug(f"Prewarm failed for {url}: {e}")
+
+    await asyncio.gather(*(_touch(url) for url in urls if url))
+
+
+async def close_session():
+    """実行中のイベントループの共有セッションを閉じる"""
+    loop = asyncio.get_running_loop()
+    session = _sessions.pop(loop, None)
+    if session is not None and not session.closed:
+        await session.close()
+        logger.debug("Closed shared HTTP session")
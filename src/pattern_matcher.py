@@ -0,0 +1,118 @@
+"""
+複数パターン照合モジュール
+Aho-Corasick法で多数のキーワードを1パスで検索する
+"""
+from typing import Any, Iterator, List, Tuple
+
+
+def fold_case(text: str) -> str:
+    """
+    大文字小文字を無視した比較用に変換する（文字数は変えない）
+
+    str.lower() で文字数が変わる文字（例: 'İ'）はそのまま残す
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+class PatternMatcher:
+    """
+    Aho-Corasickオートマトン（大文字小文字を区別しない）
+
+    add() でパターンを登録し build() で構築した後、iter_matches() で照合する。
+    照合コストはテキスト長と一致件数に比例し、パターン数には依存しない。
+    """
+
+    def __init__(self):
+        self._goto: List[dict] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[list] = [[]]  # 各状態で一致するパターン [(長さ, payload), ...]
+        self._built = False
+        self.pattern_count = 0
+
+    def add(self, pattern: str, payload: Any):
+        """
+        パターンを登録する
+
+        Args:
+            pattern: 検索する文字列（空文字は無視）
+            payload: 一致時に返す値
+        """
+        if not pattern:
+            return
+        folded = fold_case(pattern)
+        state = 0
+        for c in folded:
+            nxt = self._goto[state].get(c)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[state][c] = nxt
+            state = nxt
+        self._out[state].append((len(folded), payload))
+        self.pattern_count += 1
+        self._built = False
+
+    def build(self):
+        """失敗遷移を構築する（幅優先）"""
+        queue = list(self._goto[0].values())
+        for child in queue:
+            self._fail[child] = 0
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for c, child in self._goto[state].items():
+                queue.append(child)
+                f = self._fail[state]
+                while f and c not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[child] = self._goto[f].get(c, 0)
+                # 接尾辞で一致するパターンも出力に含める
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        self._built = True
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, Any]]:
+        """
+        テキスト中の一致をすべて列挙する
+
+        Yields:
+            (開始位置, 終了位置, payload) ※終了位置は含まない。終了位置の昇順
+        """
+        if not self._built:
+            self.build()
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        state = 0
+        for i, c in enumerate(fold_case(text)):
+            while state and c not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(c, 0)
+            if out[state]:
+                end = i + 1
+                for length, payload in out[state]:
+                    yield end - length, end, payload
+
+
+def select_leftmost_longest(matches) -> list:
+    """
+    重ならない一致を最左最長で選ぶ
+
+    Args:
+        matches: [(開始位置, 終了位置, 優先順位, ...), ...]（同じ範囲なら優先順位の小さいものを採用）
+
+    Returns:
+        採用した一致のリスト（開始位置順）
+    """
+    selected = []
+    pos = 0
+    for match in sorted(matches, key=lambda m: (m[0], m[0] - m[1], m[2])):
+        if match[0] >= pos:
+            selected.append(match)
+            pos = match[1]
+    return selected
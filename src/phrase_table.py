@@ -0,0 +1,160 @@
+"""
+定型フレーズ表モジュール
+チャットの定型句（gg, 草, 888, おつ など）はDeepLに送らず、表引きで即座に訳す
+"""
+import re
+import unicodedata
+from typing import Iterable, Optional
+from src.logger import logger
+from src.script_detection import is_japanese
+
+# 同梱の定型フレーズ（翻訳先言語 -> {フレーズ: 訳}）。キーは phrase_key() で正規化した形で書く
+BUILTIN_PHRASES = {
+    "JA": {
+        "gg": "GG",
+        "gg wp": "GG、ナイスプレイ",
+        "wp": "ナイスプレイ",
+        "glhf": "頑張って、楽しんで",
+        "gl": "頑張って",
+        "lol": "笑",
+        "lmao": "爆笑",
+        "omg": "まじか",
+        "wow": "すごい",
+        "nice": "ナイス",
+        "nice shot": "ナイスショット",
+        "pog": "すごい",
+        "poggers": "すごい",
+        "kawaii": "かわいい",
+        "so cute": "かわいすぎる",
+        "cute": "かわいい",
+        "hi": "こんにちは",
+        "hello": "こんにちは",
+        "hey": "やあ",
+        "first time here": "初見です",
+        "first": "一番乗り",
+        "good morning": "おはよう",
+        "good night": "おやすみ",
+        "bye": "またね",
+        "see you": "またね",
+        "thank you": "ありがとう",
+        "thanks": "ありがとう",
+        "ty": "ありがとう",
+        "let's go": "いくぞ",
+        "lets go": "いくぞ",
+        "congrats": "おめでとう",
+        "brb": "すぐ戻ります",
+        "welcome": "いらっしゃい",
+    },
+    "EN": {
+        "草": "lol",
+        "草草": "lol",
+        "w": "lol",
+        "ww": "lol",
+        "888": "clap clap",
+        "おつ": "GG, good work!",
+        "おつかれ": "Good work!",
+        "おつかれさま": "Thanks for your hard work!",
+        "おつかれさまです": "Thanks for your hard work!",
+        "お疲れ様です": "Thanks for your hard work!",
+        "かわいい": "Cute!",
+        "初見です": "First time here!",
+        "こんにちは": "Hello!",
+        "こんばんは": "Good evening!",
+        "おはよう": "Good morning!",
+        "おやすみ": "Good night!",
+        "ありがとう": "Thank you!",
+        "ナイス": "Nice!",
+        "すごい": "Amazing!",
+        "うまい": "Nice play!",
+        "それな": "So true",
+        "きたー": "Here it comes!",
+    },
+}
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+_TRAILING_PUNCT_PATTERN = re.compile(r"[!?.~ー〜]+$")
+_LETTER_REPEAT_PATTERN = re.compile(r"([^\d\s])\1{2,}")
+_DIGIT_REPEAT_PATTERN = re.compile(r"(\d)\1{3,}")
+
+
+def phrase_key(text: str) -> str:
+    """
+    表引き用にフレーズを正規化する
+
+    NFKC・小文字化・空白の整理・末尾の記号除去を行い、
+    連続文字は2文字（"gggg" → "gg"）、連続数字は3文字（"88888" → "888"）に畳む
+    """
+    key = unicodedata.normalize("NFKC", text).lower()
+    key = _WHITESPACE_PATTERN.sub(" ", key).strip()
+    key = _TRAILING_PUNCT_PATTERN.sub("", key)
+    key = _LETTER_REPEAT_PATTERN.sub(r"\1\1", key)
+    return _DIGIT_REPEAT_PATTERN.sub(r"\1\1\1", key)
+
+
+class PhraseTable:
+    """
+    定型フレーズの対訳表
+
+    (翻訳先言語, フレーズ) をキーにした辞書を2つ（入力そのまま / 正規化後）持ち、1〜2回の辞書参照で引く。
+    """
+
+    def __init__(self, user_entries: Optional[Iterable[dict]] = None):
+        self._exact = {}
+        self._normalized = {}
+        self.load(user_entries or [])
+
+    def __len__(self):
+        return len(self._normalized)
+
+    def load(self, user_entries: Iterable[dict]):
+        """
+        同梱フレーズとユーザー定義フレーズで表を作り直す（ユーザー定義が優先）
+
+        Args:
+            user_entries: [{"source": "gg", "target": "ナイス", "target_lang": "JA"}, ...]
+                target_lang を省略した場合は訳に日本語を含めば "JA"、それ以外は "EN"
+        """
+        exact = {}
+        normalized = {}
+        for target_lang, phrases in BUILTIN_PHRASES.items():
+            for source, target in phrases.items():
+                normalized[(target_lang, phrase_key(source))] = target
+        user_count = 0
+        for entry in user_entries:
+            if not isinstance(entry, dict):
+                continue
+            source = str(entry.get("source", "")).strip()
+            target = str(entry.get("target", "")).strip()
+            if not source or not target:
+                continue
+            target_lang = str(entry.get("target_lang") or ("JA" if is_japanese(target) else "EN")).upper()
+            exact[(target_lang, source)] = target
+            normalized[(target_lang, phrase_key(source))] = target
+            user_count += 1
+        self._exact = exact
+        self._normalized = normalized
+        logger.info(f"Phrase table loaded: {len(normalized)} phrases ({user_count} user-defined)")
+
+    def lookup(self, text: str, target_langs: Iterable[str]) -> Optional[str]:
+        """
+        フレーズの訳を引く（入力そのまま → 正規化後の順）
+
+        Args:
+            text: メッセージ
+            target_langs: 探す翻訳先言語（先に書いたものを優先）
+
+        Returns:
+            訳（見つからなければNone）
+        """
+        stripped = text.strip()
+        key = None
+        for target_lang in target_langs:
+            hit = self._exact.get((target_lang, stripped))
+            if hit is not None:
+                return hit
+            if key is None:
+                key = phrase_key(stripped)
+            hit = self._normalized.get((target_lang, key))
+            if hit is not None:
+                return hit
+        return None
@@ -0,0 +1,49 @@
+"""
+文字種判定モジュール
+日本語・英字の判定と、翻訳が不要なメッセージの判定を行う
+"""
+import re
+from src.text_normalizer import PROTECTED_PATTERN
+
+# ひらがな・カタカナ・漢字（CJK統合漢字と拡張A）
+JAPANESE_PATTERN = re.compile(r"[぀-ゟ゠-ヿ㐀-䶿一-鿿]")
+LATIN_PATTERN = re.compile(r"[A-Za-z]")
+# 数字・記号・空白・絵文字以外の文字（いずれかの言語の文字）
+LETTER_PATTERN = re.compile(r"[^\W\d_]")
+
+# 翻訳不要と判定した理由
+SKIP_NO_CONTENT = "no_content"  # エモート・数字・URL・メンション・記号のみ
+SKIP_SAME_LANGUAGE = "same_language"  # すでに翻訳先の言語
+
+
+def is_japanese(text: str) -> bool:
+    """テキストに日本語（ひらがな・カタカナ・漢字）が含まれているか"""
+    if not text:
+        return False
+    return JAPANESE_PATTERN.search(text) is not None
+
+
+def classify_skip(text: str, mode: str):
+    """
+    翻訳しても結果が変わらないメッセージを判定する
+
+    Args:
+        text: 翻訳対象テキスト（エモートは<k>タグで囲まれている想定）
+        mode: 翻訳モード（'英→日' / '日→英' / '自動'）
+
+    Returns:
+        str or None: 翻訳不要ならその理由（SKIP_*）、翻訳が必要ならNone
+    """
+    body = PROTECTED_PATTERN.sub(" ", text)
+    if LETTER_PATTERN.search(body) is None:
+        return SKIP_NO_CONTENT
+
+    if mode == '英→日':
+        # 日本語の文字が英字より多ければすでに日本語とみなす
+        japanese = len(JAPANESE_PATTERN.findall(body))
+        if japanese and japanese > len(LATIN_PATTERN.findall(body)):
+            return SKIP_SAME_LANGUAGE
+    elif mode == '日→英':
+        if JAPANESE_PATTERN.search(body) is None:
+            return SKIP_SAME_LANGUAGE
+    return None
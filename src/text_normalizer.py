@@ -0,0 +1,137 @@
+"""
+翻訳キャッシュ用テキスト正規化モジュール
+表記ゆれ（全角/半角、空白、連続文字、大文字小文字）をまとめてキャッシュのヒット率を上げる
+"""
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import List
+
+# <k>...</k> で囲まれたエモート（BOT側で付与）・URL・@メンションをプレースホルダーに置き換える
+# （メンションはTwitchのユーザー名の文字のみ。メールアドレスの "@" は対象外。
+#  プレースホルダーより短い "@bob" などは置き換えると送信文字数が増えるため、そのまま送る）
+PROTECTED_PATTERN = re.compile(r"<k>.*?</k>|https?://\S+|www\.\S+|(?<![\w.@])@[A-Za-z0-9_]+", re.IGNORECASE)
+_PLACEHOLDER_PATTERN = re.compile(r"<k>(\d+)</k>")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+# 数字以外の同じ文字が3回以上続く部分（"wwwww", "草草草", "!!!!"）
+_REPEAT_PATTERN = re.compile(r"([^\d\s])\1{2,}")
+# 文末: 日本語の句点・感嘆符・疑問符、または空白/末尾が続く "." "!" "?"（"3.5" や "e.g" は区切らない）
+_SENTENCE_END_PATTERN = re.compile(r"(?:[。！？]+|[.!?]+(?=\s|$))[\"'」』）)]*\s*")
+
+MAX_REPEAT = 2  # 連続文字をこの回数に畳む
+
+
+@dataclass
+class NormalizedText:
+    """
+    正規化済みテキスト（キャッシュキー）と、送信用テキスト・復元用のプレースホルダー一覧
+
+    text は表記ゆれを畳んだキャッシュキーで、DeepLには送らない。
+    DeepLには原文の保護部分だけをプレースホルダーにした source を送る（翻訳の入力は変えない）。
+    """
+    text: str
+    placeholders: List[str] = field(default_factory=list)
+    source: str = ""
+
+    @property
+    def chars_saved(self) -> int:
+        """プレースホルダー化で送信しなくて済んだ文字数"""
+        return self.chars_saved_in(self.source)
+
+    def chars_saved_in(self, fragment: str) -> int:
+        """送信用テキストの一部（文単位で送る場合の1文）に含まれるプレースホルダーで減った文字数"""
+        saved = 0
+        for match in _PLACEHOLDER_PATTERN.finditer(fragment):
+            index = int(match.group(1))
+            if index < len(self.placeholders):
+                saved += len(self.placeholders[index]) - len(match.group(0))
+        return saved
+
+    def restore(self, translated: str) -> str:
+        """翻訳結果のプレースホルダーを元のエモート/URL/メンションに戻す"""
+        if not self.placeholders or not translated:
+            return translated
+
+        def _replace(match):
+            index = int(match.group(1))
+            if index < len(self.placeholders):
+                return self.placeholders[index]
+            return match.group(0)
+
+        return _PLACEHOLDER_PATTERN.sub(_replace, translated)
+
+
+def _is_case_fold_safe(text: str) -> bool:
+    """
+    小文字化しても意味が変わらないか
+
+    すべて大文字（"GG", "LOL"）か、先頭以外がすべて小文字（"Hello there"）の場合のみ安全とみなす。
+    途中に大文字を含む文（固有名詞・略語の可能性）はそのまま残す。
+    """
+    letters = [c for c in text if c.isalpha() and c.lower() != c.upper()]
+    if not letters:
+        return False
+    if all(c.isupper() for c in letters):
+        return True
+    return all(c.islower() for c in letters[1:])
+
+
+def fold_for_cache(text: str) -> str:
+    """
+    キャッシュキー用に表記ゆれを畳む（プレースホルダー化済みのテキストに使う）
+
+    1. Unicode NFKC正規化
+    2. 空白の連続を1つにまとめ、前後の空白を除去
+    3. 数字以外の連続文字を2文字に畳む（"wwwww" → "ww"）
+    4. 安全な場合のみ小文字化
+    """
+    result = unicodedata.normalize("NFKC", text)
+    result = _WHITESPACE_PATTERN.sub(" ", result).strip()
+    result = _REPEAT_PATTERN.sub(lambda m: m.group(1) * MAX_REPEAT, result)
+    # プレースホルダーは小文字と数字のみなので、全体を小文字化しても形は変わらない
+    if _is_case_fold_safe(_PLACEHOLDER_PATTERN.sub("", result)):
+        result = result.lower()
+    return result
+
+
+def normalize_for_cache(text: str) -> NormalizedText:
+    """
+    キャッシュキーと送信用テキストを作る
+
+    エモート・URL・@メンションのうちプレースホルダーより長いものを番号付きプレースホルダー（<k>0</k>）に
+    置換したものを送信用とし、それを fold_for_cache() で畳んだものをキャッシュキーにする。
+
+    Returns:
+        NormalizedText
+    """
+    placeholders = []
+
+    def _protect(match):
+        placeholder = f"<k>{len(placeholders)}</k>"
+        if len(match.group(0)) <= len(placeholder):
+            return match.group(0)
+        placeholders.append(match.group(0))
+        return placeholder
+
+    source = PROTECTED_PATTERN.sub(_protect, text)
+    return NormalizedText(fold_for_cache(source), placeholders, source)
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    文単位に分割する（区切り文字と直後の空白は前の文に含める）
+
+    "".join(split_sentences(text)) == text が常に成り立つ
+
+    Returns:
+        文のリスト（区切りがなければ [text]）
+    """
+    segments = []
+    start = 0
+    for match in _SENTENCE_END_PATTERN.finditer(text):
+        if match.end() > start:
+            segments.append(text[start:match.end()])
+            start = match.end()
+    if start < len(text):
+        segments.append(text[start:])
+    return segments or [text]
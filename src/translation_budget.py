@@ -0,0 +1,224 @@
+"""
+DeepL文字数予算モジュール
+送信した文字数をローカルで集計し、上限が近づいたら翻訳を段階的に絞る
+"""
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from src.logger import logger
+
+# 予算の段階（数値が大きいほど制限が強い）
+LEVEL_NORMAL = 0  # 制限なし
+LEVEL_SKIP_SHORT = 1  # 短いメッセージは翻訳しない
+LEVEL_PRIORITY_ONLY = 2  # 優先ユーザー（サブスク以上）のみ翻訳
+LEVEL_CACHE_ONLY = 3  # キャッシュのみ（DeepLへ送信しない）
+
+LEVEL_NAMES = {
+    LEVEL_NORMAL: "normal",
+    LEVEL_SKIP_SHORT: "skip_short",
+    LEVEL_PRIORITY_ONLY: "priority_only",
+    LEVEL_CACHE_ONLY: "cache_only",
+}
+
+# 既定のしきい値（使用率）
+DEFAULT_SKIP_SHORT_RATIO = 0.80
+DEFAULT_PRIORITY_ONLY_RATIO = 0.90
+DEFAULT_CACHE_ONLY_RATIO = 0.97
+DEFAULT_SHORT_MESSAGE_CHARS = 6  # これ未満の文字数を「短いメッセージ」とみなす
+DEFAULT_MIN_PRIORITY = 1  # LEVEL_PRIORITY_ONLYで翻訳する最低優先度（1=サブスク）
+
+RECONCILE_INTERVAL = 300  # /v2/usage と突き合わせる間隔（秒）
+BURN_WINDOW_SECONDS = 3600  # 消費ペースを計算する期間（秒）
+PROJECTION_MIN_ELAPSED = 86400  # 月初は経過時間をこの秒数とみなす（初日の配信だけで月間の見込みを出さない）
+
+
+def _month_progress(now: datetime):
+    """
+    DeepLの無料枠がリセットされる月初からの経過秒数と、月末までの秒数（概算）
+
+    Returns:
+        (elapsed, remaining)
+    """
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    if now.month == 12:
+        next_month = month_start.replace(year=now.year + 1, month=1)
+    else:
+        next_month = month_start.replace(month=now.month + 1)
+    return (now - month_start).total_seconds(), max(0.0, (next_month - now).total_seconds())
+
+
+class CharacterBudget:
+    """
+    DeepLの文字数予算を管理するクラス
+
+    送信した文字数を都度加算し、定期的に /v2/usage の値で補正する。
+    制限段階は記録・補正のたびに計算しておき、allows() は比較だけで判定する。
+    """
+
+    def __init__(self, usage_fetcher=None,
+                 skip_short_ratio: float = DEFAULT_SKIP_SHORT_RATIO,
+                 priority_only_ratio: float = DEFAULT_PRIORITY_ONLY_RATIO,
+                 cache_only_ratio: float = DEFAULT_CACHE_ONLY_RATIO,
+                 short_message_chars: int = DEFAULT_SHORT_MESSAGE_CHARS,
+                 min_priority: int = DEFAULT_MIN_PRIORITY,
+                 reconcile_interval: float = RECONCILE_INTERVAL,
+                 calendar_clock=datetime.now):
+        """
+        初期化
+
+        Args:
+            usage_fetcher: APIキーを受け取り {'character_count', 'character_limit', 'error'} を返す関数
+            skip_short_ratio: 短いメッセージを翻訳しなくなる使用率
+            priority_only_ratio: 優先ユーザーのみ翻訳する使用率
+            cache_only_ratio: キャッシュのみで応答する使用率
+            short_message_chars: 短いメッセージとみなす文字数
+            min_priority: 優先ユーザーとみなす最低優先度
+            reconcile_interval: 使用量APIと突き合わせる間隔（秒）
+            calendar_clock: 現在日時を返す関数（月末の見込み計算用。テスト用）
+        """
+        self.usage_fetcher = usage_fetcher
+        self.skip_short_ratio = skip_short_ratio
+        self.priority_only_ratio = priority_only_ratio
+        self.cache_only_ratio = cache_only_ratio
+        self.short_message_chars = short_message_chars
+        self.min_priority = min_priority
+        self.reconcile_interval = reconcile_interval
+        self._calendar_clock = calendar_clock
+
+        self.used = 0
+        self.limit = 0  # 0は未取得（制限しない）
+        self.level = LEVEL_NORMAL
+        self._samples = deque()  # (time, chars)
+        self._window_chars = 0
+        self._lock = threading.Lock()
+        self._api_key = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def configure(self, **kwargs):
+        """しきい値を変更する（未知のキーは無視）"""
+        with self._lock:
+            for key, value in kwargs.items():
+                if value is not None and hasattr(self, key):
+                    setattr(self, key, value)
+            self._update_level()
+
+    def ensure_tracking(self, api_key: str):
+        """APIキーの使用量の定期取得を開始する（同じキーなら何もしない）"""
+        if not api_key or self.usage_fetcher is None:
+            return
+        if api_key == self._api_key and self._thread and self._thread.is_alive():
+            return
+        self.stop()
+        self._api_key = api_key
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._reconcile_loop, args=(api_key, self._stop_event),
+                                        name="DeepLBudget", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread = None
+
+    def record(self, chars: int):
+        """DeepLへ送信した文字数を記録する"""
+        if chars <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self.used += chars
+            self._samples.append((now, chars))
+            self._window_chars += chars
+            self._trim_samples(now)
+            self._update_level()
+
+    def reconcile(self, character_count: int, character_limit: int):
+        """使用量APIの値でローカルの集計を補正する"""
+        with self._lock:
+            self.used = character_count
+            self.limit = character_limit
+            self._update_level()
+        logger.info(f"DeepL budget reconciled: {character_count}/{character_limit} ({LEVEL_NAMES[self.level]})")
+
+    def allows(self, text_length: int, priority: int = 0) -> bool:
+        """このメッセージをDeepLへ送信してよいか（計算済みの段階と比較するだけ）"""
+        level = self.level
+        if level == LEVEL_NORMAL:
+            return True
+        if level >= LEVEL_CACHE_ONLY:
+            return False
+        if level >= LEVEL_PRIORITY_ONLY and priority < self.min_priority:
+            return False
+        return text_length >= self.short_message_chars or priority >= self.min_priority
+
+    def burn_rate_per_hour(self) -> float:
+        """直近の消費ペース（文字/時）"""
+        with self._lock:
+            self._trim_samples(time.monotonic())
+            return self._burn_rate_locked()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            self._trim_samples(time.monotonic())
+            burn = self._burn_rate_locked()
+            remaining = max(0, self.limit - self.used) if self.limit else None
+            return {
+                "used": self.used,
+                "limit": self.limit,
+                "level": LEVEL_NAMES[self.level],
+                "burn_per_hour": burn,
+                "hours_left": (remaining / burn) if remaining is not None and burn > 0 else None,
+            }
+
+    def _burn_rate_locked(self) -> float:
+        if not self._samples:
+            return 0.0
+        span = max(time.monotonic() - self._samples[0][0], 60.0)  # 開始直後の過大評価を避ける
+        return self._window_chars * 3600.0 / span
+
+    def _trim_samples(self, now):
+        while self._samples and now - self._samples[0][0] > BURN_WINDOW_SECONDS:
+            _, chars = self._samples.popleft()
+            self._window_chars -= chars
+
+    def _update_level(self):
+        if not self.limit:
+            self.level = LEVEL_NORMAL
+            return
+        ratio = self.used / self.limit
+        if ratio >= self.cache_only_ratio:
+            level = LEVEL_CACHE_ONLY
+        elif ratio >= self.priority_only_ratio:
+            level = LEVEL_PRIORITY_ONLY
+        elif ratio >= self.skip_short_ratio:
+            level = LEVEL_SKIP_SHORT
+        else:
+            level = LEVEL_NORMAL
+        # 今月のこれまでの平均ペースだと月末までに上限を超える見込みなら、早めに短文を絞る
+        # （配信中の消費ペースを残り時間すべてに掛けると、配信していない時間も消費する前提になるため、
+        #  配信していない時間を含めた月初からの平均で見込む）
+        if level == LEVEL_NORMAL and self._projected_usage_locked() > self.limit:
+            level = LEVEL_SKIP_SHORT
+        if level != self.level:
+            logger.warning(f"DeepL budget level changed: {LEVEL_NAMES[self.level]} -> {LEVEL_NAMES[level]} "
+                           f"({self.used}/{self.limit})")
+        self.level = level
+
+    def _projected_usage_locked(self) -> float:
+        """月末時点の使用量の見込み（今月の使用量 ÷ 経過時間 × 月の長さ）"""
+        elapsed, remaining = _month_progress(self._calendar_clock())
+        elapsed = max(elapsed, PROJECTION_MIN_ELAPSED)
+        return self.used + self.used / elapsed * remaining
+
+    def _reconcile_loop(self, api_key, stop_event):
+        while not stop_event.is_set():
+            try:
+                usage = self.usage_fetcher(api_key)
+                if not usage.get("error"):
+                    self.reconcile(usage.get("character_count", 0), usage.get("character_limit", 0))
+                else:
+                    logger.debug(f"DeepL budget reconcile skipped: {usage['error']}")
+            except Exception as e:
+                logger.error(f"DeepL budget reconcile failed: {e}", exc_info=True)
+            stop_event.wait(self.reconcile_interval)
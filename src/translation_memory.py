@@ -0,0 +1,176 @@
+"""
+翻訳メモリ（あいまい一致）モジュール
+文字n-gramのMinHashとLSHで、キャッシュ済みの翻訳元に近いメッセージを探して翻訳を再利用する
+"""
+import random
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+# 既定値
+DEFAULT_THRESHOLD = 0.8  # 再利用するJaccard類似度の下限
+DEFAULT_MAX_ENTRIES = 5000  # 保持する翻訳元の最大件数（超過分は古い順に削除）
+DEFAULT_MIN_CHARS = 10  # これより短いメッセージは対象外（短文は1文字違いで意味が変わる）
+SHINGLE_SIZE = 3  # 文字n-gramの長さ
+NUM_PERM = 32  # MinHashの署名長
+BANDS = 8  # LSHのバンド数（1バンド = NUM_PERM / BANDS 行）
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_NUMBER_PATTERN = re.compile(r"\d+")
+
+
+def _shingles(text: str) -> frozenset:
+    # 数字は同一視して比較する（違いは _patch_numbers で翻訳側を差し替える）
+    text = _NUMBER_PATTERN.sub("#", text)
+    if len(text) <= SHINGLE_SIZE:
+        return frozenset([text])
+    return frozenset(text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1))
+
+
+def _patch_numbers(source: str, text: str, translated: str) -> Optional[str]:
+    """
+    数字だけが違う場合に翻訳中の数字を差し替える
+
+    Returns:
+        差し替えた翻訳（数字が一致していればそのまま）。差し替えられない場合はNone
+    """
+    old_numbers = _NUMBER_PATTERN.findall(source)
+    new_numbers = _NUMBER_PATTERN.findall(text)
+    if old_numbers == new_numbers:
+        return translated
+    if len(old_numbers) != len(new_numbers):
+        return None
+    for old, new in zip(old_numbers, new_numbers):
+        if old == new:
+            continue
+        # 翻訳中で一意に特定できる数字だけ差し替える（"10" と "100" を取り違えない）
+        matches = list(re.finditer(rf"(?<!\d){old}(?!\d)", translated))
+        if len(matches) != 1:
+            return None
+        start, end = matches[0].span()
+        translated = translated[:start] + new + translated[end:]
+    return translated
+
+
+class TranslationMemory:
+    """
+    MinHash + LSH による近似一致の翻訳メモリ
+
+    翻訳元テキストを文字n-gramの集合として扱い、候補はLSHのバケットで絞り込んでから
+    実際のJaccard類似度で確認する。言語設定（モード・言語）ごとに別々に検索する。
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 min_chars: int = DEFAULT_MIN_CHARS, seed: int = 1):
+        """
+        初期化
+
+        Args:
+            threshold: 再利用する類似度の下限（0〜1）
+            max_entries: 保持する最大件数
+            min_chars: 対象とする最小文字数
+            seed: MinHashの乱数シード
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.min_chars = min_chars
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+                       for _ in range(NUM_PERM)]
+        self._rows = NUM_PERM // BANDS
+        self._entries = OrderedDict()  # (scope, text) -> (shingles, band_keys, translated)
+        self._buckets = {}  # (scope, band, band_hash) -> set of (scope, text)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def configure(self, threshold=None, max_entries=None, min_chars=None):
+        with self._lock:
+            if threshold is not None:
+                self.threshold = threshold
+            if min_chars is not None:
+                self.min_chars = min_chars
+            if max_entries is not None:
+                self.max_entries = max_entries
+                self._evict()
+
+    def clear(self):
+        """登録済みの翻訳をすべて削除する"""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def _band_keys(self, scope, shingles):
+        hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles]
+        signature = [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._perms]
+        rows = self._rows
+        return [(scope, band, hash(tuple(signature[band * rows:(band + 1) * rows]))) for band in range(BANDS)]
+
+    def add(self, text: str, scope, translated: str):
+        """
+        翻訳を登録する
+
+        Args:
+            text: 正規化済みの翻訳元テキスト
+            scope: 言語設定（同じscope同士でのみ一致させる）
+            translated: 翻訳結果
+        """
+        if len(text) < self.min_chars or not translated:
+            return
+        entry_id = (scope, text)
+        shingles = _shingles(text)
+        with self._lock:
+            if entry_id in self._entries:
+                self._entries.move_to_end(entry_id)
+                _, band_keys, _ = self._entries[entry_id]
+                self._entries[entry_id] = (shingles, band_keys, translated)
+                return
+            band_keys = self._band_keys(scope, shingles)
+            self._entries[entry_id] = (shingles, band_keys, translated)
+            for band_key in band_keys:
+                self._buckets.setdefault(band_key, set()).add(entry_id)
+            self._evict()
+
+    def lookup(self, text: str, scope) -> Optional[Tuple[str, float]]:
+        """
+        近い翻訳元を探す
+
+        Returns:
+            (翻訳結果, 類似度) または None（しきい値未満・数字の差し替え不可の場合も None）
+        """
+        if len(text) < self.min_chars:
+            return None
+        shingles = _shingles(text)
+        band_keys = self._band_keys(scope, shingles)
+        with self._lock:
+            candidates = set()
+            for band_key in band_keys:
+                candidates |= self._buckets.get(band_key, set())
+            best = None
+            for entry_id in candidates:
+                entry_shingles, _, translated = self._entries[entry_id]
+                similarity = len(shingles & entry_shingles) / len(shingles | entry_shingles)
+                if similarity >= self.threshold and (best is None or similarity > best[0]):
+                    best = (similarity, entry_id[1], translated)
+            if best is not None:
+                self._entries.move_to_end((scope, best[1]))
+        if best is None:
+            return None
+        similarity, source, translated = best
+        patched = _patch_numbers(source, text, translated)
+        if patched is None:
+            return None
+        return patched, similarity
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            entry_id, (_, band_keys, _) = self._entries.popitem(last=False)
+            for band_key in band_keys:
+                bucket = self._buckets.get(band_key)
+                if bucket is not None:
+                    bucket.discard(entry_id)
+                    if not bucket:
+                        del self._buckets[band_key]
@@ -0,0 +1,236 @@
+"""
+翻訳キャッシュ永続化モジュール
+SQLiteに翻訳結果を保存し、再起動後もキャッシュを再利用する
+"""
+import hashlib
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from src.logger import logger
+
+# 永続キャッシュ設定
+PERSISTENT_CACHE_MAX_ENTRIES = 50000  # 保存する最大件数（超過分は最終利用が古い順に削除）
+PERSISTENT_CACHE_TTL_SECONDS = 7 * 24 * 3600  # 7日
+EVICTION_CHECK_INTERVAL = 200  # 何件書き込むごとに件数上限を確認するか
+WRITE_BATCH_SIZE = 100  # 1トランザクションでまとめて書き込む最大件数
+
+
+def _hash_key(key) -> str:
+    """キャッシュキー(タプル)をDBの主キー用ハッシュに変換"""
+    joined = "\x1f".join("" if part is None else str(part) for part in key)
+    return hashlib.sha1(joined.encode("utf-8")).hexdigest()
+
+
+class PersistentTranslationStore:
+    """
+    SQLiteによる翻訳キャッシュの第2層
+
+    DBへのアクセスは専用スレッドのみで行い、書き込みはキューに積んで非同期に処理する。
+    キーは (正規化済みテキスト, モード, ソース言語, ターゲット言語) のタプル。
+    """
+
+    def __init__(self, db_path: str, max_entries: int = PERSISTENT_CACHE_MAX_ENTRIES,
+                 ttl: float = PERSISTENT_CACHE_TTL_SECONDS):
+        """
+        初期化
+
+        Args:
+            db_path: SQLiteファイルのパス（":memory:" も可）
+            max_entries: 保存する最大件数
+            ttl: エントリの有効秒数
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._queue = queue.Queue()
+        self._thread = None
+        self._writes_since_check = 0
+        self._entry_count = 0
+
+    def start(self, warm_callback=None, warm_limit: int = 0):
+        """
+        ワーカースレッドを起動する
+
+        Args:
+            warm_callback: 起動時に呼ぶ関数 callback([(key, value), ...])
+            warm_limit: メモリ層へ読み込む件数（最終利用が新しい順）
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self._run, args=(warm_callback, warm_limit),
+            name="TranslationStore", daemon=True
+        )
+        self._thread.start()
+
+    def get(self, key) -> Future:
+        """
+        キーに対応する翻訳を取得する（結果はFutureで返す。未登録ならNone）
+        """
+        future = Future()
+        self._queue.put(("get", key, future))
+        return future
+
+    def put(self, key, value: str):
+        """翻訳結果を保存する（キューに積むだけでブロックしない）"""
+        self._queue.put(("put", key, value))
+
+    def close(self, timeout: float = 3.0):
+        """未書き込み分を反映してからワーカーを停止する"""
+        if not self._thread:
+            return
+        self._queue.put(("close", None, None))
+        self._thread.join(timeout)
+        self._thread = None
+
+    def get_stats(self) -> dict:
+        return {
+            "entries": self._entry_count,
+            "pending_writes": self._queue.qsize(),
+        }
+
+    def _run(self, warm_callback, warm_limit):
+        try:
+            conn = sqlite3.connect(self.db_path)
+            self._init_db(conn)
+            self._purge_expired(conn)
+            self._entry_count = conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        except Exception as e:
+            logger.error(f"Failed to open translation cache DB: {e}", exc_info=True)
+            self._drain_failed()
+            return
+
+        if warm_callback and warm_limit > 0:
+            try:
+                warm_callback(self._load_recent(conn, warm_limit))
+            except Exception as e:
+                logger.error(f"Failed to warm translation cache: {e}", exc_info=True)
+
+        running = True
+        while running:
+            op = self._queue.get()
+            ops = [op]
+            # 溜まっている操作はまとめて処理（書き込みを1トランザクションにする）
+            while len(ops) < WRITE_BATCH_SIZE:
+                try:
+                    ops.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                running = self._process(conn, ops)
+            except Exception as e:
+                logger.error(f"Translation cache DB error: {e}", exc_info=True)
+                for kind, _, arg in ops:
+                    if kind == "get" and not arg.done():
+                        arg.set_result(None)
+                    elif kind == "close":
+                        running = False
+        conn.close()
+
+    def _drain_failed(self):
+        """DBが使えない場合は以降の要求をすべて未登録扱いにする"""
+        while True:
+            kind, _, arg = self._queue.get()
+            if kind == "get":
+                arg.set_result(None)
+            elif kind == "close":
+                return
+
+    @staticmethod
+    def _init_db(conn):
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS translations (
+                key_hash TEXT PRIMARY KEY,
+                source_text TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                source_lang TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                translated TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations(last_used)")
+        conn.commit()
+
+    def _purge_expired(self, conn):
+        cutoff = time.time() - self.ttl
+        removed = conn.execute("DELETE FROM translations WHERE created_at < ?", (cutoff,)).rowcount
+        conn.commit()
+        if removed:
+            logger.info(f"Translation cache DB: purged {removed} expired entries")
+
+    def _evict_overflow(self, conn):
+        overflow = self._entry_count - self.max_entries
+        if overflow <= 0:
+            return
+        conn.execute(
+            "DELETE FROM translations WHERE key_hash IN "
+            "(SELECT key_hash FROM translations ORDER BY last_used ASC LIMIT ?)",
+            (overflow,)
+        )
+        self._entry_count = conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def _load_recent(self, conn, limit):
+        cutoff = time.time() - self.ttl
+        rows = conn.execute(
+            "SELECT source_text, mode, source_lang, target_lang, translated FROM translations "
+            "WHERE created_at >= ? ORDER BY last_used DESC LIMIT ?",
+            (cutoff, limit)
+        ).fetchall()
+        # 古い順に渡す（LRUのメモリ層で新しいものが末尾に来るように）
+        return [((text, mode, src, tgt), value) for text, mode, src, tgt, value in reversed(rows)]
+
+    def _process(self, conn, ops) -> bool:
+        now = time.time()
+        running = True
+        writes = []
+        touches = []
+        for kind, key, arg in ops:
+            if kind == "put":
+                text, mode, src, tgt = key
+                writes.append((_hash_key(key), text, mode, src or "", tgt or "", arg, now, now))
+            elif kind == "get":
+                # 先に積まれた書き込みを反映してから読む
+                self._write(conn, writes)
+                writes = []
+                row = conn.execute(
+                    "SELECT translated, created_at FROM translations WHERE key_hash = ?",
+                    (_hash_key(key),)
+                ).fetchone()
+                if row and now - row[1] <= self.ttl:
+                    touches.append((now, _hash_key(key)))
+                    arg.set_result(row[0])
+                else:
+                    arg.set_result(None)
+            elif kind == "close":
+                running = False
+
+        self._write(conn, writes)
+        if touches:
+            conn.executemany("UPDATE translations SET last_used = ? WHERE key_hash = ?", touches)
+        if self._writes_since_check >= EVICTION_CHECK_INTERVAL or not running:
+            self._writes_since_check = 0
+            self._entry_count = conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            self._evict_overflow(conn)
+        conn.commit()
+        return running
+
+    def _write(self, conn, writes):
+        if not writes:
+            return
+        conn.executemany(
+            "INSERT OR REPLACE INTO translations "
+            "(key_hash, source_text, mode, source_lang, target_lang, translated, created_at, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            writes
+        )
+        # 上書きも加算される概算値（EVICTION_CHECK_INTERVALごとに数え直す）
+        self._entry_count += len(writes)
+        self._writes_since_check += len(writes)
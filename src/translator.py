@@ -5,14 +5,40 @@ import time
 import asyncio
 import threading
 import re
-from collections import OrderedDict
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+import concurrent.futures
+import sys
+import weakref
+import math
+import heapq
+import itertools
+from collections import OrderedDict, deque
+from email.utils import parsedate_to_datetime
+from tenacity import AsyncRetrying, stop_after_attempt, wait_exponential, retry_if_exception_type
 from src.logger import logger
+from src.http_session import get_session, prewarm, close_session
+from src.translation_store import PersistentTranslationStore
+from src.pattern_matcher import PatternMatcher, select_leftmost_longest
+from src.translation_budget import CharacterBudget
+from src.text_normalizer import normalize_for_cache, fold_for_cache, split_sentences
+from src.emote_ranges import wrap_emotes
+from src.translation_memory import TranslationMemory
+from src.phrase_table import PhraseTable
+from src.circuit_breaker import CircuitBreaker, STATE_OPEN
+from src.cache_prewarm import load_log_pairs, DEFAULT_TOP_N as PREWARM_TOP_N
+from src.script_detection import is_japanese, classify_skip
 
 
 class DeepLRetryableError(Exception):
     """DeepL APIのリトライ可能なエラー（429, 503など）"""
-    pass
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after  # Retry-Afterヘッダーの秒数（なければNone）
+
+
+class CircuitOpenError(Exception):
+    """サーキットブレーカーが開いたためリトライを打ち切った"""
+
 
 DEEPL_FREE_ENDPOINT = "https://api-free.deepl.com/v2/translate"
 DEEPL_PRO_ENDPOINT = "https://api.deepl.com/v2/translate"
@@ -20,13 +46,44 @@ DEEPL_FREE_USAGE_ENDPOINT = "https://api-free.deepl.com/v2/usage"
 DEEPL_PRO_USAGE_ENDPOINT = "https://api.deepl.com/v2/usage"
 
 # キャッシュ設定
-CACHE_MAX_ENTRIES = 500
+CACHE_MAX_ENTRIES = None  # 件数上限（Noneならメモリ上限のみで制御）
+CACHE_MAX_BYTES = 16 * 1024 * 1024  # メモリ上限（推定バイト数）
 CACHE_TTL_SECONDS = 600  # 10分
+CACHE_ENTRY_OVERHEAD = 240  # 1エントリあたりのdict/tuple/deque分の推定バイト数
+CACHE_WARM_ENTRIES = 5000  # 起動時に永続キャッシュから読み込む件数
+
+# 永続キャッシュ設定（第2層）
+PERSISTENT_CACHE_FILE = "translation_cache.sqlite3"
+DISK_LOOKUP_TIMEOUT = 0.05  # 永続キャッシュ参照を待つ最大秒数（超えたらミス扱い）
+
+# レート制限設定（トークンバケット。429/503で減速し、成功が続けば加速するAIMD制御）
+MIN_REQUEST_INTERVAL = 0.4  # 初期レート 約2.5req/sec
+MAX_CONCURRENT_REQUESTS = 2  # バケット容量（連続して送れる数）
+MAX_REQUEST_RATE = 10.0  # 加速の上限 req/sec
+MIN_REQUEST_RATE = 0.2  # 減速の下限 req/sec
+RATE_INCREASE_STEP = 0.05  # 成功1回ごとに加えるレート（加算増加）
+RATE_DECREASE_FACTOR = 0.5  # 429/503のときにレートに掛ける値（乗算減少）
+DEFAULT_THROTTLE_PAUSE = 1.0  # Retry-Afterがない429/503のときに全体を止める秒数
+MAX_RETRY_AFTER = 60.0  # Retry-Afterとして受け入れる最大秒数
+MAX_ATTEMPTS = 3  # 1リクエストあたりの最大試行回数
+
+# バッチ設定（短時間に届いた翻訳要求を1リクエストにまとめる）
+BATCH_WINDOW_SECONDS = 0.05  # 要求を集める待ち時間
+BATCH_MAX_TEXTS = 50  # DeepLの1リクエストあたりのtext上限
+BATCH_MAX_CHARS = 30000  # リクエストサイズ上限(128KiB)に対する余裕を持たせた文字数
+
+# 文単位キャッシュ設定
+SEGMENT_MIN_CHARS = 20  # これより短いメッセージは分割しない
 
-# レート制限設定（簡易的にリクエスト間隔と同時実行数を制御）
-MIN_REQUEST_INTERVAL = 0.4  # 約2.5req/sec
-MAX_CONCURRENT_REQUESTS = 2
-RETRY_BACKOFF = [0.5, 1.0, 2.0]  # 429等のときの再試行待機
+# サーキットブレーカー設定
+BREAKER_FAILURE_STATUSES = (403, 456)  # キー無効・文字数上限も障害として数える（5xxは常に障害）
+
+# APIキープール設定
+KEY_FAILOVER_STATUSES = (403, 456)  # キー無効・文字数上限（他のキーに切り替えて再送する）
+KEY_DISABLE_SECONDS = 600.0  # 403/456を返したキーを使わない秒数
+
+# スケジューラー設定
+DEFAULT_DEADLINE_SECONDS = 30.0  # この時間内に送信できない翻訳は諦めて原文を返す
 
 
 def get_deepl_endpoint(api_key):
@@ -81,98 +138,607 @@ def get_deepl_usage(api_key: str) -> dict:
 
 
 def _is_japanese(text):
-    """
-    テキストに日本語が含まれているか判定する簡易ロジック
-    ひらがな([3040-309F]) または カタカナ([30A0-30FF]) が含まれていれば日本語とみなす
-    """
-    if not text:
-        return False
-    # ひらがな・カタカナの範囲
-    jp_pattern = re.compile(r'[\u3040-\u309F\u30A0-\u30FF]')
-    return bool(jp_pattern.search(text))
+    """テキストに日本語（ひらがな・カタカナ・漢字）が含まれているか（tts.is_japaneseと同じ判定）"""
+    return is_japanese(text)
 
 
 class _TranslationCache:
-    """単純なLRUキャッシュ（TTL付き）"""
+    """
+    LRUキャッシュ（TTL・メモリ上限付き）
+
+    TTLは全エントリ共通のため、登録順に並べたキューの先頭が常に最も早く期限切れになる。
+    期限切れの処理は先頭から切れた分だけ取り除くので、get/setは償却O(1)。
+    """
 
-    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS):
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, max_bytes=CACHE_MAX_BYTES):
         self.max_entries = max_entries
+        self.max_bytes = max_bytes
         self.ttl = ttl
-        self._store = OrderedDict()
+        self._store = OrderedDict()  # key -> (ts, value, size) / 末尾ほど最近使用
+        self._expiry = deque()  # (ts, key) / 登録順＝期限順
+        self._bytes = 0
         self._lock = threading.Lock()
 
-    def _cleanup(self):
-        now = time.time()
-        keys_to_remove = []
-        for k, (ts, _) in list(self._store.items()):
-            if now - ts > self.ttl:
-                keys_to_remove.append(k)
-        for k in keys_to_remove:
-            self._store.pop(k, None)
+    def __len__(self):
+        return len(self._store)
+
+    @property
+    def size_bytes(self):
+        return self._bytes
 
-        # サイズ超過分を削除
-        while len(self._store) > self.max_entries:
-            self._store.popitem(last=False)
+    @staticmethod
+    def _estimate_size(key, value):
+        size = CACHE_ENTRY_OVERHEAD + sys.getsizeof(value)
+        if isinstance(key, tuple):
+            size += sum(sys.getsizeof(part) for part in key)
+        else:
+            size += sys.getsizeof(key)
+        return size
+
+    def _remove(self, key):
+        _, _, size = self._store.pop(key)
+        self._bytes -= size
+
+    def _expire(self, now):
+        # 先頭から期限切れ分だけ処理（再登録・削除済みのキーは記録が古いので読み飛ばす）
+        expiry = self._expiry
+        while expiry and now - expiry[0][0] > self.ttl:
+            ts, key = expiry.popleft()
+            entry = self._store.get(key)
+            if entry is not None and entry[0] == ts:
+                self._remove(key)
+
+    def _evict(self):
+        # 上限超過分を最も使われていない順に削除
+        while self._store and (
+            self._bytes > self.max_bytes
+            or (self.max_entries is not None and len(self._store) > self.max_entries)
+        ):
+            _, (_, _, size) = self._store.popitem(last=False)
+            self._bytes -= size
 
     def get(self, key):
         with self._lock:
-            self._cleanup()
-            if key not in self._store:
+            self._expire(time.time())
+            entry = self._store.get(key)
+            if entry is None:
                 return None
-            ts, value = self._store.pop(key)
-            # 再挿入で新しい順に
-            self._store[key] = (ts, value)
-            return value
+            # 新しい順に並べ替え
+            self._store.move_to_end(key)
+            return entry[1]
 
     def set(self, key, value):
         with self._lock:
-            self._cleanup()
-            self._store[key] = (time.time(), value)
-            # 最新を末尾に
-            self._store.move_to_end(key)
-            self._cleanup()
+            now = time.time()
+            self._expire(now)
+            if key in self._store:
+                self._remove(key)
+            size = self._estimate_size(key, value)
+            self._store[key] = (now, value, size)
+            self._bytes += size
+            self._expiry.append((now, key))
+            self._evict()
 
 
 class _RateLimiter:
-    """簡易レートリミッター（最小間隔 & 同時実行数）"""
+    """
+    適応型トークンバケット
+
+    トークンは rate [req/sec] で補充され、容量 capacity まで貯められる。
+    429/503を受けたらレートを下げ（Retry-Afterの間は全体を停止）、成功が続けば少しずつ上げる。
+    ロックは残量計算の間だけ保持し、待機はロックの外で行う（待機中に他の呼び出し元を止めない）。
+    """
 
-    def __init__(self, min_interval=MIN_REQUEST_INTERVAL, max_concurrent=MAX_CONCURRENT_REQUESTS):
-        self.min_interval = min_interval
-        self._last_time = 0.0
+    def __init__(self, min_interval=MIN_REQUEST_INTERVAL, max_concurrent=MAX_CONCURRENT_REQUESTS,
+                 max_rate=MAX_REQUEST_RATE, min_rate=MIN_REQUEST_RATE):
+        # min_interval=0 はレート制限なし（適応制御も行わない）
+        self.adaptive = min_interval > 0
+        self.rate = 1.0 / min_interval if self.adaptive else math.inf
+        self.max_rate = max(max_rate, self.rate) if self.adaptive else math.inf
+        self.min_rate = min(min_rate, self.rate)
+        self.capacity = max(1, max_concurrent)
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._waiters = 0
+        self._throttled = 0
         self._lock = threading.Lock()
-        self._sem_async = asyncio.Semaphore(max_concurrent)
 
-    def wait_sync(self):
+    @property
+    def min_interval(self):
+        return 0.0 if math.isinf(self.rate) else 1.0 / self.rate
+
+    def _refill(self, now):
+        if not math.isinf(self.rate):
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _reserve(self):
+        """トークンを1つ予約し、使えるまでの待ち秒数を返す（残量は負になりうる）"""
         with self._lock:
             now = time.monotonic()
-            wait = self.min_interval - (now - self._last_time)
-            if wait > 0:
-                time.sleep(wait)
-            self._last_time = time.monotonic()
+            if math.isinf(self.rate):
+                return max(0.0, self._blocked_until - now)
+            self._refill(now)
+            self._tokens -= 1.0
+            deficit_wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(deficit_wait, self._blocked_until - now)
+
+    def _remaining_block(self):
+        return max(0.0, self._blocked_until - time.monotonic())
+
+    def wait_sync(self):
+        wait = self._reserve()
+        if wait <= 0:
+            return
+        with self._lock:
+            self._waiters += 1
+        try:
+            time.sleep(wait)
+            # 待機中に429を受けた場合はRetry-Afterが明けるまで待つ
+            block = self._remaining_block()
+            if block > 0:
+                time.sleep(block)
+        finally:
+            with self._lock:
+                self._waiters -= 1
 
     async def wait_async(self):
-        async with self._sem_async:
-            wait = 0.0
-            # 同じロックを利用してインターバルを共有
+        wait = self._reserve()
+        if wait <= 0:
+            return
+        with self._lock:
+            self._waiters += 1
+        try:
+            await asyncio.sleep(wait)
+            block = self._remaining_block()
+            if block > 0:
+                await asyncio.sleep(block)
+        finally:
             with self._lock:
-                now = time.monotonic()
-                wait = self.min_interval - (now - self._last_time)
-                self._last_time = time.monotonic()
-            if wait > 0:
-                await asyncio.sleep(wait)
+                self._waiters -= 1
+
+    def refund(self):
+        """取得したトークンを返す（送信を取りやめた場合）"""
+        with self._lock:
+            if not math.isinf(self.rate):
+                self._refill(time.monotonic())
+                self._tokens = min(float(self.capacity), self._tokens + 1.0)
+
+    def on_success(self):
+        """成功時: レートを加算的に上げる"""
+        if not self.adaptive:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + RATE_INCREASE_STEP)
+
+    def on_throttle(self, retry_after=None):
+        """429/503時: レートを乗算的に下げ、Retry-Afterの間は全体を停止する"""
+        with self._lock:
+            now = time.monotonic()
+            self._throttled += 1
+            pause = DEFAULT_THROTTLE_PAUSE if retry_after is None else min(retry_after, MAX_RETRY_AFTER)
+            self._blocked_until = max(self._blocked_until, now + pause)
+            if self.adaptive:
+                self._refill(now)
+                self.rate = max(self.min_rate, self.rate * RATE_DECREASE_FACTOR)
+                self._tokens = min(self._tokens, 0.0)
+        logger.warning(f"DeepL throttled: rate={self.rate:.2f} req/s, pause={pause:.1f}s")
+
+    def get_stats(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "rate": self.rate,
+                "tokens": self._tokens,
+                "waiters": self._waiters,
+                "throttled": self._throttled,
+                "paused_for": self._remaining_block(),
+            }
+
+
+def _parse_retry_after(value):
+    """Retry-Afterヘッダー（秒数またはHTTP日付）を秒数に変換"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_wait(retry_state):
+    """リトライ間隔: 429/503はレートリミッター側で待つので0、通信エラーは指数バックオフ"""
+    if isinstance(retry_state.outcome.exception(), DeepLRetryableError):
+        return 0
+    return _network_backoff(retry_state)
+
+
+_network_backoff = wait_exponential(multiplier=1, min=1, max=10)
+
+
+def _retry_policy():
+    return dict(
+        stop=stop_after_attempt(MAX_ATTEMPTS),
+        wait=_retry_wait,
+        reraise=True,
+    )
+
+
+class _ApiKey:
+    """
+    キープール内の1つのDeepL APIキー
+
+    エンドポイント・レートリミッター・文字数予算をキーごとに持つ。
+    メインのキー（deepl_api_key）はモジュールの _rate_limiter / _budget をそのまま使う。
+    """
+
+    def __init__(self, api_key, limiter=None, budget=None):
+        self.api_key = api_key
+        self.endpoint = get_deepl_endpoint(api_key)
+        self._limiter = limiter
+        self._budget = budget
+        self.disabled_until = 0.0
+        self.last_error = None
+
+    @property
+    def limiter(self):
+        return _rate_limiter if self._limiter is None else self._limiter
+
+    @property
+    def budget(self):
+        return _budget if self._budget is None else self._budget
+
+    def available(self, now=None):
+        return (time.monotonic() if now is None else now) >= self.disabled_until
+
+    def headroom(self):
+        """残り文字数（上限が未取得・無制限ならinf）"""
+        budget = self.budget
+        if not budget.limit:
+            return math.inf
+        return budget.limit - budget.used
+
+
+class _ApiKeyPool:
+    """
+    複数のDeepL APIキーを束ねるプール
+
+    送信のたびに、使用可能なキーのうち残り文字数が最も多いもの（同じならトークンの多いもの）を選ぶ。
+    403/456を返したキーは KEY_DISABLE_SECONDS の間は選ばない。
+    """
+
+    def __init__(self, keys):
+        self.keys = keys
+
+    @property
+    def primary_key(self):
+        return self.keys[0].api_key
+
+    @property
+    def endpoints(self):
+        return list(dict.fromkeys(key.endpoint for key in self.keys))
+
+    def pick(self, exclude=()):
+        """
+        送信に使うキーを選ぶ
+
+        Returns:
+            _ApiKey or None: 使用可能なキーがなければNone
+        """
+        now = time.monotonic()
+        candidates = [key for key in self.keys if key not in exclude and key.available(now)]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda key: (key.headroom(), key.limiter.get_stats()["tokens"]))
+
+    def allows(self, text_length, priority):
+        """いずれかの使用可能なキーの文字数予算で送信できるか"""
+        now = time.monotonic()
+        return any(key.budget.allows(text_length, priority) for key in self.keys if key.available(now))
+
+    def disable(self, key, status):
+        key.disabled_until = time.monotonic() + KEY_DISABLE_SECONDS
+        key.last_error = status
+        logger.warning(f"DeepL API key ...{key.api_key[-6:]} disabled for {KEY_DISABLE_SECONDS:.0f}s "
+                       f"(status {status})")
+
+    def available_count(self):
+        now = time.monotonic()
+        return sum(1 for key in self.keys if key.available(now))
+
+
+class _TranslationScheduler:
+    """
+    DeepLへの送信を優先度順に行うスケジューラー（バッチ送信付き）
+
+    要求は言語設定ごとのヒープ（優先度→到着順）に積まれ、ディスパッチャーが
+    レートリミッターのトークンを1つ得るたびに、最も優先度の高い要求を含むグループから
+    1バッチ分を取り出して送信する。期限を過ぎた要求は送信せずに原文で返す。
+    """
+
+    def __init__(self, window=BATCH_WINDOW_SECONDS, max_texts=BATCH_MAX_TEXTS, max_chars=BATCH_MAX_CHARS):
+        self.window = window
+        self.max_texts = max_texts
+        self.max_chars = max_chars
+        self._groups = {}  # group_key -> {"heap": [...], "args": (payload, pool)}
+        self._seq = itertools.count()
+        self._dispatcher = None
+        self._sending = set()  # 送信中のタスク（ループは弱参照しか持たないため保持する）
+
+    @staticmethod
+    def _group_key(payload, pool):
+        options = tuple(sorted((k, v) for k, v in payload.items() if k != "text"))
+        return (id(pool), options)
+
+    @property
+    def queued(self):
+        return sum(len(group["heap"]) for group in self._groups.values())
+
+    async def translate(self, payload, pool, priority=0, deadline=None):
+        """
+        要求をキューに追加し、翻訳結果を待つ
+
+        Args:
+            pool: 送信に使うAPIキーのプール
+            priority: 優先度（大きいほど先に送信）
+            deadline: この秒数以内に送信できなければ諦める（Noneなら既定値）
+
+        Returns:
+            str or None: 翻訳結果（失敗・期限切れ時はNone）
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        now = time.monotonic()
+        expires = now + (DEFAULT_DEADLINE_SECONDS if deadline is None else deadline)
+        key = self._group_key(payload, pool)
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = {"heap": [], "args": (payload, pool)}
+        heapq.heappush(group["heap"], (-priority, next(self._seq), now, expires, payload["text"], future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = loop.create_task(self._dispatch())
+        return await future
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        try:
+            # 最初の要求が来たら少し待って同時期の要求を集める
+            await asyncio.sleep(self.window)
+            while True:
+                self._drop_stale()
+                if not self._groups:
+                    return
+                # 最も優先度の高い要求のキープールから、余裕の最も大きいキーを選ぶ
+                pool = self._groups[self._pick_group()]["args"][1]
+                api_key = pool.pick()
+                if api_key is None:
+                    self._fail_pool(pool)
+                    continue
+                # トークン待ちの間に届いた要求も優先度順の候補に含める
+                limiter = api_key.limiter
+                await limiter.wait_async()
+                self._drop_stale()
+                key = self._pick_group(pool)
+                if key is None:
+                    # 待っている間に全件が取り消された（トークンは使わずに返す）
+                    limiter.refund()
+                    continue
+                payload, _ = self._groups[key]["args"]
+                batch = self._take_batch(key)
+                task = loop.create_task(self._send(batch, payload, pool, api_key))
+                self._sending.add(task)
+                task.add_done_callback(self._sending.discard)
+        except asyncio.CancelledError:
+            # ループ停止時は待機中の呼び出し元を原文フォールバックさせる
+            for group in self._groups.values():
+                for item in group["heap"]:
+                    if not item[5].done():
+                        item[5].set_result(None)
+            self._groups.clear()
+            raise
+
+    async def close(self):
+        """ディスパッチャーと送信中のタスクを止める（待っている呼び出し元にはNoneを返す）"""
+        tasks = list(self._sending)
+        if self._dispatcher is not None:
+            tasks.append(self._dispatcher)
+            self._dispatcher = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _drop_stale(self):
+        """取り消された要求と期限切れの要求を取り除く（期限切れは呼び出し元に原文を返させる）"""
+        now = time.monotonic()
+        for key in list(self._groups):
+            heap = self._groups[key]["heap"]
+            alive = [item for item in heap if item[3] > now and not item[5].done()]
+            if len(alive) != len(heap):
+                expired = [item for item in heap if item[3] <= now and not item[5].done()]
+                for item in expired:
+                    item[5].set_result(None)
+                if expired:
+                    _stats["shed"] += len(expired)
+                    logger.warning(f"Translation shed (deadline passed): {len(expired)} requests")
+                heapq.heapify(alive)
+                self._groups[key]["heap"] = alive
+            if not alive:
+                del self._groups[key]
+
+    def _fail_pool(self, pool):
+        """使用可能なキーがないプールの要求をすべて原文で返させる"""
+        for key in [key for key, group in self._groups.items() if group["args"][1] is pool]:
+            for item in self._groups.pop(key)["heap"]:
+                if not item[5].done():
+                    item[5].set_result(None)
+        logger.warning("Translation skipped: no usable DeepL API key")
+
+    def _pick_group(self, pool=None):
+        """先頭要求の（優先度, 到着順）が最も良いグループを選ぶ（poolを指定したらそのプールの中から）"""
+        best = None
+        for key, group in self._groups.items():
+            if pool is not None and group["args"][1] is not pool:
+                continue
+            head = group["heap"][0][:2]
+            if best is None or head < best[0]:
+                best = (head, key)
+        return best[1] if best else None
+
+    def _take_batch(self, key):
+        """優先度順に送信する分を取り出す（件数・文字数上限まで）"""
+        heap = self._groups[key]["heap"]
+        now = time.monotonic()
+        batch = []
+        chars = 0
+        while heap and len(batch) < self.max_texts:
+            text = heap[0][4]
+            if batch and chars + len(text) > self.max_chars:
+                break
+            item = heapq.heappop(heap)
+            batch.append((text, item[5]))
+            chars += len(text)
+            _record_queue_wait(now - item[2])
+        if not heap:
+            del self._groups[key]
+        return batch
+
+    async def _send(self, batch, payload, pool, api_key):
+        batch_payload = dict(payload)
+        batch_payload["text"] = [text for text, _ in batch]
+        _stats["requests"] += 1
+        _stats["batched_texts"] += len(batch)
+
+        results = [None] * len(batch)
+        try:
+            # 1回目のトークンはディスパッチャーが取得済み
+            status, body, result = await _send_async(batch_payload, api_key, token_acquired=True)
+            # キー無効・文字数上限なら残りのキーで送り直す
+            tried = [api_key]
+            while status in KEY_FAILOVER_STATUSES:
+                pool.disable(api_key, status)
+                api_key = pool.pick(exclude=tried)
+                if api_key is None:
+                    break
+                tried.append(api_key)
+                _stats["key_failovers"] += 1
+                status, body, result = await _send_async(batch_payload, api_key)
+            if status in BREAKER_FAILURE_STATUSES or status >= 500:
+                _breaker.record_failure()
+            else:
+                # 400等はDeepL自体は応答しているので成功扱い
+                _breaker.record_success()
+            if status == 200:
+                api_key.budget.record(sum(len(text) for text, _ in batch))
+                translations = result.get("translations", [])
+                if len(translations) == len(batch):
+                    results = [t["text"] for t in translations]
+                else:
+                    logger.error(f"DeepL batch size mismatch: sent {len(batch)}, got {len(translations)}")
+                    _stats["errors"] += 1
+            else:
+                logger.error(f"DeepL API Error: {status} {body}")
+        except CircuitOpenError:
+            logger.info("DeepL retry stopped: circuit breaker is open")
+            _stats["errors"] += 1
+        except DeepLRetryableError:
+            logger.error("DeepL API retry exhausted")
+            _breaker.record_failure()
+            _stats["errors"] += 1
+        except Exception as e:
+            logger.error(f"Exception during DeepL request: {e}", exc_info=True)
+            _breaker.record_failure()
+            _stats["errors"] += 1
+        finally:
+            # 取り消された場合も待っている呼び出し元を原文フォールバックさせる
+            for (_, future), translated in zip(batch, results):
+                if not future.done():
+                    future.set_result(translated)
+
+
+def _record_queue_wait(wait):
+    _stats["queue_wait_count"] += 1
+    _stats["queue_wait_total"] += wait
+    _stats["queue_wait_max"] = max(_stats["queue_wait_max"], wait)
+
+
+# asyncioのFutureはループに紐づくため、スケジューラーはイベントループごとに保持する
+_schedulers = weakref.WeakKeyDictionary()
+
+
+def _get_scheduler():
+    loop = asyncio.get_running_loop()
+    scheduler = _schedulers.get(loop)
+    if scheduler is None:
+        scheduler = _TranslationScheduler(BATCH_WINDOW_SECONDS, BATCH_MAX_TEXTS, BATCH_MAX_CHARS)
+        _schedulers[loop] = scheduler
+    return scheduler
 
 
 _cache = _TranslationCache()
+_persistent_store = None
+# 翻訳中の要求（キャッシュキー -> _InflightRequest）。別スレッドのループからも参照する
+_inflight = {}
+_inflight_lock = threading.Lock()
 _rate_limiter = _RateLimiter()
+_budget = CharacterBudget(usage_fetcher=get_deepl_usage)
+_budget_settings = {}  # configure_budget の設定（追加キーの予算にも適用する）
+# 追加のAPIキー（メインのキーと合わせてプールにする）
+_extra_api_keys = []
+_extra_key_states = {}  # キー文字列 -> _ApiKey（レート・予算・無効化の状態を保持）
+_key_pool = None
 _translation_filters = []
 _translation_dictionary = []
+_text_matcher = PatternMatcher()  # フィルタと辞書をまとめて照合するオートマトン
+_FILTER_MATCH = None  # フィルタ一致を表すpayload（辞書は登録順のインデックス）
 _stats = {
     "requests": 0,
     "cache_hits": 0,
     "filtered": 0,
     "errors": 0,
+    "batched_texts": 0,
+    "cache_lookups": 0,
+    "cache_memory_hits": 0,
+    "cache_disk_hits": 0,
+    "cache_warmed": 0,
+    "coalesced": 0,
+    "budget_skipped": 0,
+    "skipped_no_content": 0,
+    "skipped_same_language": 0,
+    "shed": 0,
+    "queue_wait_count": 0,
+    "queue_wait_total": 0.0,
+    "queue_wait_max": 0.0,
+    "segmented_messages": 0,
+    "segment_cache_hits": 0,
+    "segment_chars_saved": 0,
+    "memory_hits": 0,
+    "cache_prewarmed": 0,
+    "phrase_hits": 0,
+    "placeholder_chars_saved": 0,
+    "key_failovers": 0,
+    "keys_exhausted": 0,
 }
 
+# 定型フレーズ表（キャッシュ・DeepLより先に引く）
+_phrases = PhraseTable()
+
+# DeepL障害時に送信を止めるサーキットブレーカー
+_breaker = CircuitBreaker()
+
+# 翻訳メモリ（キャッシュ済みの翻訳元に近いメッセージは翻訳を再利用する。設定で有効にした場合のみ）
+_memory = TranslationMemory()
+_memory_enabled = False
+
+# 文単位キャッシュ（長いメッセージを文に分けてキャッシュを引く）
+_segment_cache_enabled = False
+_segment_min_chars = SEGMENT_MIN_CHARS
+
 
 def _normalize_text(text):
     if text is None:
@@ -182,15 +748,409 @@ def _normalize_text(text):
     return text
 
 
-def _make_cache_key(text, mode, api_key):
-    safe_key = api_key or ""
-    return (text, mode, safe_key)
+def _make_cache_key(text, mode, payload):
+    """
+    キャッシュキーを作成（APIキーは含めない）
+
+    Returns:
+        tuple: (テキスト, モード, ソース言語, ターゲット言語)
+    """
+    return (text, mode, payload.get("source_lang") or "", payload.get("target_lang") or "")
+
+
+def configure_cache(max_bytes=None, max_entries=None, ttl=None):
+    """
+    メモリキャッシュの上限を変更する（既存のエントリは保持）
+
+    Args:
+        max_bytes: メモリ上限（推定バイト数）
+        max_entries: 件数上限（Noneなら変更しない）
+        ttl: 有効秒数
+    """
+    with _cache._lock:
+        if max_bytes is not None:
+            _cache.max_bytes = max_bytes
+        if max_entries is not None:
+            _cache.max_entries = max_entries
+        if ttl is not None:
+            _cache.ttl = ttl
+        _cache._evict()
+    logger.info(f"Translation cache budget: {_cache.max_bytes} bytes, ttl={_cache.ttl}s")
+
+
+def set_phrase_table(entries):
+    """
+    ユーザー定義の定型フレーズを設定する（同梱フレーズに追加・上書き）
+
+    Args:
+        entries: [{"source": "gg", "target": "ナイス", "target_lang": "JA"}, ...]
+    """
+    _phrases.load(entries or [])
+
+
+def _phrase_targets(text, mode):
+    """定型フレーズを探す翻訳先言語（自動モードは推定した向きを先に、逆向きも探す）"""
+    if mode == '英→日':
+        return ("JA",)
+    if mode == '日→英':
+        return ("EN",)
+    return ("EN", "JA") if _is_japanese(text) else ("JA", "EN")
+
+
+def configure_translation_memory(enabled=None, threshold=None, max_entries=None):
+    """
+    翻訳メモリ（あいまい一致）の設定を変更する
+
+    Args:
+        enabled: 有効/無効（Noneなら変更しない）
+        threshold: 再利用する類似度の下限（0〜1）
+        max_entries: 保持する翻訳元の最大件数
+    """
+    global _memory_enabled
+    if enabled is not None:
+        _memory_enabled = bool(enabled)
+        if not _memory_enabled:
+            # 無効の間は登録もしないので、古い内容は捨てる
+            _memory.clear()
+    _memory.configure(threshold=threshold, max_entries=max_entries)
+
+
+def configure_segmentation(enabled=None, min_chars=None):
+    """
+    文単位キャッシュの設定を変更する
+
+    有効にすると、複数の文からなるメッセージは文ごとにキャッシュを引き、
+    キャッシュにない文だけをDeepLへ送って組み立て直す
+
+    Args:
+        enabled: 有効/無効（Noneなら変更しない）
+        min_chars: 分割対象とする最小文字数（Noneなら変更しない）
+    """
+    global _segment_cache_enabled, _segment_min_chars
+    if enabled is not None:
+        _segment_cache_enabled = bool(enabled)
+    if min_chars is not None:
+        _segment_min_chars = min_chars
+
+
+def apply_config(config, changed=None):
+    """
+    設定の翻訳関連の値を反映する（ConfigStore の購読関数としても使う）
+
+    Args:
+        config: 設定（dict または ConfigStore のスナップショット）
+        changed: 変更されたキーの集合（Noneならすべて反映）
+    """
+    def _changed(*keys):
+        return changed is None or any(key in changed for key in keys)
+
+    if _changed("translation_filters"):
+        set_translation_filters(config.get("translation_filters", []))
+    if _changed("translation_dictionary"):
+        set_translation_dictionary(config.get("translation_dictionary", []))
+    if _changed("translation_phrases"):
+        set_phrase_table(config.get("translation_phrases", []))
+    if _changed("deepl_extra_api_keys"):
+        set_extra_api_keys(config.get("deepl_extra_api_keys", []))
+    if _changed("translation_cache_max_mb"):
+        configure_cache(max_bytes=int(config.get("translation_cache_max_mb", 16) * 1024 * 1024))
+    if _changed("translation_segment_cache"):
+        configure_segmentation(enabled=config.get("translation_segment_cache", False))
+    if _changed("translation_memory_enabled", "translation_memory_threshold", "translation_memory_max_entries"):
+        configure_translation_memory(
+            enabled=config.get("translation_memory_enabled", False),
+            threshold=config.get("translation_memory_threshold"),
+            max_entries=config.get("translation_memory_max_entries"),
+        )
+    if _changed("budget_skip_short_ratio", "budget_priority_only_ratio", "budget_cache_only_ratio",
+                "budget_short_message_chars"):
+        configure_budget(
+            skip_short_ratio=config.get("budget_skip_short_ratio"),
+            priority_only_ratio=config.get("budget_priority_only_ratio"),
+            cache_only_ratio=config.get("budget_cache_only_ratio"),
+            short_message_chars=config.get("budget_short_message_chars"),
+        )
+
+
+def init_persistent_cache(db_path=PERSISTENT_CACHE_FILE):
+    """
+    永続キャッシュ（SQLite）を有効化し、起動時にメモリキャッシュを温める
+
+    Args:
+        db_path: SQLiteファイルのパス
+    """
+    global _persistent_store
+    if _persistent_store is not None:
+        return
+    _persistent_store = PersistentTranslationStore(db_path)
+    _persistent_store.start(warm_callback=_warm_memory_cache, warm_limit=CACHE_WARM_ENTRIES)
+    logger.info(f"Persistent translation cache enabled: {db_path}")
+
+
+def close_persistent_cache():
+    """永続キャッシュの未書き込み分を反映して停止する"""
+    global _persistent_store
+    store = _persistent_store
+    _persistent_store = None
+    if store is not None:
+        store.close()
+
+
+def _warm_memory_cache(entries):
+    """永続キャッシュから読み込んだエントリをメモリキャッシュに投入"""
+    for key, value in entries:
+        _cache.set(key, value)
+    _stats["cache_warmed"] += len(entries)
+    logger.info(f"Translation cache warmed from disk: {len(entries)} entries")
+
+
+def _log_entry_to_cache(message, mode, translated, emote_tag=None):
+    """
+    ログの原文・翻訳から translate_text と同じキャッシュキーと値を作る
+
+    BOTと同じくエモートを<k>タグで囲んでから translate_text と同じ正規化を通す。
+    ログの翻訳は表示用に<k>タグを外してあるので、エモートはタグなしの形で探す。
+
+    Returns:
+        (cache_key, value) または None（翻訳対象外・プレースホルダーを戻せない場合）
+    """
+    emotes = wrap_emotes(_normalize_text(message), emote_tag)
+    if emotes.emote_only:
+        return None
+    filtered, text = filter_and_replace(emotes.text)
+    if filtered or not text.strip() or classify_skip(text, mode) is not None:
+        return None
+    normalized = normalize_for_cache(text)
+    value = translated
+    # 翻訳中のエモート・URL等をプレースホルダーに戻す（原文と同じ数だけ見つからなければ使わない）
+    for original in set(normalized.placeholders):
+        indices = [i for i, p in enumerate(normalized.placeholders) if p == original]
+        shown = original.replace("<k>", "").replace("</k>", "")
+        if value.count(shown) != len(indices):
+            return None
+        for index in indices:
+            value = value.replace(shown, f"<k>{index}</k>", 1)
+    payload = _build_payload(normalized.source, mode)
+    return _make_cache_key(normalized.text, mode, payload), value
+
+
+def prewarm_cache_from_logs(paths, top_n=PREWARM_TOP_N):
+    """
+    書き出したチャットログの翻訳でメモリキャッシュを温める（DeepLは呼ばない）
+
+    Args:
+        paths: export_log_json で保存したファイルのパスまたはglobパターン
+        top_n: 出現回数の多い順に投入する最大件数
+
+    Returns:
+        dict: {"candidates": 候補数, "seeded": 投入件数, "cache_entries": 投入後のキャッシュ件数}
+    """
+    pairs = load_log_pairs(paths, top_n)
+    seeded = 0
+    for message, mode, translated, _, emote_tag in pairs:
+        entry = _log_entry_to_cache(message, mode, translated, emote_tag)
+        if entry is None:
+            continue
+        key, value = entry
+        if _cache.get(key) is None:
+            _cache.set(key, value)
+            if _memory_enabled:
+                _memory.add(key[0], key[1:], value)
+            seeded += 1
+    _stats["cache_prewarmed"] += seeded
+    result = {"candidates": len(pairs), "seeded": seeded, "cache_entries": len(_cache)}
+    logger.info(f"Translation cache prewarmed from chat logs: {seeded}/{len(pairs)} entries "
+                f"(cache now {result['cache_entries']} entries)")
+    return result
+
+
+def _cache_get_memory(cache_key):
+    _stats["cache_lookups"] += 1
+    cached = _cache.get(cache_key)
+    if cached is not None:
+        _stats["cache_hits"] += 1
+        _stats["cache_memory_hits"] += 1
+    return cached
+
+
+def _on_disk_hit(cache_key, value):
+    if value is not None:
+        _stats["cache_hits"] += 1
+        _stats["cache_disk_hits"] += 1
+        # メモリ層に昇格
+        _cache.set(cache_key, value)
+        if _memory_enabled:
+            _memory.add(cache_key[0], cache_key[1:], value)
+    return value
+
+
+async def _cache_get_async(cache_key):
+    """メモリ→ディスクの順にキャッシュを参照（ディスクは待ち時間上限付き）"""
+    cached = _cache_get_memory(cache_key)
+    if cached is not None or _persistent_store is None:
+        return cached
+    try:
+        value = await asyncio.wait_for(asyncio.wrap_future(_persistent_store.get(cache_key)), DISK_LOOKUP_TIMEOUT)
+    except asyncio.TimeoutError:
+        return None
+    return _on_disk_hit(cache_key, value)
+
+
+def _is_noop(text, mode):
+    """翻訳不要なメッセージか判定し、統計に記録する"""
+    reason = classify_skip(text, mode)
+    if reason is None:
+        return False
+    _stats[f"skipped_{reason}"] += 1
+    logger.debug(f"Translation skipped locally ({reason})")
+    return True
+
+
+def _budget_allows(text, priority, pool):
+    if pool.allows(len(text), priority):
+        return True
+    _stats["budget_skipped"] += 1
+    logger.debug(f"Translation skipped by budget policy ({_budget.get_stats()['level']})")
+    return False
+
+
+def configure_budget(**kwargs):
+    """
+    文字数予算のしきい値を設定する
+
+    Args:
+        skip_short_ratio / priority_only_ratio / cache_only_ratio: 各段階に入る使用率
+        short_message_chars: 短いメッセージとみなす文字数
+        min_priority: 優先ユーザーとみなす最低優先度
+    """
+    _budget_settings.update(kwargs)
+    _budget.configure(**kwargs)
+    for key in _extra_key_states.values():
+        key.budget.configure(**kwargs)
+
+
+def start_budget_tracking(api_key):
+    """プール内の各APIキーの使用量を定期取得して文字数予算を補正する（バックグラウンド）"""
+    for key in _get_key_pool(api_key).keys:
+        key.budget.ensure_tracking(key.api_key)
+
+
+def set_extra_api_keys(keys):
+    """
+    メインのキーと合わせて使う追加のDeepL APIキーを設定する
+
+    Args:
+        keys: APIキーのリスト（Free/Proの混在可）
+    """
+    global _extra_api_keys, _key_pool
+    _extra_api_keys = list(dict.fromkeys(k.strip() for k in keys or [] if isinstance(k, str) and k.strip()))
+    _key_pool = None
+    logger.info(f"DeepL extra API keys updated: {len(_extra_api_keys)} keys")
+
+
+def _get_key_pool(api_key):
+    """メインのキーと追加キーからなるプールを返す（キーが変わったら作り直す）"""
+    global _key_pool
+    pool = _key_pool
+    if pool is not None and pool.primary_key == api_key:
+        return pool
+    keys = [_ApiKey(api_key)]
+    for extra in _extra_api_keys:
+        if extra == api_key:
+            continue
+        state = _extra_key_states.get(extra)
+        if state is None:
+            budget = CharacterBudget(usage_fetcher=get_deepl_usage)
+            budget.configure(**_budget_settings)
+            state = _extra_key_states[extra] = _ApiKey(extra, _RateLimiter(), budget)
+        keys.append(state)
+    pool = _key_pool = _ApiKeyPool(keys)
+    return pool
+
+
+def get_api_key_endpoints(api_key):
+    """プール内のキーが使うDeepLエンドポイント（接続の事前確立用）"""
+    return _get_key_pool(api_key).endpoints
+
+
+class _InflightRequest:
+    """翻訳中の要求（同じ内容の呼び出し元で共有し、送信は呼び出し元から独立したタスクで行う）"""
+
+    def __init__(self):
+        self.future = concurrent.futures.Future()
+        self.task = None
+        self.waiters = 0
+
+
+def _join_inflight(cache_key):
+    """
+    翻訳中の同一要求に合流する
+
+    Returns:
+        (request, is_leader): is_leaderがTrueなら呼び出し元が送信タスクを起動する
+    """
+    with _inflight_lock:
+        request = _inflight.get(cache_key)
+        is_leader = request is None
+        if is_leader:
+            request = _inflight[cache_key] = _InflightRequest()
+        else:
+            _stats["coalesced"] += 1
+        request.waiters += 1
+        return request, is_leader
+
+
+def _leave_inflight(cache_key, request):
+    """
+    キャンセルされた呼び出し元を外す
+
+    Returns:
+        bool: 待っている呼び出し元がいなくなった（送信を取り消してよい）ならTrue
+    """
+    with _inflight_lock:
+        request.waiters -= 1
+        if request.waiters > 0 or request.future.done():
+            return False
+        if _inflight.get(cache_key) is request:
+            del _inflight[cache_key]
+        return True
+
+
+def _finish_inflight(cache_key, request, translated):
+    """翻訳結果（失敗時はNone）を合流した呼び出し元に渡す"""
+    with _inflight_lock:
+        if _inflight.get(cache_key) is request:
+            del _inflight[cache_key]
+    if not request.future.done():
+        request.future.set_result(translated)
+
+
+def _cache_set(cache_key, value):
+    _cache.set(cache_key, value)
+    if _memory_enabled:
+        _memory.add(cache_key[0], cache_key[1:], value)
+    if _persistent_store is not None:
+        # ディスクへの書き込みはワーカースレッドで非同期に行う
+        _persistent_store.put(cache_key, value)
+
+
+def _rebuild_text_matcher():
+    """フィルタと辞書から照合用オートマトンを作り直す"""
+    global _text_matcher
+    matcher = PatternMatcher()
+    for f in _translation_filters:
+        matcher.add(f, _FILTER_MATCH)
+    for i, entry in enumerate(_translation_dictionary):
+        matcher.add(entry["source"], i)
+    matcher.build()
+    _text_matcher = matcher
 
 
 def set_translation_filters(filters):
     """翻訳フィルタの設定（部分一致で判定、lower比較）"""
     global _translation_filters
     _translation_filters = [f.strip().lower() for f in filters or [] if f]
+    _rebuild_text_matcher()
     logger.info(f"Translation filters updated: {len(_translation_filters)} entries")
 
 
@@ -205,32 +1165,123 @@ def set_translation_dictionary(entries):
             if src:
                 normalized.append({"source": src, "target": tgt})
     _translation_dictionary = normalized
+    _rebuild_text_matcher()
     logger.info(f"Translation dictionary updated: {len(_translation_dictionary)} entries")
 
 
+def _scan_text(text, stop_on_filter=True):
+    """
+    オートマトンでテキストを1回走査し、フィルタ一致と辞書の置換候補を集める
+
+    Returns:
+        (filtered: bool, candidates: [(開始, 終了, 辞書インデックス), ...])
+    """
+    dictionary = _translation_dictionary
+    filtered = False
+    candidates = []
+    for start, end, payload in _text_matcher.iter_matches(text):
+        if payload is _FILTER_MATCH:
+            filtered = True
+            if stop_on_filter:
+                break
+        # オートマトンは大文字小文字を無視するので、辞書は原文と完全一致するものだけ採用
+        elif text[start:end] == dictionary[payload]["source"]:
+            candidates.append((start, end, payload))
+    return filtered, candidates
+
+
+def _apply_replacements(text, candidates):
+    """置換候補から最左最長で重ならないものを選んで置換する"""
+    if not candidates:
+        return text
+    dictionary = _translation_dictionary
+    parts = []
+    pos = 0
+    for start, end, index in select_leftmost_longest(candidates):
+        parts.append(text[pos:start])
+        parts.append(dictionary[index]["target"])
+        pos = end
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
+def filter_and_replace(text: str):
+    """
+    フィルタ判定と辞書置換を1パスで行う
+
+    Returns:
+        (filtered: bool, replaced_text: str) ※フィルタに一致した場合は原文を返す
+    """
+    if not text:
+        return False, text
+    filtered, candidates = _scan_text(text)
+    if filtered:
+        return True, text
+    return False, _apply_replacements(text, candidates)
+
+
 def should_filter(text: str) -> bool:
     """フィルタに合致する場合 True"""
-    if not text:
+    if not text or not _translation_filters:
         return False
-    lowered = text.lower()
-    return any(f in lowered for f in _translation_filters)
+    return _scan_text(text)[0]
 
 
 def apply_translation_dictionary(text: str) -> str:
-    """翻訳前に辞書置換を適用"""
-    if not text:
+    """翻訳前に辞書置換を適用（重なる場合は最左最長一致を優先）"""
+    if not text or not _translation_dictionary:
         return text
-    result = text
-    for entry in _translation_dictionary:
-        src = entry.get("source", "")
-        tgt = entry.get("target", "")
-        if src:
-            result = result.replace(src, tgt)
-    return result
+    _, candidates = _scan_text(text, stop_on_filter=False)
+    return _apply_replacements(text, candidates)
 
 
 def get_stats():
-    return _stats.copy()
+    stats = _stats.copy()
+    lookups = stats["cache_lookups"]
+    stats["cache_memory_hit_rate"] = stats["cache_memory_hits"] / lookups if lookups else 0.0
+    stats["cache_disk_hit_rate"] = stats["cache_disk_hits"] / lookups if lookups else 0.0
+    waits = stats.pop("queue_wait_count")
+    stats["queue_wait_avg_ms"] = stats.pop("queue_wait_total") / waits * 1000 if waits else 0.0
+    stats["queue_wait_max_ms"] = stats.pop("queue_wait_max") * 1000
+    stats["queue_depth"] = sum(scheduler.queued for scheduler in list(_schedulers.values()))
+    limiter = _rate_limiter.get_stats()
+    stats["rate_limit_rate"] = limiter["rate"]
+    stats["rate_limit_tokens"] = limiter["tokens"]
+    stats["rate_limit_waiters"] = limiter["waiters"]
+    stats["rate_limit_throttled"] = limiter["throttled"]
+    stats["rate_limit_paused_for"] = limiter["paused_for"]
+    budget = _budget.get_stats()
+    stats["budget_level"] = budget["level"]
+    stats["budget_used"] = budget["used"]
+    stats["budget_limit"] = budget["limit"]
+    stats["budget_burn_per_hour"] = budget["burn_per_hour"]
+    stats["budget_hours_left"] = budget["hours_left"]
+    breaker = _breaker.get_stats()
+    stats["breaker_state"] = breaker["state"]
+    stats["breaker_opened"] = breaker["opened"]
+    stats["breaker_rejected"] = breaker["rejected"]
+    stats["breaker_retry_in"] = breaker["retry_in"]
+    pool = _key_pool
+    stats["key_pool_size"] = len(pool.keys) if pool is not None else 0
+    stats["key_pool_available"] = pool.available_count() if pool is not None else 0
+    stats["cache_memory_entries"] = len(_cache)
+    stats["cache_memory_bytes"] = _cache.size_bytes
+    stats["memory_entries"] = len(_memory)
+    stats["phrase_entries"] = len(_phrases)
+    if _persistent_store is not None:
+        stats["cache_disk_entries"] = _persistent_store.get_stats()["entries"]
+    return stats
+
+
+def _encode_form(payload):
+    """textがリストの場合はtextパラメータを繰り返す形式に変換"""
+    form = []
+    for key, value in payload.items():
+        if isinstance(value, (list, tuple)):
+            form.extend((key, v) for v in value)
+        else:
+            form.append((key, value))
+    return form
 
 
 def _build_payload(text, mode):
@@ -264,41 +1315,45 @@ def _build_payload(text, mode):
     return data
 
 
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=1, max=10),
-    retry=retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError, DeepLRetryableError)),
-    reraise=True
-)
 async def _translate_http_async(payload, endpoint, api_key):
-    """DeepL API呼び出し（指数バックオフリトライ付き）"""
+    """DeepL API呼び出し（1回分。429/503はDeepLRetryableError）"""
     headers = {"Authorization": f"DeepL-Auth-Key {api_key}"}
-    async with aiohttp.ClientSession() as session:
-        async with session.post(endpoint, data=payload, headers=headers, timeout=aiohttp.ClientTimeout(total=30)) as resp:
-            if resp.status in (429, 503):
-                logger.warning(f"DeepL rate limited ({resp.status}). Will retry with exponential backoff...")
-                raise DeepLRetryableError(f"Rate limited: {resp.status}")
-            body = await resp.text()
-            return resp.status, body, await resp.json() if resp.status == 200 else None
-
-
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=1, max=10),
-    retry=retry_if_exception_type((requests.exceptions.RequestException, DeepLRetryableError)),
-    reraise=True
-)
-def _translate_http_sync(payload, endpoint, api_key):
-    """DeepL API呼び出し（指数バックオフリトライ付き）"""
-    headers = {"Authorization": f"DeepL-Auth-Key {api_key}"}
-    resp = requests.post(endpoint, data=payload, headers=headers, timeout=30)
-    if resp.status_code in (429, 503):
-        logger.warning(f"DeepL rate limited ({resp.status_code}). Will retry with exponential backoff...")
-        raise DeepLRetryableError(f"Rate limited: {resp.status_code}")
-    return resp.status_code, resp.text, resp.json() if resp.status_code == 200 else None
+    # 共有セッションで接続を再利用（ハンドシェイクを毎回行わない）
+    session = get_session()
+    async with session.post(endpoint, data=_encode_form(payload), headers=headers, timeout=aiohttp.ClientTimeout(total=30)) as resp:
+        if resp.status in (429, 503):
+            raise DeepLRetryableError(f"Rate limited: {resp.status}", _parse_retry_after(resp.headers.get("Retry-After")))
+        body = await resp.text()
+        return resp.status, body, await resp.json() if resp.status == 200 else None
 
 
-async def translate_text(text, mode, api_key):
+async def _send_async(payload, api_key, token_acquired=False):
+    """
+    レート制限とリトライ付きでDeepLに送信する
+
+    リトライも毎回レートリミッターのトークンを消費する（429が続いても一斉に再送しない）
+    """
+    async for attempt in AsyncRetrying(
+        retry=retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError, DeepLRetryableError)),
+        **_retry_policy()
+    ):
+        with attempt:
+            # 障害で遮断された後はリトライを続けない
+            if attempt.retry_state.attempt_number > 1 and _breaker.state == STATE_OPEN:
+                raise CircuitOpenError()
+            limiter = api_key.limiter
+            if attempt.retry_state.attempt_number > 1 or not token_acquired:
+                await limiter.wait_async()
+            try:
+                response = await _translate_http_async(payload, api_key.endpoint, api_key.api_key)
+            except DeepLRetryableError as e:
+                limiter.on_throttle(e.retry_after)
+                raise
+            limiter.on_success()
+            return response
+
+
+async def translate_text(text, mode, api_key, priority=0, deadline=None):
     if not api_key:
         logger.error("DeepL API Key is missing.")
         return _normalize_text(text)
@@ -307,86 +1362,244 @@ async def translate_text(text, mode, api_key):
     if not text.strip():
         return text
 
-    # フィルタチェック
-    if should_filter(text):
+    # フィルタチェックと辞書置換（1パス）
+    filtered, text = filter_and_replace(text)
+    if filtered:
         _stats["filtered"] += 1
         logger.info("Translation skipped by filter")
         return ""
 
-    # 辞書置換
-    text = apply_translation_dictionary(text)
+    # 定型フレーズ（gg, 草, 888 など）は表引きで即答する（"888" のような記号のみの定型句も対象）
+    phrase = _phrases.lookup(text, _phrase_targets(text, mode))
+    if phrase is not None:
+        _stats["phrase_hits"] += 1
+        return phrase
 
-    cache_key = _make_cache_key(text, mode, api_key)
-    cached = _cache.get(cache_key)
+    # 翻訳しても変わらないメッセージ（日本語→英日モード、記号のみ等）はDeepLに送らない
+    if _is_noop(text, mode):
+        return text
+
+    # 表記ゆれを畳んだテキストはキャッシュキーにだけ使い、DeepLには原文（保護部分のみプレースホルダー）を送る
+    normalized = normalize_for_cache(text)
+    payload = _build_payload(normalized.source, mode)
+    cache_key = _make_cache_key(normalized.text, mode, payload)
+    cached = await _cache_get_async(cache_key)
     if cached is not None:
-        _stats["cache_hits"] += 1
         logger.debug("translate_text cache hit")
-        return cached
+        return normalized.restore(cached)
+
+    # 近いメッセージの翻訳があれば再利用する（"hello from brazil!" と "hello from brazil!!" など）
+    if _memory_enabled:
+        fuzzy = _memory.lookup(normalized.text, cache_key[1:])
+        if fuzzy is not None:
+            _stats["memory_hits"] += 1
+            logger.debug(f"translate_text memory hit (similarity={fuzzy[1]:.2f})")
+            return normalized.restore(fuzzy[0])
+
+    # 文字数予算の確認（計算済みの段階と比較するだけ。いずれかのキーに余裕があれば送信する）
+    pool = _get_key_pool(api_key)
+    if not _budget_allows(normalized.source, priority, pool):
+        return text
+
+    # すべてのキーが無効・文字数上限なら送信しない
+    if not pool.available_count():
+        _stats["keys_exhausted"] += 1
+        logger.debug("Translation skipped: no usable DeepL API key")
+        return text
+
+    # DeepL障害中は送信せず原文で返す（一定時間ごとに1件だけ送って復旧を確認する）
+    if not _breaker.allow():
+        logger.debug("Translation skipped: DeepL circuit breaker is open")
+        return text
+
+    # 複数の文からなる長いメッセージは文単位でキャッシュを引く
+    segments = []
+    if _segment_cache_enabled and len(normalized.source) >= _segment_min_chars:
+        segments = split_sentences(normalized.source)
+    if len(segments) > 1:
+        translated = await _translate_segments(segments, mode, payload, pool, priority, deadline,
+                                               normalized.chars_saved_in)
+        if translated is not None:
+            _cache_set(cache_key, translated)
+    else:
+        translated = await _translate_uncached(cache_key, payload, pool, priority, deadline,
+                                               normalized.chars_saved)
+
+    return normalized.restore(translated) if translated is not None else text
+
 
-    payload = _build_payload(text, mode)
-    endpoint = get_deepl_endpoint(api_key)
-    await _rate_limiter.wait_async()
-    _stats["requests"] += 1
+async def _translate_uncached(cache_key, payload, pool, priority, deadline, chars_saved=0):
+    """
+    キャッシュにない1件を送信し、結果をキャッシュする（失敗時はNone）
 
+    chars_saved はプレースホルダー化で減った文字数で、送信に成功したときだけ集計する
+    """
+    # 同じ内容が翻訳中なら、その結果を待つ（同一リクエストを重複送信しない）
+    request, is_leader = _join_inflight(cache_key)
+    if is_leader:
+        # 送信は独立したタスクで行い、最初の呼び出し元がキャンセルされても合流した呼び出し元には結果を届ける
+        request.task = asyncio.get_running_loop().create_task(
+            _send_inflight(cache_key, request, payload, pool, priority, deadline, chars_saved))
     try:
-        status, body, result = await _translate_http_async(payload, endpoint, api_key)
-        if status == 200:
-            translated = result["translations"][0]["text"]
-            _cache.set(cache_key, translated)
-            return translated
-        else:
-            logger.error(f"DeepL API Error: {status} {body}")
-    except DeepLRetryableError:
-        logger.error("DeepL API retry exhausted")
-        _stats["errors"] += 1
-    except Exception as e:
-        logger.error(f"Exception during DeepL request: {e}", exc_info=True)
-        _stats["errors"] += 1
+        # 共有のFutureは他の呼び出し元も待っているため、この呼び出し元のキャンセルを伝えない
+        return await asyncio.shield(asyncio.wrap_future(request.future))
+    except asyncio.CancelledError:
+        # 全員がキャンセルしたら送信も取り消す（送信前ならレートリミッターのトークンを返す）
+        if _leave_inflight(cache_key, request) and request.task is not None:
+            request.task.get_loop().call_soon_threadsafe(request.task.cancel)
+        raise
+
+
+async def _send_inflight(cache_key, request, payload, pool, priority, deadline, chars_saved):
+    """翻訳中の要求を送信し、結果をキャッシュして合流した呼び出し元に渡す"""
+    translated = None
+    try:
+        # 優先度順・同時期の要求とまとめて送信（レート制限はスケジューラー側で待機）
+        translated = await _get_scheduler().translate(payload, pool, priority, deadline)
+        if translated is not None:
+            _cache_set(cache_key, translated)
+            # エモート・URL・メンションはプレースホルダーで送ったので、その差分は課金されていない
+            _stats["placeholder_chars_saved"] += chars_saved
+    finally:
+        _finish_inflight(cache_key, request, translated)
 
-    return text
 
+async def _translate_segments(segments, mode, payload, pool, priority, deadline, chars_saved_in):
+    """
+    文ごとにキャッシュを引き、キャッシュにない文だけを送信して組み立てる
 
-def translate_text_sync(text, mode, api_key):
-    if not api_key:
-        logger.error("DeepL API Key is missing.")
-        return _normalize_text(text)
+    未翻訳の文は同時にスケジューラーへ渡すので、1回のリクエストにまとめて送られる。
+    言語設定はメッセージ全体で判定したものを使う（自動モードで文ごとに向きが変わらないように）。
+    chars_saved_in は文に含まれるプレースホルダーで減った文字数を返す関数。
 
-    text = _normalize_text(text)
-    if not text.strip():
-        return text
+    Returns:
+        str or None: 組み立てた翻訳結果（いずれかの文が失敗したらNone）
+    """
+    _stats["segmented_messages"] += 1
+
+    async def _segment(sentence):
+        segment_payload = dict(payload, text=sentence)
+        key = _make_cache_key(fold_for_cache(sentence), mode, segment_payload)
+        cached = await _cache_get_async(key)
+        if cached is not None:
+            _stats["segment_cache_hits"] += 1
+            _stats["segment_chars_saved"] += len(sentence)
+            return cached
+        return await _translate_uncached(key, segment_payload, pool, priority, deadline, chars_saved_in(sentence))
+
+    sentences = [segment.strip() for segment in segments]
+    results = await asyncio.gather(*(_segment(sentence) for sentence in sentences if sentence))
+    if any(result is None for result in results):
+        return None
+    # 日本語は文の間に空白を入れない
+    separator = "" if payload.get("target_lang") == "JA" else " "
+    return separator.join(result.strip() for result in results)
+
+
+class _TranslationEngine:
+    """
+    翻訳パイプラインを専用スレッドのイベントループで動かすエンジン
 
-    if should_filter(text):
-        _stats["filtered"] += 1
-        logger.info("Translation skipped by filter")
-        return ""
+    音声認識スレッドなどは submit() でFutureを受け取り、別ループのBOTは await で結果を待つ。
+    どの呼び出し元も同じループ上のスケジューラー・HTTPセッションを使うため、
+    スレッド間でロックを奪い合わず、DeepLへの接続も1つのプールにまとまる。
+    """
 
-    text = apply_translation_dictionary(text)
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        """ループを（未起動なら起動して）返す"""
+        with self._lock:
+            if self._loop is None or not self._thread.is_alive():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._run, args=(self._loop,),
+                                                name="TranslationEngine", daemon=True)
+                self._thread.start()
+                logger.debug("Translation engine started")
+            return self._loop
+
+    @staticmethod
+    def _run(loop):
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_forever()
+            # 停止時: 送信待ち・送信中の要求を取り消して原文を返させてからセッションを閉じる
+            scheduler = _schedulers.get(loop)
+            if scheduler is not None:
+                loop.run_until_complete(scheduler.close())
+            # （停止の直前に投入された要求のタスクも拾うため、残りがなくなるまで繰り返す）
+            tasks = asyncio.all_tasks(loop)
+            while tasks:
+                for task in tasks:
+                    task.cancel()
+                loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+                tasks = asyncio.all_tasks(loop)
+            loop.run_until_complete(close_session())
+        except Exception as e:
+            logger.error(f"Translation engine shutdown error: {e}", exc_info=True)
+        finally:
+            loop.close()
+
+    def is_engine_thread(self):
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def run(self, coro) -> concurrent.futures.Future:
+        """コルーチンをエンジンのループで実行する（どのスレッドからでも可）"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def stop(self, timeout=3.0):
+        """ループを停止する（次の投入時に再起動する）"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not threading.current_thread():
+            thread.join(timeout)
+        logger.debug("Translation engine stopped")
 
-    cache_key = _make_cache_key(text, mode, api_key)
-    cached = _cache.get(cache_key)
-    if cached is not None:
-        _stats["cache_hits"] += 1
-        logger.debug("translate_text_sync cache hit")
-        return cached
 
-    payload = _build_payload(text, mode)
-    endpoint = get_deepl_endpoint(api_key)
-    _rate_limiter.wait_sync()
-    _stats["requests"] += 1
+_engine = _TranslationEngine()
 
+
+async def _translate_or_original(text, mode, api_key, priority, deadline):
+    """エンジンの停止で取り消されたら原文を返す（投入した呼び出し元に例外を渡さない）"""
     try:
-        status, body, result = _translate_http_sync(payload, endpoint, api_key)
-        if status == 200:
-            translated = result["translations"][0]["text"]
-            _cache.set(cache_key, translated)
-            return translated
-        else:
-            logger.error(f"DeepL API Error: {status} {body}")
-    except DeepLRetryableError:
-        logger.error("DeepL API retry exhausted")
-        _stats["errors"] += 1
-    except Exception as e:
-        logger.error(f"Exception during DeepL request: {e}", exc_info=True)
-        _stats["errors"] += 1
+        return await translate_text(text, mode, api_key, priority, deadline)
+    except asyncio.CancelledError:
+        return text
 
-    return text
+
+def submit_translation(text, mode, api_key, priority=0, deadline=None) -> concurrent.futures.Future:
+    """
+    翻訳エンジンに翻訳を投入する（スレッドから使う）
+
+    Returns:
+        concurrent.futures.Future: translate_text と同じ結果が設定される（エンジン停止時は原文）
+    """
+    return _engine.run(_translate_or_original(text, mode, api_key, priority, deadline))
+
+
+async def translate_text_shared(text, mode, api_key, priority=0, deadline=None):
+    """
+    翻訳エンジン上で翻訳する（どのイベントループからでもawaitできる）
+
+    エンジンのループ上ならそのまま実行し、別のループからは投入して結果を待つ
+    """
+    if _engine.is_engine_thread():
+        return await translate_text(text, mode, api_key, priority, deadline)
+    return await asyncio.wrap_future(submit_translation(text, mode, api_key, priority, deadline))
+
+
+def prewarm_engine(urls):
+    """翻訳エンジンの共有セッションで接続を事前に確立する（完了は待たない）"""
+    return _engine.run(prewarm(urls))
+
+
+def stop_engine(timeout=3.0):
+    """翻訳エンジンを停止する（送信待ちの翻訳は原文で返る）"""
+    _engine.stop(timeout)
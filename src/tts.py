@@ -13,6 +13,7 @@ import os
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
 from typing import Optional, Tuple
 from src.logger import logger
+from src.script_detection import is_japanese as _is_japanese
 
 # Try to import pygame for audio playback (init is deferred to avoid startup hangs)
 pygame = None
@@ -52,22 +53,7 @@ def is_japanese(text: str) -> bool:
     Returns:
         True if text contains Japanese characters
     """
-    if not text:
-        return False
-
-    japanese_ranges = [
-        (0x3040, 0x309F),  # Hiragana
-        (0x30A0, 0x30FF),  # Katakana
-        (0x4E00, 0x9FFF),  # Kanji (CJK Unified Ideographs)
-        (0x3400, 0x4DBF),  # Kanji Extension A
-    ]
-
-    for char in text:
-        char_code = ord(char)
-        for start, end in japanese_ranges:
-            if start <= char_code <= end:
-                return True
-    return False
+    return _is_japanese(text)
 
 
 def clean_text_for_tts(text: str, use_dictionary: bool = True) -> str:
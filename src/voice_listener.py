@@ -1,7 +1,8 @@
 import speech_recognition as sr
-from src.translator import translate_text_sync, should_filter, apply_translation_dictionary
+from src.translator import submit_translation, should_filter, apply_translation_dictionary
 from src.logger import logger
-from src.config import check_gladia_usage, update_gladia_usage
+from src.comment_data import UserPriority
+from src.config import check_gladia_usage, update_gladia_usage, config_store
 import threading
 import time
 import pyaudio
@@ -20,6 +21,9 @@ except ImportError:
     logger.warning("websockets not installed. Only Google SR will be available.")
 
 class VoiceTranslator:
+    # 設定変更時に取り込むキー（プロバイダー・APIキーは次回 start() から反映）
+    CONFIG_KEYS = ('stt_provider', 'gladia_api_key', 'gladia_usage_seconds', 'gladia_reset_month')
+
     # ステレオミキサーを除外するためのキーワード
     STEREO_MIX_KEYWORDS = ['stereo mix', 'ステレオ ミキサー', 'ステレオミキサー', 'what u hear', 'wave out']
 
@@ -59,6 +63,7 @@ class VoiceTranslator:
         self.callback = callback
         self.config_data = config_data or {}
         self.stop_listening = None
+        self.unsubscribe_config = config_store.subscribe(self._on_config_changed)
 
         # Gladia関連
         self.gladia_client = None
@@ -66,6 +71,14 @@ class VoiceTranslator:
         self.gladia_running = False
         self.audio_start_time = None  # 使用時間追跡用
 
+    def _on_config_changed(self, snapshot, changed):
+        """config_store の変更（GUIでの保存・設定ファイルの直接編集）を取り込む"""
+        for key in changed:
+            if key in self.CONFIG_KEYS:
+                self.config_data[key] = snapshot.get(key)
+        if "mic_device_index" in changed:
+            self.device_index = snapshot.get("mic_device_index")
+
     def start(self):
         """音声認識を開始"""
         logger.info("VoiceTranslator.start() called")
@@ -385,7 +398,7 @@ class VoiceTranslator:
             api_key = self.api_key_getter()
             if api_key:
                 # 自動モードの場合はそのままtranslatorに渡して判定させる
-                translated = translate_text_sync(text, mode, api_key)
+                translated = submit_translation(text, mode, api_key, priority=UserPriority.BROADCASTER).result()
             else:
                 translated = "(No API Key)"
 
@@ -445,7 +458,7 @@ class VoiceTranslator:
             api_key = self.api_key_getter()
             if api_key:
                 # 自動モードの場合はそのままtranslatorに渡して判定させる
-                translated = translate_text_sync(text, mode, api_key)
+                translated = submit_translation(text, mode, api_key, priority=UserPriority.BROADCASTER).result()
             else:
                 translated = "(No API Key)"
 
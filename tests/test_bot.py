@@ -11,10 +11,10 @@ class TestTranslateBot:
         from src import bot
         assert hasattr(bot, 'TranslateBot')
 
-    @patch('src.bot.load_config')
-    def test_bot_initialization(self, mock_load_config):
+    @patch('src.bot.config_store')
+    def test_bot_initialization(self, mock_config_store):
         """Botの初期化テスト"""
-        mock_load_config.return_value = {
+        mock_config_store.snapshot.return_value = {
             "twitch_client_id": "test_client_id",
             "deepl_api_key": "test_api_key",
             "channel_name": "test_channel",
@@ -72,10 +72,10 @@ class TestBotEventHandlers:
     """Botのイベントハンドラテスト"""
 
     @pytest.mark.asyncio
-    @patch('src.bot.load_config')
-    async def test_event_ready(self, mock_load_config):
+    @patch('src.bot.config_store')
+    async def test_event_ready(self, mock_config_store):
         """event_ready ハンドラのテスト"""
-        mock_load_config.return_value = {
+        mock_config_store.snapshot.return_value = {
             "twitch_client_id": "test_client_id",
             "deepl_api_key": "test_api_key",
             "channel_name": "test_channel",
@@ -87,3 +87,28 @@ class TestBotEventHandlers:
         # モックでの基本テストのみ
         from src.bot import TranslateBot
         assert TranslateBot is not None
+
+    @pytest.mark.asyncio
+    async def test_backfill_translation_updates_comment_and_chat(self):
+        """遅れて届いた翻訳がコメント・GUI・チャットに反映されることを確認"""
+        import asyncio
+        from src.bot import TranslateBot
+        from src.chat_sender import ChatSender
+        from src.comment_data import create_twitch_comment
+
+        bot = TranslateBot.__new__(TranslateBot)
+        bot.gui = Mock()
+        bot._stopped = False
+        bot._chat_sender = ChatSender()
+        message = Mock(content="hello")
+        message.channel.send = AsyncMock()
+        comment = create_twitch_comment(username="viewer", message="hello", tags={}, translated=None)
+
+        translation = asyncio.get_running_loop().create_future()
+        translation.set_result("こんにちは <k>Kappa</k>")
+        await bot._backfill_translation(translation, message, comment)
+        await bot._chat_sender.flush()
+
+        assert comment.translated == "こんにちは Kappa"
+        bot.gui.on_translation_backfilled.assert_called_once_with(comment)
+        message.channel.send.assert_awaited_once_with("[Chat] こんにちは Kappa\u200B")
@@ -0,0 +1,26 @@
+"""cache_prewarm のテスト"""
+import json
+from src.cache_prewarm import load_log_pairs
+
+
+def _write_log(path, mode, comments):
+    logs = [{"type": "chat", "message": "x", "comment_data": {"message": m, "translated": t}} for m, t in comments]
+    logs.append({"type": "system", "message": "BOT started"})
+    path.write_text(json.dumps({"export_info": {"translate_mode": mode}, "logs": logs}, ensure_ascii=False),
+                    encoding="utf-8")
+
+
+def test_load_log_pairs_picks_most_frequent(tmp_path):
+    _write_log(tmp_path / "a.json", "英→日", [("hi", "やあ"), ("hi", "こんにちは"), ("gg", "GG"), ("lol", None)])
+    _write_log(tmp_path / "b.json", "英→日", [("hi", "こんにちは"), ("gg", "ナイス"), ("bye", "またね")])
+    (tmp_path / "broken.json").write_text("{not json", encoding="utf-8")
+
+    pairs = load_log_pairs([str(tmp_path / "*.json")], top_n=2)
+
+    assert pairs == [("hi", "英→日", "こんにちは", 3, None), ("gg", "英→日", "ナイス", 2, None)]
+
+
+def test_load_log_pairs_skips_untranslated_and_missing_files(tmp_path):
+    _write_log(tmp_path / "a.json", "自動", [("草", "草"), ("", "x")])
+
+    assert load_log_pairs([str(tmp_path / "a.json"), str(tmp_path / "missing.json")]) == []
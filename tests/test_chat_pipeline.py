@@ -0,0 +1,157 @@
+"""chat_pipeline のテスト"""
+import asyncio
+import pytest
+from src.chat_pipeline import ChatPipeline
+
+
+@pytest.mark.asyncio
+async def test_pipeline_publishes_in_arrival_order():
+    published = []
+
+    async def classify(item):
+        # "skip" で始まるメッセージは分類段階で破棄
+        return None if item.startswith("skip") else {"text": item}
+
+    async def translate(job):
+        # 後に届いたメッセージほど早く翻訳が終わる
+        await asyncio.sleep({"a": 0.06, "b": 0.03, "c": 0.0, "d": 0.01}.get(job["text"], 0))
+        job["translated"] = job["text"].upper()
+
+    async def publish(job):
+        published.append(job["translated"])
+
+    pipeline = ChatPipeline(classify, translate, publish, translate_concurrency=4, queue_size=2)
+    for item in ["a", "skip1", "b", "c", "skip2", "d"]:
+        await pipeline.submit(item)
+    for _ in range(50):
+        if len(published) == 4:
+            break
+        await asyncio.sleep(0.01)
+    stats = pipeline.get_stats()
+    await pipeline.stop()
+
+    assert published == ["A", "B", "C", "D"]
+    assert stats["classify_processed"] == 6
+    assert stats["translate_processed"] == 4
+    assert stats["publish_processed"] == 4
+    assert stats["reorder_pending"] == 0
+    assert stats["translate_run_max_ms"] >= 50
+
+
+@pytest.mark.asyncio
+async def test_pipeline_keeps_going_after_stage_errors():
+    published = []
+
+    async def classify(item):
+        if item == "bad-classify":
+            raise ValueError("boom")
+        return {"text": item}
+
+    async def translate(job):
+        if job["text"] == "bad-translate":
+            raise RuntimeError("DeepL down")
+        job["translated"] = "ok"
+
+    async def publish(job):
+        published.append((job["text"], job.get("translated")))
+
+    pipeline = ChatPipeline(classify, translate, publish, translate_concurrency=2)
+    for item in ["bad-classify", "bad-translate", "fine"]:
+        await pipeline.submit(item)
+    for _ in range(50):
+        if len(published) == 2:
+            break
+        await asyncio.sleep(0.01)
+    await pipeline.stop()
+
+    # 翻訳に失敗したメッセージは原文のまま出力し、後続を止めない
+    assert published == [("bad-translate", None), ("fine", "ok")]
+
+
+@pytest.mark.asyncio
+async def test_translations_start_without_waiting_for_earlier_ones():
+    in_flight = []
+    peak = []
+    published = []
+
+    async def classify(item):
+        return {"text": item}
+
+    async def translate(job):
+        # 翻訳エンジンのバッチ窓に複数の要求が同時に入ることを確認する
+        in_flight.append(job["text"])
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.05)
+        in_flight.remove(job["text"])
+
+    async def publish(job):
+        published.append(job["text"])
+
+    pipeline = ChatPipeline(classify, translate, publish, translate_concurrency=8)
+    items = [str(i) for i in range(20)]
+    for item in items:
+        await pipeline.submit(item)
+    for _ in range(100):
+        if len(published) == len(items):
+            break
+        await asyncio.sleep(0.01)
+    await pipeline.stop()
+
+    assert published == items
+    assert max(peak) == 8
+
+
+@pytest.mark.asyncio
+async def test_pipeline_restarts_with_fresh_sequence_numbers():
+    published = []
+    blocked = asyncio.Event()
+
+    async def classify(item):
+        return {"text": item}
+
+    async def translate(job):
+        if job["text"] == "stuck":
+            await blocked.wait()
+
+    async def publish(job):
+        published.append(job["text"])
+
+    pipeline = ChatPipeline(classify, translate, publish)
+    await pipeline.submit("stuck")
+    await asyncio.sleep(0.01)
+    await pipeline.stop()
+
+    # 停止前の番号を待ち続けず、再起動後のメッセージを出力する
+    await pipeline.submit("after restart")
+    for _ in range(50):
+        if published:
+            break
+        await asyncio.sleep(0.01)
+    await pipeline.stop()
+    assert published == ["after restart"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_translation_does_not_stall_pipeline():
+    published = []
+
+    async def classify(item):
+        return {"text": item}
+
+    async def translate(job):
+        if job["text"] == "cancelled":
+            raise asyncio.CancelledError()
+        job["translated"] = "ok"
+
+    async def publish(job):
+        published.append((job["text"], job.get("translated")))
+
+    pipeline = ChatPipeline(classify, translate, publish)
+    for item in ["cancelled", "fine"]:
+        await pipeline.submit(item)
+    for _ in range(50):
+        if len(published) == 2:
+            break
+        await asyncio.sleep(0.01)
+    await pipeline.stop()
+    assert published == [("cancelled", None), ("fine", "ok")]
@@ -0,0 +1,103 @@
+"""chat_sender のテスト"""
+import pytest
+from unittest.mock import AsyncMock
+from src.chat_sender import (
+    ChatSender, _TokenBucket, _rate_for, PRIORITY_SYSTEM, TWITCH_RATE_WINDOW, TWITCH_NON_MOD_LIMIT, TWITCH_MOD_LIMIT,
+)
+
+
+@pytest.mark.parametrize("moderator,limit", [(False, TWITCH_NON_MOD_LIMIT), (True, TWITCH_MOD_LIMIT)])
+def test_token_bucket_stays_within_twitch_window(moderator, limit):
+    now = [0.0]
+    bucket = _TokenBucket(*_rate_for(moderator), clock=lambda: now[0])
+    sent = []
+    # 送れるだけ送り続け、どの30秒間でも上限を超えないことを確認
+    while now[0] < 120.0:
+        if bucket.delay() == 0:
+            bucket.take()
+            sent.append(now[0])
+        else:
+            now[0] += 0.01
+    for i, start in enumerate(sent):
+        in_window = [t for t in sent[i:] if t < start + TWITCH_RATE_WINDOW]
+        assert len(in_window) <= limit
+    # 長時間ではほぼ上限まで送れる
+    assert len(sent) >= limit * 120 / TWITCH_RATE_WINDOW * 0.85
+
+
+@pytest.mark.asyncio
+async def test_system_messages_first_and_backlog_coalesced():
+    channel = AsyncMock()
+    other = AsyncMock()
+    sender = ChatSender(moderator=True, max_chars=40)
+    futures = [
+        sender.enqueue(channel, "hello", prefix="[Chat] "),
+        sender.enqueue(channel, "good", prefix="[Chat] "),
+        sender.enqueue(channel, "【待機参加者リスト】a→b", priority=PRIORITY_SYSTEM),
+        sender.enqueue(channel, "x" * 20, prefix="[Chat] "),
+        sender.enqueue(channel, "voice", prefix="[Voice] "),
+        sender.enqueue(other, "other channel", prefix="[Chat] "),
+        sender.enqueue(channel, "y" * 60, prefix="[Chat] "),
+    ]
+    await sender.flush()
+
+    sent = [call.args[0] for call in channel.send.await_args_list]
+    assert sent == [
+        "【待機参加者リスト】a→b\u200B",
+        "[Chat] hello / good\u200B",  # 40文字を超える分は次のメッセージへ
+        "[Chat] " + "x" * 20 + "\u200B",
+        "[Voice] voice\u200B",
+        "[Chat] " + "y" * 31 + "…\u200B",
+    ]
+    other.send.assert_awaited_once_with("[Chat] other channel\u200B")
+    assert all(f.result() for f in futures)
+    stats = sender.get_stats()
+    assert stats["sent"] == 6
+    assert stats["coalesced"] == 1
+    assert stats["truncated"] == 1
+    assert stats["queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_backlog_coalesced_across_channel_objects_with_same_name():
+    # twitchioは受信メッセージごとに別のChannelを作る
+    first, second, other = AsyncMock(), AsyncMock(), AsyncMock()
+    first.name = second.name = "streamer"
+    other.name = "another"
+    sender = ChatSender(moderator=True)
+    futures = [
+        sender.enqueue(first, "hello", prefix="[Chat] "),
+        sender.enqueue(second, "good", prefix="[Chat] "),
+        sender.enqueue(other, "elsewhere", prefix="[Chat] "),
+    ]
+    await sender.flush()
+
+    first.send.assert_awaited_once_with("[Chat] hello / good\u200B")
+    second.send.assert_not_awaited()
+    other.send.assert_awaited_once_with("[Chat] elsewhere\u200B")
+    assert all(f.result() for f in futures)
+    assert sender.get_stats()["coalesced"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_send_resolves_false_and_stop_drops_pending():
+    channel = AsyncMock()
+    channel.send.side_effect = RuntimeError("disconnected")
+    sender = ChatSender()
+    assert await sender.enqueue(channel, "hello") is False
+    assert sender.get_stats()["failed"] == 1
+
+    # 非モデレーターは連続送信できないため、次のメッセージは待機中に破棄される
+    channel.send.side_effect = None
+    pending = sender.enqueue(channel, "later")
+    await sender.stop()
+    assert pending.result() is False
+    channel.send.assert_awaited_once()
+
+
+def test_set_moderator_raises_rate():
+    sender = ChatSender()
+    slow = sender._bucket.rate
+    sender.set_moderator(True)
+    assert sender.moderator is True
+    assert sender._bucket.rate > slow
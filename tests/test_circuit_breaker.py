@@ -0,0 +1,56 @@
+"""circuit_breaker のテスト"""
+from src.circuit_breaker import CircuitBreaker, STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_on_error_rate_and_recovers_after_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_ratio=0.5, min_requests=4, open_seconds=30, clock=clock)
+
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED  # 件数が足りないうちは開かない
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert not breaker.allow()
+
+    clock.now = 31
+    assert breaker.allow()  # 試験送信は1件だけ
+    assert breaker.state == STATE_HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.allow()
+
+
+def test_breaker_reopens_when_probe_fails():
+    clock = FakeClock()
+    breaker = CircuitBreaker(min_requests=1, open_seconds=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+
+    clock.now = 10
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert breaker.get_stats()["opened"] == 2
+    assert breaker.get_stats()["retry_in"] == 10
+
+
+def test_breaker_forgets_old_failures():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_ratio=0.5, min_requests=2, window=60, clock=clock)
+    breaker.record_failure()
+    clock.now = 120
+    breaker.record_success()
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
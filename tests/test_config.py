@@ -1,4 +1,8 @@
-from src.config import validate_config, DEFAULT_CONFIG
+import json
+import os
+import pytest
+import src.config as config_module
+from src.config import validate_config, ConfigStore, DEFAULT_CONFIG
 
 
 def test_validate_config_fills_defaults_and_clamps_mode():
@@ -15,3 +19,81 @@ def test_validate_config_fills_defaults_and_clamps_mode():
     # 任意の既定値は保たれる
     assert validated["twitch_client_id"] == DEFAULT_CONFIG["twitch_client_id"]
     assert changed is True
+
+
+def _write_config(path, data, mtime_ns):
+    path.write_text(json.dumps(data), encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_config_store_reloads_only_when_file_changes(tmp_path, monkeypatch):
+    path = tmp_path / "config.json"
+    _write_config(path, {"chat_translation_enabled": True}, 1_000_000_000)
+    now = {"t": 0.0}
+    store = ConfigStore(path=str(path), check_interval=1.0, clock=lambda: now["t"])
+    reads = []
+    original_read = config_module._read_config
+    monkeypatch.setattr(config_module, "_read_config", lambda p: reads.append(p) or original_read(p))
+    notified = []
+    store.subscribe(lambda snapshot, changed: notified.append((snapshot["translate_mode"], changed)))
+
+    assert store.get("chat_translation_enabled") is True
+    assert store.get("translate_mode") == "自動"  # 検証済み（既定値で補完）
+    with pytest.raises(TypeError):
+        store.snapshot()["translate_mode"] = "英→日"
+
+    # 確認間隔内・更新時刻が同じなら読み直さない
+    now["t"] = 5.0
+    assert store.get("chat_translation_enabled") is True
+    assert len(reads) == 1
+
+    _write_config(path, {"chat_translation_enabled": True, "translate_mode": "英→日"}, 2_000_000_000)
+    now["t"] = 5.5
+    assert store.get("translate_mode") == "自動"  # 確認間隔内
+    now["t"] = 6.0
+    assert store.get("translate_mode") == "英→日"
+    assert len(reads) == 2
+    assert notified == [("英→日", {"translate_mode"})]
+
+
+def test_config_store_publish_notifies_without_reading_file(tmp_path, monkeypatch):
+    path = tmp_path / "config.json"
+    _write_config(path, {}, 1_000_000_000)
+    store = ConfigStore(path=str(path))
+    config = dict(store.snapshot())
+    monkeypatch.setattr(config_module, "_read_config", lambda p: pytest.fail("publish should not read the file"))
+    notified = []
+    unsubscribe = store.subscribe(lambda snapshot, changed: notified.append(changed))
+
+    config["chat_translation_enabled"] = True
+    store.publish(config)
+    store.publish(config)  # 変更がなければ通知しない
+    unsubscribe()
+    config["translate_mode"] = "日→英"
+    store.publish(config)
+
+    assert notified == [{"chat_translation_enabled"}]
+    assert store.get("translate_mode") == "日→英"
+
+
+def test_save_config_publishes_only_after_successful_write(tmp_path, monkeypatch):
+    path = tmp_path / "config.json"
+    _write_config(path, {}, 1_000_000_000)
+    store = ConfigStore(path=str(path))
+    monkeypatch.setattr(config_module, "config_store", store)
+    config = dict(store.snapshot())
+    notified = []
+    store.subscribe(lambda snapshot, changed: notified.append(changed))
+
+    # 書き込めない場所への保存は反映しない（ファイルとメモリ上の設定を食い違わせない）
+    monkeypatch.setattr(config_module, "CONFIG_FILE", str(tmp_path / "missing" / "config.json"))
+    config["translate_mode"] = "日→英"
+    assert config_module.save_config(config) is False
+    assert notified == []
+    assert store.get("translate_mode") == "自動"
+
+    monkeypatch.setattr(config_module, "CONFIG_FILE", str(path))
+    assert config_module.save_config(config) is True
+    assert notified == [{"translate_mode"}]
+    assert json.loads(path.read_text(encoding="utf-8"))["translate_mode"] == "日→英"
+    assert not (tmp_path / "config.json.tmp").exists()
@@ -0,0 +1,89 @@
+"""dedup_window のテスト"""
+from src.dedup_window import DedupWindow
+
+
+def test_evicts_strictly_oldest_first():
+    window = DedupWindow(max_entries=3, ttl=600)
+    for msg_id in ["a", "b", "c"]:
+        assert window.check_and_add(msg_id) is False
+    # 重複の判定で登録順は変わらない
+    assert window.check_and_add("a") is True
+
+    window.check_and_add("d")
+    assert "a" not in window
+    assert ["b", "c", "d"] == [msg_id for msg_id in ["a", "b", "c", "d"] if msg_id in window]
+
+    window.check_and_add("e")
+    assert "b" not in window
+    assert window.check_and_add("c") is True
+    assert window.check_and_add("e") is True
+    assert len(window) == 3
+
+
+def test_expires_ids_after_ttl():
+    now = {"t": 0.0}
+    window = DedupWindow(max_entries=100, ttl=10, clock=lambda: now["t"])
+    window.check_and_add("old")
+    now["t"] = 6.0
+    window.check_and_add("new")
+
+    now["t"] = 10.0
+    assert "old" not in window
+    assert window.check_and_add("new") is True
+    assert window.check_and_add("old") is False  # 期限切れ後は新しいメッセージとして扱う
+
+
+class _CountingSet(set):
+    """削除した件数を数える集合"""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.removed = 0
+
+    def discard(self, item):
+        self.removed += 1
+        super().discard(item)
+
+
+def _legacy_dedup(max_ids, processed):
+    """以前の実装（集合が上限を超えたら任意の半分を削除）"""
+
+    def check_and_add(msg_id):
+        if msg_id in processed:
+            return True
+        processed.add(msg_id)
+        if len(processed) > max_ids:
+            for old_id in list(processed)[:max_ids // 2]:
+                processed.discard(old_id)
+        return False
+
+    return check_and_add
+
+
+def _max_removed_per_call(check_and_add, removed_counter, ids):
+    """1回の登録で削除したIDの最大件数"""
+    worst = 0
+    for msg_id in ids:
+        before = removed_counter()
+        check_and_add(msg_id)
+        worst = max(worst, removed_counter() - before)
+    return worst
+
+
+def test_eviction_work_per_call_is_constant():
+    """以前の実装は上限到達時の1件に半分の削除が集中するが、ウィンドウは1件の登録で最大1件だけ削除する"""
+    ids = [f"msg-{i}" for i in range(20000)]
+    max_ids = 5000
+
+    legacy_set = _CountingSet()
+    legacy_worst = _max_removed_per_call(_legacy_dedup(max_ids, legacy_set), lambda: legacy_set.removed, ids)
+
+    window = DedupWindow(max_entries=max_ids)
+    window._seen = _CountingSet()
+    worst = _max_removed_per_call(window.check_and_add, lambda: window._seen.removed, ids)
+
+    assert legacy_worst == max_ids // 2
+    assert worst == 1
+    assert window._seen.removed == len(ids) - max_ids
+    assert len(window) == max_ids
+    assert ids[-max_ids] in window and ids[-max_ids - 1] not in window
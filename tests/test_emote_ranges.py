@@ -0,0 +1,60 @@
+"""emote_ranges のテスト"""
+from src.emote_ranges import parse_emote_tag, wrap_emotes
+
+
+def _legacy_wrap(content, emote_tag):
+    """以前の event_message の実装（範囲ごとに文字リストを差し替える）"""
+    replacements = []
+    for emote_group in emote_tag.split('/'):
+        if ':' in emote_group:
+            _, positions = emote_group.split(':')
+            for pos in positions.split(','):
+                start, end = map(int, pos.split('-'))
+                replacements.append((start, end + 1, 'emote'))
+    replacements.sort(key=lambda x: x[0], reverse=True)
+    temp_content = list(content)
+    for start, end, _ in replacements:
+        original = "".join(temp_content[start:end])
+        temp_content[start:end] = list(f"<k>{original}</k>")
+    return "".join(temp_content)
+
+
+def test_wrap_emotes_matches_tag_ranges():
+    content = "Kappa hello PogChamp 🎉 Kappa"
+    tag = "25:0-4,23-27/88:12-19"
+    result = wrap_emotes(content, tag)
+
+    assert result.text == "<k>Kappa</k> hello <k>PogChamp</k> 🎉 <k>Kappa</k>"
+    assert result.text == _legacy_wrap(content, tag)
+    assert result.emote_count == 3
+    assert not result.emote_only
+    assert 0.5 < result.emote_ratio < 1.0
+
+
+def test_wrap_emotes_flags_emote_only_and_ignores_bad_ranges():
+    assert wrap_emotes("Kappa  Kappa", "25:0-4,7-11").emote_only
+    assert not wrap_emotes("hello", None).emote_only
+    assert wrap_emotes("hello", "").text == "hello"
+    # 本文より長い範囲・重なる範囲・壊れた値は無視する
+    assert parse_emote_tag("1:0-4,2-6/2:x-y,8") == ((0, 5),)
+    assert wrap_emotes("hi", "1:0-10").text == "hi"
+
+
+def test_wrap_emotes_matches_legacy_on_emote_spam():
+    """ハイプ時のエモート連投（45個）で以前の実装と比較"""
+    words = ["PogChamp", "Kappa", "LUL", "hype"] * 15
+    content = " ".join(words)
+    ranges = {}
+    pos = 0
+    for word in words:
+        if word != "hype":
+            ranges.setdefault(word, []).append(f"{pos}-{pos + len(word) - 1}")
+        pos += len(word) + 1
+    tag = "/".join(f"{i}:{','.join(r)}" for i, r in enumerate(ranges.values()))
+    assert wrap_emotes(content, tag).text == _legacy_wrap(content, tag)
+
+    # 同じemotesタグ（連投）は解析結果を再利用する
+    hits = parse_emote_tag.cache_info().hits
+    for _ in range(10):
+        wrap_emotes(content, tag)
+    assert parse_emote_tag.cache_info().hits - hits == 10
@@ -0,0 +1,19 @@
+"""http_session のテスト"""
+import pytest
+from src import http_session
+
+
+@pytest.mark.asyncio
+async def test_get_session_is_shared_within_loop():
+    first = http_session.get_session()
+    second = http_session.get_session()
+    assert first is second
+    assert not first.closed
+
+    await http_session.close_session()
+    assert first.closed
+
+    # クローズ後は新しいセッションが作られる
+    third = http_session.get_session()
+    assert third is not first
+    await http_session.close_session()
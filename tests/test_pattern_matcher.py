@@ -0,0 +1,65 @@
+"""pattern_matcher のテスト"""
+import random
+from src import translator
+from src.pattern_matcher import PatternMatcher, select_leftmost_longest
+
+
+def test_matcher_finds_overlapping_patterns_case_insensitive():
+    matcher = PatternMatcher()
+    for i, p in enumerate(["he", "she", "his", "hers"]):
+        matcher.add(p, i)
+    matcher.build()
+
+    found = sorted((start, end, payload) for start, end, payload in matcher.iter_matches("uSHErs"))
+    assert found == [(1, 4, 1), (2, 4, 0), (2, 6, 3)]
+
+
+def test_select_leftmost_longest():
+    matches = [(0, 2, 0), (0, 4, 1), (2, 6, 2), (4, 6, 3)]
+    assert select_leftmost_longest(matches) == [(0, 4, 1), (4, 6, 3)]
+
+
+def test_dictionary_uses_leftmost_longest_replacement():
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([
+        {"source": "New", "target": "新"},
+        {"source": "New York", "target": "ニューヨーク"},
+        {"source": "york", "target": "ヨーク"},
+    ])
+    try:
+        assert translator.apply_translation_dictionary("New York and New") == "ニューヨーク and 新"
+        # 大文字小文字は区別する
+        assert translator.apply_translation_dictionary("new york") == "new ヨーク"
+    finally:
+        translator.set_translation_dictionary([])
+
+
+def test_filter_and_replace_single_pass():
+    translator.set_translation_filters(["Spoiler"])
+    translator.set_translation_dictionary([{"source": "kusa", "target": "草"}])
+    try:
+        assert translator.filter_and_replace("kusa kusa") == (False, "草 草")
+        assert translator.filter_and_replace("big SPOILER kusa") == (True, "big SPOILER kusa")
+        assert translator.should_filter("a spoiler")
+        assert not translator.should_filter("kusa")
+    finally:
+        translator.set_translation_filters([])
+        translator.set_translation_dictionary([])
+
+
+def test_matcher_agrees_with_brute_force_on_many_overlapping_patterns():
+    """多数の重なり合うパターンでも、総当たりと同じ一致をすべて返す"""
+    rng = random.Random(0)
+    patterns = sorted({"".join(rng.choices("abc", k=rng.randint(1, 5))) for _ in range(200)})
+    matcher = PatternMatcher()
+    for i, pattern in enumerate(patterns):
+        matcher.add(pattern, i)
+    matcher.build()
+
+    for _ in range(50):
+        text = "".join(rng.choices("abcABC", k=40))
+        folded = text.lower()
+        expected = sorted((start, start + len(pattern), i)
+                          for i, pattern in enumerate(patterns)
+                          for start in range(len(text)) if folded.startswith(pattern, start))
+        assert sorted(matcher.iter_matches(text)) == expected
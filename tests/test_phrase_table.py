@@ -0,0 +1,25 @@
+"""phrase_table のテスト"""
+from src.phrase_table import PhraseTable, phrase_key
+
+
+def test_phrase_key_folds_chat_variants():
+    assert phrase_key("GG!!") == "gg"
+    assert phrase_key("gggg") == "gg"
+    assert phrase_key("88888") == "888"
+    assert phrase_key("ｋａｗａｉｉ") == "kawaii"
+    assert phrase_key("First  time here!") == "first time here"
+
+
+def test_lookup_builtin_and_user_phrases():
+    table = PhraseTable([
+        {"source": "gg", "target": "ナイスゲーム", "target_lang": "JA"},
+        {"source": "YAGOO", "target": "Yagoo-san"},
+    ])
+
+    assert table.lookup("GG", ["JA"]) == "ナイスゲーム"  # ユーザー定義が優先
+    assert table.lookup("草", ["EN"]) == "lol"
+    assert table.lookup("8888", ["EN"]) == "clap clap"
+    assert table.lookup("YAGOO", ["EN"]) == "Yagoo-san"
+    assert table.lookup("草", ["JA"]) is None  # 翻訳先が違えば引かない
+    assert table.lookup("gg but longer message", ["JA"]) is None
+
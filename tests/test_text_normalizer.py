@@ -0,0 +1,88 @@
+"""text_normalizer のテスト"""
+from pathlib import Path
+from src.text_normalizer import normalize_for_cache, split_sentences
+
+# 手書きで作った表記ゆれの一覧（実際の配信のログではない）
+VARIANTS_PATH = Path(__file__).parent / "data" / "synthetic_chat_variants.txt"
+
+
+def test_normalize_folds_chat_noise():
+    assert normalize_for_cache("gg").text == "gg"
+    assert normalize_for_cache("GG").text == "gg"
+    assert normalize_for_cache("gg ").text == "gg"
+    assert normalize_for_cache("gggg").text == "gg"
+    assert normalize_for_cache("wwwww").text == normalize_for_cache("www").text
+    assert normalize_for_cache("草草草草").text == normalize_for_cache("草草草").text
+    assert normalize_for_cache("ｈｅｌｌｏ").text == "hello"
+    assert normalize_for_cache("nice!!!!").text == normalize_for_cache("nice!!!").text
+
+
+def test_normalize_keeps_meaningful_differences():
+    # 数字の連続は畳まない
+    assert normalize_for_cache("1000").text == "1000"
+    # 途中に大文字を含む文は小文字化しない（固有名詞の可能性）
+    assert normalize_for_cache("I love New York").text == "I love New York"
+    assert normalize_for_cache("Hello there").text == "hello there"
+
+
+def test_source_keeps_original_text_except_placeholders():
+    # キャッシュキーは畳むが、DeepLに送る source は原文のまま
+    normalized = normalize_for_cache("HELLO  from Brazil!!!! <k>Kappa</k>")
+    assert normalized.text == "HELLO from Brazil!! <k>0</k>"
+    assert normalized.source == "HELLO  from Brazil!!!! <k>0</k>"
+    assert normalize_for_cache("ｇｇｇｇ").source == "ｇｇｇｇ"
+
+
+def test_placeholders_are_restored_in_translation():
+    normalized = normalize_for_cache("lol <k>Kappa</k> see https://example.com/a")
+    assert normalized.text == "lol <k>0</k> see <k>1</k>"
+    assert normalized.restore("笑 <k>0</k> 見て <k>1</k>") == "笑 <k>Kappa</k> 見て https://example.com/a"
+
+    # 別のエモートでも同じキーになり、それぞれのエモートで復元される
+    other = normalize_for_cache("lol  <k>LUL</k> see https://example.com/b")
+    assert other.text == normalized.text
+    assert other.restore("笑 <k>0</k> 見て <k>1</k>") == "笑 <k>LUL</k> 見て https://example.com/b"
+
+
+def test_mentions_are_protected_and_savings_counted():
+    normalized = normalize_for_cache("@StreamerName gg <k>PogChamp</k> mail me at a@b.com")
+    assert normalized.text == "<k>0</k> gg <k>1</k> mail me at a@b.com"
+    assert normalized.placeholders == ["@StreamerName", "<k>PogChamp</k>"]
+    assert normalized.chars_saved == (13 - 8) + (15 - 8)
+    assert normalize_for_cache("hello").chars_saved == 0
+
+
+def test_short_spans_are_not_replaced_by_longer_placeholders():
+    # "@bob" や短いURLはプレースホルダー（<k>0</k>）より短いので、そのまま送る
+    normalized = normalize_for_cache("@bob gg www.a.jp @StreamerName")
+    assert normalized.source == "@bob gg www.a.jp <k>0</k>"
+    assert normalized.placeholders == ["@StreamerName"]
+    assert normalized.chars_saved == 13 - 8
+    assert normalized.chars_saved_in("@bob gg") == 0
+
+
+def test_split_sentences_keeps_text_and_decimal_points():
+    assert split_sentences("Hello. How are you? fine!") == ["Hello. ", "How are you? ", "fine!"]
+    assert split_sentences("こんにちは。元気？はい") == ["こんにちは。", "元気？", "はい"]
+    assert split_sentences("version 3.5 is out") == ["version 3.5 is out"]
+    text = "「すごい。」と言った. ok"
+    assert "".join(split_sentences(text)) == text
+
+
+def _hit_rate(messages, key_func):
+    seen = set()
+    hits = 0
+    for message in messages:
+        key = key_func(message)
+        if key in seen:
+            hits += 1
+        seen.add(key)
+    return hits / len(messages)
+
+
+def test_normalization_folds_synthetic_variants():
+    """手書きの表記ゆれ一覧で、正規化したキーが完全一致より多くの重複をまとめることを確認"""
+    messages = VARIANTS_PATH.read_text(encoding="utf-8").splitlines()
+    exact = _hit_rate(messages, lambda m: m)
+    normalized = _hit_rate(messages, lambda m: normalize_for_cache(m).text)
+    assert normalized >= exact + 0.25
@@ -0,0 +1,68 @@
+"""translation_budget のテスト"""
+from src.translation_budget import (
+    CharacterBudget, LEVEL_NORMAL, LEVEL_SKIP_SHORT, LEVEL_PRIORITY_ONLY, LEVEL_CACHE_ONLY,
+)
+
+
+def test_budget_levels_follow_usage_ratio():
+    budget = CharacterBudget()
+    budget.reconcile(100, 1_000_000_000)
+    assert budget.level == LEVEL_NORMAL
+    assert budget.allows(1)
+
+    budget.reconcile(850, 1000)
+    assert budget.level == LEVEL_SKIP_SHORT
+    assert not budget.allows(3)
+    assert budget.allows(20)
+    assert budget.allows(3, priority=1)
+
+    budget.reconcile(920, 1000)
+    assert budget.level == LEVEL_PRIORITY_ONLY
+    assert not budget.allows(20)
+    assert budget.allows(20, priority=3)
+
+    budget.reconcile(980, 1000)
+    assert budget.level == LEVEL_CACHE_ONLY
+    assert not budget.allows(20, priority=4)
+
+
+def test_budget_records_local_usage_between_reconciles():
+    budget = CharacterBudget()
+    budget.reconcile(0, 1000)
+    budget.record(850)
+    assert budget.used == 850
+    assert budget.level == LEVEL_SKIP_SHORT
+    assert budget.burn_rate_per_hour() > 0
+
+
+def test_budget_without_limit_never_blocks():
+    budget = CharacterBudget()
+    budget.record(10_000_000)
+    assert budget.allows(1)
+
+
+def test_month_end_projection_uses_average_pace_not_stream_burn_rate():
+    from datetime import datetime
+
+    # 10日の配信中: 1日4時間ほどの配信で今月は上限の2割を使い、直近1時間で集中して送信している
+    budget = CharacterBudget(calendar_clock=lambda: datetime(2026, 3, 10, 21, 0))
+    budget.reconcile(100_000, 500_000)
+    for _ in range(20):
+        budget.record(1_000)
+    # 配信中のペースを月末まで掛け続けると上限を超えるが、月初からの平均では収まる
+    assert budget.burn_rate_per_hour() * 21 * 24 > 500_000
+    assert budget.level == LEVEL_NORMAL
+    assert budget.allows(3)
+
+    # 同じ日までに上限の6割を使っているペースなら、早めに短文を絞る
+    budget.reconcile(300_000, 500_000)
+    assert budget.level == LEVEL_SKIP_SHORT
+
+
+def test_month_start_projection_does_not_overreact_to_first_stream():
+    from datetime import datetime
+
+    # 月初の配信2時間で使った分は、1日分の使用量として見込む
+    budget = CharacterBudget(calendar_clock=lambda: datetime(2026, 3, 1, 2, 0))
+    budget.reconcile(10_000, 500_000)
+    assert budget.level == LEVEL_NORMAL
@@ -0,0 +1,71 @@
+"""translation_memory のテスト"""
+from pathlib import Path
+from src.text_normalizer import normalize_for_cache
+from src.translation_memory import TranslationMemory
+
+# 手書きで作った表記ゆれの一覧（実際の配信のログではない）
+VARIANTS_PATH = Path(__file__).parent / "data" / "synthetic_chat_variants.txt"
+SCOPE = ("英→日", "", "JA")
+
+
+def test_memory_reuses_near_duplicate_translation():
+    memory = TranslationMemory(threshold=0.8)
+    memory.add("hello from brazil!", SCOPE, "ブラジルからこんにちは！")
+
+    translated, similarity = memory.lookup("hello from brazil!!", SCOPE)
+    assert translated == "ブラジルからこんにちは！"
+    assert similarity >= 0.8
+    assert memory.lookup("hello from mexico!!", SCOPE) is None
+    # 言語設定が違えば一致させない
+    assert memory.lookup("hello from brazil!!", ("日→英", "JA", "EN")) is None
+
+
+def test_memory_patches_changed_numbers():
+    memory = TranslationMemory()
+    memory.add("subscribed for 12 months, love this channel", SCOPE, "12か月サブスク中、このチャンネル大好き")
+
+    translated, _ = memory.lookup("subscribed for 13 months, love this channel", SCOPE)
+    assert translated == "13か月サブスク中、このチャンネル大好き"
+
+    # 翻訳中の数字を特定できなければ再利用しない
+    memory.add("watching for 3 hours and 3 minutes", SCOPE, "3時間3分見てる")
+    assert memory.lookup("watching for 3 hours and 4 minutes", SCOPE) is None
+
+
+def test_memory_evicts_oldest_entries():
+    memory = TranslationMemory(max_entries=2)
+    memory.add("alpha bravo charlie", SCOPE, "1")
+    memory.add("delta echo foxtrot", SCOPE, "2")
+    memory.add("golf hotel india", SCOPE, "3")
+
+    assert len(memory) == 2
+    assert memory.lookup("alpha bravo charlie", SCOPE) is None
+    assert memory.lookup("delta echo foxtrot", SCOPE)[0] == "2"
+    assert memory.lookup("golf hotel india", SCOPE)[0] == "3"
+    # 削除したエントリはLSHのバケットからも消える
+    assert all((SCOPE, "alpha bravo charlie") not in bucket for bucket in memory._buckets.values())
+
+
+def _count_calls(messages, memory):
+    """正規化キーの完全一致キャッシュ（+翻訳メモリ）で再生し、DeepLへの送信回数を数える"""
+    cache = set()
+    calls = 0
+    for message in messages:
+        text = normalize_for_cache(message).text
+        if text in cache:
+            continue
+        if memory is not None and memory.lookup(text, SCOPE) is not None:
+            continue
+        calls += 1
+        cache.add(text)
+        if memory is not None:
+            memory.add(text, SCOPE, f"T({text})")
+    return calls
+
+
+def test_memory_reduces_calls_on_synthetic_variants():
+    """手書きの表記ゆれ一覧を再生し、翻訳メモリの有無でDeepLへの送信回数を比較"""
+    messages = VARIANTS_PATH.read_text(encoding="utf-8").splitlines()
+    exact = _count_calls(messages, None)
+    fuzzy = _count_calls(messages, TranslationMemory())
+    assert fuzzy <= exact - 8
@@ -0,0 +1,47 @@
+"""translation_store のテスト"""
+import time
+from src.translation_store import PersistentTranslationStore
+
+
+def test_store_persists_across_restart(tmp_path):
+    db_path = str(tmp_path / "cache.sqlite3")
+    key = ("hello", "英→日", "EN", "JA")
+
+    store = PersistentTranslationStore(db_path)
+    store.start()
+    store.put(key, "こんにちは")
+    assert store.get(key).result(timeout=2) == "こんにちは"
+    store.close()
+
+    warmed = []
+    store = PersistentTranslationStore(db_path)
+    store.start(warm_callback=warmed.extend, warm_limit=10)
+    assert store.get(key).result(timeout=2) == "こんにちは"
+    assert warmed == [(key, "こんにちは")]
+    store.close()
+
+
+def test_store_evicts_least_recently_used(tmp_path):
+    store = PersistentTranslationStore(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    store.start()
+    for i in range(3):
+        store.put((f"t{i}", "英→日", "EN", "JA"), f"v{i}")
+        store.get((f"t{i}", "英→日", "EN", "JA")).result(timeout=2)
+        time.sleep(0.01)
+    store.close()
+
+    store = PersistentTranslationStore(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    store.start()
+    assert store.get(("t0", "英→日", "EN", "JA")).result(timeout=2) is None
+    assert store.get(("t2", "英→日", "EN", "JA")).result(timeout=2) == "v2"
+    store.close()
+
+
+def test_store_ignores_expired_entries(tmp_path):
+    store = PersistentTranslationStore(str(tmp_path / "cache.sqlite3"), ttl=0.05)
+    store.start()
+    key = ("gg", "英→日", "EN", "JA")
+    store.put(key, "GG")
+    time.sleep(0.1)
+    assert store.get(key).result(timeout=2) is None
+    store.close()
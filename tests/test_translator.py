@@ -20,15 +20,15 @@ async def test_translate_text_uses_cache(monkeypatch):
 
     monkeypatch.setattr(translator, "_translate_http_async", fake_http)
 
-    res1 = await translator.translate_text("hello", "英→日", "KEY")
-    res2 = await translator.translate_text("hello", "英→日", "KEY")
+    res1 = await translator.translate_text("hello world", "英→日", "KEY")
+    res2 = await translator.translate_text("hello world", "英→日", "KEY")
 
     assert res1 == "OUT"
     assert res2 == "OUT"
     assert calls["count"] == 1  # キャッシュにより1回のみ
 
 
-def test_translate_text_sync_uses_cache(monkeypatch):
+def test_submit_translation_uses_cache(monkeypatch):
     translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
     translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
     translator.set_translation_filters([])
@@ -36,14 +36,15 @@ def test_translate_text_sync_uses_cache(monkeypatch):
 
     calls = {"count": 0}
 
-    def fake_http(payload, endpoint, api_key):
+    async def fake_http(payload, endpoint, api_key):
         calls["count"] += 1
-        return 200, "", {"translations": [{"text": "SYNC"}]}
+        return 200, "", {"translations": [{"text": "SYNC"} for _ in payload["text"]]}
 
-    monkeypatch.setattr(translator, "_translate_http_sync", fake_http)
+    # スレッドからの投入も翻訳エンジン上の非同期パイプラインを通る
+    monkeypatch.setattr(translator, "_translate_http_async", fake_http)
 
-    res1 = translator.translate_text_sync("world", "日→英", "KEY")
-    res2 = translator.translate_text_sync("world", "日→英", "KEY")
+    res1 = translator.submit_translation("世界", "日→英", "KEY").result(timeout=2)
+    res2 = translator.submit_translation("世界", "日→英", "KEY").result(timeout=2)
 
     assert res1 == "SYNC"
     assert res2 == "SYNC"
@@ -57,3 +58,835 @@ def test_rate_limiter_sync_spacing():
     limiter.wait_sync()
     elapsed = time.monotonic() - start
     assert elapsed >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_translate_text_batches_concurrent_calls(monkeypatch):
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+
+    payloads = []
+
+    async def fake_http(payload, endpoint, api_key):
+        payloads.append(payload)
+        return 200, "", {"translations": [{"text": t.upper()} for t in payload["text"]]}
+
+    monkeypatch.setattr(translator, "_translate_http_async", fake_http)
+
+    texts = ["one", "two", "three", "four"]
+    results = await asyncio.gather(*(translator.translate_text(t, "英→日", "KEY") for t in texts))
+
+    assert results == ["ONE", "TWO", "THREE", "FOUR"]
+    assert len(payloads) == 1  # 1リクエストにまとめて送信
+    assert payloads[0]["text"] == texts
+    assert payloads[0]["target_lang"] == "JA"
+
+
+@pytest.mark.asyncio
+async def test_translate_text_batches_grouped_by_language(monkeypatch):
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+
+    payloads = []
+
+    async def fake_http(payload, endpoint, api_key):
+        payloads.append(payload)
+        return 200, "", {"translations": [{"text": f"{payload['target_lang']}:{t}"} for t in payload["text"]]}
+
+    monkeypatch.setattr(translator, "_translate_http_async", fake_http)
+
+    results = await asyncio.gather(
+        translator.translate_text("see you later", "英→日", "KEY"),
+        translator.translate_text("こんにちは世界", "日→英", "KEY"),
+        translator.translate_text("bye now", "英→日", "KEY"),
+    )
+
+    assert results == ["JA:see you later", "EN:こんにちは世界", "JA:bye now"]
+    assert len(payloads) == 2
+
+
+@pytest.mark.asyncio
+async def test_translate_text_uses_persistent_cache_after_restart(monkeypatch, tmp_path):
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+    translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    db_path = str(tmp_path / "cache.sqlite3")
+
+    calls = {"count": 0}
+
+    async def fake_http(payload, endpoint, api_key):
+        calls["count"] += 1
+        return 200, "", {"translations": [{"text": "DISK"} for _ in payload["text"]]}
+
+    monkeypatch.setattr(translator, "_translate_http_async", fake_http)
+    monkeypatch.setattr(translator, "DISK_LOOKUP_TIMEOUT", 2)
+
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    translator.init_persistent_cache(db_path)
+    try:
+        assert await translator.translate_text("persist me", "英→日", "KEY") == "DISK"
+    finally:
+        translator.close_persistent_cache()
+
+    # 再起動を想定してメモリキャッシュを空にし、別のAPIキーで問い合わせる
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    before = translator.get_stats()
+    translator.init_persistent_cache(db_path)
+    try:
+        assert await translator.translate_text("persist me", "英→日", "OTHER_KEY") == "DISK"
+    finally:
+        translator.close_persistent_cache()
+    after = translator.get_stats()
+
+    assert calls["count"] == 1
+    assert after["cache_hits"] == before["cache_hits"] + 1
+    assert after["cache_memory_hits"] + after["cache_disk_hits"] > before["cache_memory_hits"] + before["cache_disk_hits"]
+
+
+def test_cache_expires_entries_lazily():
+    cache = translator._TranslationCache(ttl=0.05)
+    cache.set("a", "A")
+    assert cache.get("a") == "A"
+    time.sleep(0.1)
+    cache.set("b", "B")
+    assert cache.get("a") is None
+    assert len(cache) == 1
+
+
+def test_cache_evicts_by_memory_budget():
+    probe = translator._TranslationCache()
+    entry_size = probe._estimate_size(("k0", "英→日", "EN", "JA"), "v0")
+
+    cache = translator._TranslationCache(max_bytes=entry_size * 3)
+    for i in range(5):
+        cache.set((f"k{i}", "英→日", "EN", "JA"), f"v{i}")
+
+    assert len(cache) == 3
+    assert cache.size_bytes <= entry_size * 3
+    assert cache.get(("k0", "英→日", "EN", "JA")) is None
+    assert cache.get(("k4", "英→日", "EN", "JA")) == "v4"
+
+
+def test_cache_expiry_pops_only_expired_head(monkeypatch):
+    """期限切れの処理は登録順キューの先頭から切れた分だけ（全件を走査しない）"""
+    now = [0.0]
+    monkeypatch.setattr(translator.time, "time", lambda: now[0])
+    cache = translator._TranslationCache(max_entries=None, ttl=100, max_bytes=1 << 40)
+    for i in range(1000):
+        now[0] = float(i)
+        cache.set(("text %d" % i, "英→日", "EN", "JA"), "value")
+        # 登録のたびに、100秒を超えた先頭の記録だけが取り除かれる
+        assert len(cache._expiry) == min(i + 1, 101)
+    assert cache._expiry[0] == (899.0, ("text 899", "英→日", "EN", "JA"))
+
+    now[0] = 1050.0
+    assert cache.get(("text 899", "英→日", "EN", "JA")) is None
+    assert len(cache) == len(cache._expiry) == 50
+    assert cache._expiry[0] == (950.0, ("text 950", "英→日", "EN", "JA"))
+
+    # 期限内なら何も取り除かない
+    assert cache.get(("text 950", "英→日", "EN", "JA")) == "value"
+    assert len(cache._expiry) == 50
+
+
+@pytest.mark.asyncio
+async def test_translate_text_coalesces_identical_inflight_requests(monkeypatch):
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+
+    sent = []
+
+    async def fake_http(payload, endpoint, api_key):
+        sent.extend(payload["text"])
+        return 200, "", {"translations": [{"text": "SAME"} for _ in payload["text"]]}
+
+    monkeypatch.setattr(translator, "_translate_http_async", fake_http)
+
+    before = translator.get_stats()["coalesced"]
+    results = await asyncio.gather(*(translator.translate_text("pog line", "英→日", "KEY") for _ in range(5)))
+
+    assert results == ["SAME"] * 5
+    assert sent == ["pog line"]
+    assert translator.get_stats()["coalesced"] - before == 4
+
+
+@pytest.mark.asyncio
+async def test_cancelling_one_follower_keeps_shared_translation(monkeypatch):
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+
+    async def fake_http(payload, endpoint, api_key):
+        await asyncio.sleep(0.1)
+        return 200, "", {"translations": [{"text": "X"} for _ in payload["text"]]}
+
+    monkeypatch.setattr(translator, "_translate_http_async", fake_http)
+
+    leader = asyncio.ensure_future(translator.translate_text("late line", "英→日", "KEY"))
+    await asyncio.sleep(0.01)
+    cancelled = asyncio.ensure_future(translator.translate_text("late line", "英→日", "KEY"))
+    sibling = asyncio.ensure_future(translator.translate_text("late line", "英→日", "KEY"))
+    await asyncio.sleep(0.01)
+    # 後から反映する翻訳の打ち切りなどで1件だけキャンセルされても、他の呼び出し元には結果が届く
+    cancelled.cancel()
+
+    assert await leader == "X"
+    assert await sibling == "X"
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+
+
+@pytest.mark.asyncio
+async def test_cancelling_leader_keeps_shared_translation(monkeypatch):
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+
+    calls = {"count": 0}
+
+    async def fake_http(payload, endpoint, api_key):
+        calls["count"] += 1
+        await asyncio.sleep(0.1)
+        return 200, "", {"translations": [{"text": "X"} for _ in payload["text"]]}
+
+    monkeypatch.setattr(translator, "_translate_http_async", fake_http)
+
+    leader = asyncio.ensure_future(translator.translate_text("leader line", "英→日", "KEY"))
+    await asyncio.sleep(0.01)
+    follower = asyncio.ensure_future(translator.translate_text("leader line", "英→日", "KEY"))
+    await asyncio.sleep(0.01)
+    # 最初に送信した呼び出し元が打ち切られても、送信は続き合流した呼び出し元に結果が届く
+    leader.cancel()
+
+    assert await follower == "X"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert await translator.translate_text("leader line", "英→日", "KEY") == "X"  # キャッシュ済み
+    assert calls["count"] == 1
+
+
+def test_submit_translation_coalesces_across_threads(monkeypatch):
+    import threading
+
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+
+    calls = {"count": 0}
+
+    async def fake_http(payload, endpoint, api_key):
+        calls["count"] += 1
+        await asyncio.sleep(0.1)
+        return 200, "", {"translations": [{"text": "VOICE"} for _ in payload["text"]]}
+
+    monkeypatch.setattr(translator, "_translate_http_async", fake_http)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(
+            translator.submit_translation("同じ言葉", "日→英", "KEY").result(timeout=2)))
+        for _ in range(3)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ["VOICE"] * 3
+    assert calls["count"] == 1
+
+
+def test_rate_limiter_aimd_adjusts_rate():
+    limiter = translator._RateLimiter(min_interval=0.5, max_concurrent=1, max_rate=3.0, min_rate=0.5)
+    assert limiter.rate == pytest.approx(2.0)
+
+    limiter.on_throttle(retry_after=0)
+    assert limiter.rate == pytest.approx(1.0)
+    limiter.on_throttle(retry_after=0)
+    limiter.on_throttle(retry_after=0)
+    assert limiter.rate == pytest.approx(0.5)  # 下限
+
+    for _ in range(100):
+        limiter.on_success()
+    assert limiter.rate == pytest.approx(3.0)  # 上限
+    assert limiter.get_stats()["throttled"] == 3
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_honors_retry_after():
+    limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    limiter.on_throttle(retry_after=0.1)
+    assert limiter.get_stats()["paused_for"] > 0
+
+    start = time.monotonic()
+    await limiter.wait_async()
+    assert time.monotonic() - start >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_retries_consume_rate_limiter_tokens(monkeypatch):
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+
+    limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    acquired = {"count": 0}
+    original_wait = limiter.wait_async
+
+    async def counting_wait():
+        acquired["count"] += 1
+        await original_wait()
+
+    limiter.wait_async = counting_wait
+    translator._rate_limiter = limiter
+
+    attempts = {"count": 0}
+
+    async def flaky_http(payload, endpoint, api_key):
+        attempts["count"] += 1
+        if attempts["count"] == 1:
+            raise translator.DeepLRetryableError("Rate limited: 429", retry_after=0.01)
+        return 200, "", {"translations": [{"text": "OK"} for _ in payload["text"]]}
+
+    monkeypatch.setattr(translator, "_translate_http_async", flaky_http)
+
+    assert await translator.translate_text("retry me", "英→日", "KEY") == "OK"
+    assert attempts["count"] == 2
+    assert acquired["count"] == 2  # リトライでもトークンを取得する
+    assert limiter.get_stats()["throttled"] == 1
+
+
+def test_parse_retry_after():
+    assert translator._parse_retry_after("3") == 3.0
+    assert translator._parse_retry_after(None) is None
+    assert translator._parse_retry_after("garbage") is None
+
+
+@pytest.mark.asyncio
+async def test_translate_text_respects_budget_policy(monkeypatch):
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+    budget = translator.CharacterBudget()
+    budget.reconcile(920, 1000)  # 優先ユーザーのみ
+    monkeypatch.setattr(translator, "_budget", budget)
+
+    async def fake_http(payload, endpoint, api_key):
+        return 200, "", {"translations": [{"text": "T"} for _ in payload["text"]]}
+
+    monkeypatch.setattr(translator, "_translate_http_async", fake_http)
+
+    assert await translator.translate_text("regular viewer", "英→日", "KEY") == "regular viewer"
+    assert await translator.translate_text("moderator says", "英→日", "KEY", priority=3) == "T"
+    assert budget.used == 920 + len("moderator says")
+
+
+@pytest.mark.asyncio
+async def test_translate_text_skips_noop_messages_locally(monkeypatch):
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+
+    async def fail_http(payload, endpoint, api_key):
+        raise AssertionError("DeepL should not be called")
+
+    monkeypatch.setattr(translator, "_translate_http_async", fail_http)
+    before = translator.get_stats()
+
+    assert await translator.translate_text("おつかれさまです", "英→日", "KEY") == "おつかれさまです"
+    assert await translator.translate_text("good game", "日→英", "KEY") == "good game"
+    assert await translator.translate_text("<k>Kappa</k> <k>Kappa</k>", "自動", "KEY") == "<k>Kappa</k> <k>Kappa</k>"
+    assert await translator.translate_text("12345 !!", "自動", "KEY") == "12345 !!"
+    assert await translator.translate_text("https://example.com/x", "英→日", "KEY") == "https://example.com/x"
+    assert await translator.translate_text("@some_viewer <k>LUL</k>", "英→日", "KEY") == "@some_viewer <k>LUL</k>"
+
+    after = translator.get_stats()
+    assert after["skipped_same_language"] - before["skipped_same_language"] == 2
+    assert after["skipped_no_content"] - before["skipped_no_content"] == 4
+
+
+def test_is_japanese_agrees_with_tts_on_kanji():
+    from src.script_detection import is_japanese
+    assert translator._is_japanese("草")
+    assert is_japanese("草")
+    assert translator._build_payload("草", "自動")["target_lang"] == "EN"
+
+
+@pytest.mark.asyncio
+async def test_scheduler_sends_higher_priority_first(monkeypatch):
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+    monkeypatch.setattr(translator, "BATCH_MAX_TEXTS", 1)
+    translator._schedulers.clear()
+
+    sent = []
+
+    async def fake_http(payload, endpoint, api_key):
+        sent.extend(payload["text"])
+        return 200, "", {"translations": [{"text": t.upper()} for t in payload["text"]]}
+
+    monkeypatch.setattr(translator, "_translate_http_async", fake_http)
+
+    results = await asyncio.gather(
+        translator.translate_text("viewer one", "英→日", "KEY"),
+        translator.translate_text("viewer two", "英→日", "KEY"),
+        translator.translate_text("mod message", "英→日", "KEY", priority=3),
+    )
+    translator._schedulers.clear()
+
+    assert results == ["VIEWER ONE", "VIEWER TWO", "MOD MESSAGE"]
+    assert sent[0] == "mod message"
+    assert sent[1:] == ["viewer one", "viewer two"]  # 同じ優先度は到着順
+
+
+@pytest.mark.asyncio
+async def test_scheduler_sheds_requests_past_deadline(monkeypatch):
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+    translator._rate_limiter.on_throttle(retry_after=0.1)  # 429直後で送信できない状態
+
+    async def fail_http(payload, endpoint, api_key):
+        raise AssertionError("expired requests should not be sent")
+
+    monkeypatch.setattr(translator, "_translate_http_async", fail_http)
+    before = translator.get_stats()["shed"]
+
+    assert await translator.translate_text("too late", "英→日", "KEY", deadline=0.01) == "too late"
+    assert translator.get_stats()["shed"] - before == 1
+
+
+@pytest.mark.asyncio
+async def test_engine_shares_one_loop_for_threads_and_other_loops(monkeypatch):
+    import threading
+
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+
+    loops = []
+
+    async def fake_http(payload, endpoint, api_key):
+        loops.append(asyncio.get_running_loop())
+        return 200, "", {"translations": [{"text": t.upper()} for t in payload["text"]]}
+
+    monkeypatch.setattr(translator, "_translate_http_async", fake_http)
+
+    try:
+        futures = []
+        thread = threading.Thread(target=lambda: futures.append(translator.submit_translation("from voice", "英→日", "KEY")))
+        thread.start()
+        thread.join()
+        shared = await translator.translate_text_shared("from bot", "英→日", "KEY")
+
+        assert futures[0].result(timeout=2) == "FROM VOICE"
+        assert shared == "FROM BOT"
+        assert len(set(loops)) == 1  # どちらも翻訳エンジンのループで送信
+        assert loops[0] is not asyncio.get_running_loop()
+    finally:
+        translator.stop_engine()
+
+
+def test_stop_engine_returns_original_for_pending_translations(monkeypatch):
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+
+    started = []
+
+    async def fake_http(payload, endpoint, api_key):
+        started.append(payload["text"])
+        await asyncio.sleep(10)
+        return 200, "", {"translations": [{"text": "LATE"} for _ in payload["text"]]}
+
+    monkeypatch.setattr(translator, "_translate_http_async", fake_http)
+
+    future = translator.submit_translation("still sending", "英→日", "KEY")
+    for _ in range(100):
+        if started:
+            break
+        time.sleep(0.01)
+    translator.stop_engine()
+
+    # 停止で取り消された翻訳は CancelledError ではなく原文で返る
+    assert future.result(timeout=2) == "still sending"
+
+
+@pytest.mark.asyncio
+async def test_scheduler_keeps_and_cancels_in_flight_batches(monkeypatch):
+    translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    started = asyncio.Event()
+
+    async def fake_http(payload, endpoint, api_key):
+        started.set()
+        await asyncio.sleep(10)
+        return 200, "", {"translations": [{"text": "LATE"} for _ in payload["text"]]}
+
+    monkeypatch.setattr(translator, "_translate_http_async", fake_http)
+    scheduler = translator._TranslationScheduler(window=0)
+    pool = translator._get_key_pool("KEY")
+
+    pending = asyncio.ensure_future(scheduler.translate({"text": "in flight", "target_lang": "JA"}, pool))
+    await asyncio.wait_for(started.wait(), 1)
+    # 送信中のバッチはスケジューラーが参照を持つ（ループの弱参照だけだと途中で回収されうる）
+    assert len(scheduler._sending) == 1
+
+    await scheduler.close()
+    assert await pending is None
+    assert not scheduler._sending
+
+
+@pytest.mark.asyncio
+async def test_segment_cache_sends_only_missing_sentences(monkeypatch):
+    translator._cache = translator._TranslationCache(max_entries=50, ttl=60)
+    translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+    translator.configure_segmentation(enabled=True, min_chars=0)
+
+    payloads = []
+
+    async def fake_http(payload, endpoint, api_key):
+        payloads.append(list(payload["text"]))
+        return 200, "", {"translations": [{"text": t.upper()} for t in payload["text"]]}
+
+    monkeypatch.setattr(translator, "_translate_http_async", fake_http)
+    before = translator.get_stats()
+
+    try:
+        first = await translator.translate_text("Hello there. How are you?", "英→日", "KEY")
+        second = await translator.translate_text("Hello there. What time is it?", "英→日", "KEY")
+    finally:
+        translator.configure_segmentation(enabled=False, min_chars=translator.SEGMENT_MIN_CHARS)
+
+    assert first == "HELLO THERE.HOW ARE YOU?"  # 日本語訳は文の間に空白を入れない
+    assert second == "HELLO THERE.WHAT TIME IS IT?"
+    assert payloads == [["Hello there.", "How are you?"], ["What time is it?"]]  # 未翻訳の文だけを1回で送信
+    after = translator.get_stats()
+    assert after["segment_chars_saved"] - before["segment_chars_saved"] == len("Hello there.")
+
+
+@pytest.mark.asyncio
+async def test_translate_text_reuses_near_duplicate_from_memory(monkeypatch):
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+    monkeypatch.setattr(translator, "_memory", translator.TranslationMemory(threshold=0.8))
+    monkeypatch.setattr(translator, "_memory_enabled", True)
+
+    calls = {"count": 0}
+
+    async def fake_http(payload, endpoint, api_key):
+        calls["count"] += 1
+        return 200, "", {"translations": [{"text": "ブラジルからこんにちは"} for _ in payload["text"]]}
+
+    monkeypatch.setattr(translator, "_translate_http_async", fake_http)
+    before = translator.get_stats()["memory_hits"]
+
+    assert await translator.translate_text("hello from brazil", "英→日", "KEY") == "ブラジルからこんにちは"
+    assert await translator.translate_text("hello from brazil!!", "英→日", "KEY") == "ブラジルからこんにちは"
+    assert calls["count"] == 1
+    assert translator.get_stats()["memory_hits"] - before == 1
+
+
+@pytest.mark.asyncio
+async def test_translation_memory_is_off_by_default(monkeypatch):
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+    monkeypatch.setattr(translator, "_memory", translator.TranslationMemory(threshold=0.8))
+    monkeypatch.setattr(translator, "_memory_enabled", True)
+    translator._memory.add("see you at 4 pm", ("英→日", "EN", "JA"), "午後4時に")
+    # 設定に値がなければ無効になり、登録済みの内容も捨てる
+    translator.apply_config({}, changed={"translation_memory_enabled"})
+    assert len(translator._memory) == 0
+
+    sent = []
+
+    async def fake_http(payload, endpoint, api_key):
+        sent.extend(payload["text"])
+        return 200, "", {"translations": [{"text": f"T({text})"} for text in payload["text"]]}
+
+    monkeypatch.setattr(translator, "_translate_http_async", fake_http)
+
+    # 数字だけ違うメッセージにも、設定で有効にしない限り別の翻訳を使わない
+    assert await translator.translate_text("see you at 5 pm", "英→日", "KEY") == "T(see you at 5 pm)"
+    assert await translator.translate_text("see you at 6 pm", "英→日", "KEY") == "T(see you at 6 pm)"
+    assert sent == ["see you at 5 pm", "see you at 6 pm"]
+    assert len(translator._memory) == 0  # 無効の間は登録もしない
+
+
+@pytest.mark.asyncio
+async def test_prewarm_cache_from_logs_serves_without_api(monkeypatch, tmp_path):
+    import json
+
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+    monkeypatch.setattr(translator, "_memory", translator.TranslationMemory())
+    log = {
+        "export_info": {"translate_mode": "英→日"},
+        "logs": [
+            {"comment_data": {"message": "Hello", "translated": "こんにちは"}},
+            {"comment_data": {"message": "look https://example.com/a", "translated": "見て https://example.com/a"}},
+            {"comment_data": {"message": "おつかれ", "translated": "Good work"}},  # 英→日では翻訳対象外
+        ],
+    }
+    (tmp_path / "chatlog.json").write_text(json.dumps(log, ensure_ascii=False), encoding="utf-8")
+
+    async def fail_http(payload, endpoint, api_key):
+        raise AssertionError("prewarmed messages should not call DeepL")
+
+    monkeypatch.setattr(translator, "_translate_http_async", fail_http)
+
+    result = translator.prewarm_cache_from_logs([str(tmp_path / "*.json")])
+
+    assert result["candidates"] == 3
+    assert result["seeded"] == 2
+    assert await translator.translate_text("hello", "英→日", "KEY") == "こんにちは"
+    assert await translator.translate_text("look https://example.com/b", "英→日", "KEY") == "見て https://example.com/b"
+
+
+@pytest.mark.asyncio
+async def test_prewarmed_emote_messages_match_live_cache_key(monkeypatch, tmp_path):
+    import json
+    from src.comment_data import create_twitch_comment
+    from src.emote_ranges import wrap_emotes
+
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+    monkeypatch.setattr(translator, "_memory", translator.TranslationMemory())
+
+    # 書き出したログの翻訳は表示用に<k>タグを外してある
+    tags = {"emotes": "25:12-16"}
+    comment = create_twitch_comment(username="viewer", message="nice play!! Kappa", tags=tags,
+                                    translated="ナイスプレイ!! Kappa")
+    log = {"export_info": {"translate_mode": "英→日"}, "logs": [{"comment_data": comment.to_dict()}]}
+    (tmp_path / "chatlog.json").write_text(json.dumps(log, ensure_ascii=False), encoding="utf-8")
+
+    async def fail_http(payload, endpoint, api_key):
+        raise AssertionError("prewarmed messages should not call DeepL")
+
+    monkeypatch.setattr(translator, "_translate_http_async", fail_http)
+
+    assert translator.prewarm_cache_from_logs([str(tmp_path / "*.json")])["seeded"] == 1
+    # BOTと同じくエモートを<k>タグで囲んだ本文で引くと、事前読み込みしたキャッシュに当たる
+    live = wrap_emotes("nice play!! LUL", "1:12-14").text
+    assert await translator.translate_text(live, "英→日", "KEY") == "ナイスプレイ!! <k>LUL</k>"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_translation_releases_rate_limit_token(monkeypatch):
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+    limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    limiter.on_throttle(retry_after=0.1)  # トークン待ちの状態にする
+    refunds = {"count": 0}
+    original_refund = limiter.refund
+
+    def counting_refund():
+        refunds["count"] += 1
+        original_refund()
+
+    limiter.refund = counting_refund
+    translator._rate_limiter = limiter
+
+    async def fail_http(payload, endpoint, api_key):
+        raise AssertionError("cancelled requests should not be sent")
+
+    monkeypatch.setattr(translator, "_translate_http_async", fail_http)
+
+    task = asyncio.ensure_future(translator.translate_text("never mind", "英→日", "KEY"))
+    await asyncio.sleep(0.07)  # スケジューラーがトークン待ちに入るまで待つ
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.sleep(0.1)
+
+    assert refunds["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_answers_from_cache_or_original(monkeypatch):
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+    monkeypatch.setattr(translator, "_memory", translator.TranslationMemory())
+    breaker = translator.CircuitBreaker(min_requests=2)
+    monkeypatch.setattr(translator, "_breaker", breaker)
+
+    calls = {"count": 0}
+
+    async def down_http(payload, endpoint, api_key):
+        calls["count"] += 1
+        if payload["text"] == ["cached line"]:
+            return 200, "", {"translations": [{"text": "キャッシュ済み"}]}
+        return 500, "Internal Server Error", None
+
+    monkeypatch.setattr(translator, "_translate_http_async", down_http)
+
+    assert await translator.translate_text("cached line", "英→日", "KEY") == "キャッシュ済み"
+    assert await translator.translate_text("first failure", "英→日", "KEY") == "first failure"
+    assert await translator.translate_text("second failure", "英→日", "KEY") == "second failure"
+    assert breaker.state == "open"
+
+    sent = calls["count"]
+    assert await translator.translate_text("while open", "英→日", "KEY") == "while open"
+    assert await translator.translate_text("cached line", "英→日", "KEY") == "キャッシュ済み"
+    assert calls["count"] == sent  # 遮断中は送信しない
+    assert translator.get_stats()["breaker_state"] == "open"
+
+
+@pytest.mark.asyncio
+async def test_phrase_table_answers_before_cache_and_network(monkeypatch):
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+    translator.set_phrase_table([])
+
+    async def fail_http(payload, endpoint, api_key):
+        raise AssertionError("phrases should not call DeepL")
+
+    monkeypatch.setattr(translator, "_translate_http_async", fail_http)
+    before = translator.get_stats()
+
+    assert await translator.translate_text("GG!!", "英→日", "KEY") == "GG"
+    assert await translator.translate_text("888", "自動", "KEY") == "clap clap"
+    assert await translator.translate_text("草", "自動", "KEY") == "lol"
+
+    after = translator.get_stats()
+    assert after["phrase_hits"] - before["phrase_hits"] == 3
+    assert after["cache_lookups"] == before["cache_lookups"]
+
+
+@pytest.mark.asyncio
+async def test_original_text_is_sent_and_variants_share_cache(monkeypatch):
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+    sent = []
+
+    async def fake_http(payload, endpoint, api_key):
+        sent.extend(payload["text"])
+        return 200, "", {"translations": [{"text": "ブラジルからこんにちは"} for _ in payload["text"]]}
+
+    monkeypatch.setattr(translator, "_translate_http_async", fake_http)
+
+    # 表記ゆれを畳むのはキャッシュキーだけで、DeepLには原文を送る
+    assert await translator.translate_text("HELLO FROM BRAZIL!!!!", "英→日", "KEY") == "ブラジルからこんにちは"
+    assert await translator.translate_text("hello from brazil!!", "英→日", "KEY") == "ブラジルからこんにちは"
+    assert sent == ["HELLO FROM BRAZIL!!!!"]
+
+
+@pytest.mark.asyncio
+async def test_placeholders_are_sent_instead_of_emotes_urls_and_mentions(monkeypatch):
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+    sent = []
+
+    async def fake_http(payload, endpoint, api_key):
+        sent.append(payload["text"])
+        return 200, "", {"translations": [{"text": text.replace("look at this clip", "このクリップ見て")}
+                                          for text in payload["text"]]}
+
+    monkeypatch.setattr(translator, "_translate_http_async", fake_http)
+    before = translator.get_stats()
+
+    message = "@some_viewer look at this clip <k>PogChamp</k> https://clips.twitch.tv/AbcDef"
+    result = await translator.translate_text(message, "英→日", "KEY")
+
+    assert sent == [["<k>0</k> look at this clip <k>1</k> <k>2</k>"]]
+    assert result == "@some_viewer このクリップ見て <k>PogChamp</k> https://clips.twitch.tv/AbcDef"
+    saved = translator.get_stats()["placeholder_chars_saved"] - before["placeholder_chars_saved"]
+    assert saved == len(message) - len(sent[0][0])
+
+
+@pytest.mark.asyncio
+async def test_placeholder_savings_counted_only_after_successful_send(monkeypatch):
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+
+    async def failing_http(payload, endpoint, api_key):
+        return 400, "bad request", None
+
+    monkeypatch.setattr(translator, "_translate_http_async", failing_http)
+    before = translator.get_stats()["placeholder_chars_saved"]
+
+    message = "look <k>PogChamp</k> https://clips.twitch.tv/AbcDef"
+    assert await translator.translate_text(message, "英→日", "KEY") == message
+    assert translator.get_stats()["placeholder_chars_saved"] == before
+
+
+@pytest.mark.asyncio
+async def test_key_pool_routes_by_headroom_and_fails_over(monkeypatch):
+    translator._cache = translator._TranslationCache(max_entries=10, ttl=60)
+    translator._rate_limiter = translator._RateLimiter(min_interval=0, max_concurrent=5)
+    translator.set_translation_filters([])
+    translator.set_translation_dictionary([])
+    monkeypatch.setattr(translator, "_breaker", translator.CircuitBreaker())
+    monkeypatch.setattr(translator, "_budget", translator.CharacterBudget())
+    monkeypatch.setattr(translator, "_extra_key_states", {})
+    translator.set_extra_api_keys(["FREE:fx", "PRO"])
+    used_keys = []
+
+    async def fake_http(payload, endpoint, api_key):
+        used_keys.append((api_key, endpoint))
+        if api_key == "FREE:fx":
+            return 456, "Quota exceeded", None
+        return 200, "", {"translations": [{"text": f"{api_key}:{t}"} for t in payload["text"]]}
+
+    monkeypatch.setattr(translator, "_translate_http_async", fake_http)
+    try:
+        pool = translator._get_key_pool("KEY")
+        translator._budget.reconcile(490000, 500000)
+        pool.keys[1].budget.reconcile(0, 500000)
+        pool.keys[2].budget.reconcile(700000, 1000000)
+        before = translator.get_stats()
+
+        # 残り文字数の最も多いFreeキーを選び、456なら次に余裕のあるProキーで送り直す
+        assert await translator.translate_text("where are you from", "英→日", "KEY") == "PRO:where are you from"
+        assert used_keys == [("FREE:fx", translator.DEEPL_FREE_ENDPOINT), ("PRO", translator.DEEPL_PRO_ENDPOINT)]
+
+        # 456を返したキーはしばらく選ばない
+        used_keys.clear()
+        assert await translator.translate_text("what game is this", "英→日", "KEY") == "PRO:what game is this"
+        assert used_keys == [("PRO", translator.DEEPL_PRO_ENDPOINT)]
+
+        after = translator.get_stats()
+        assert after["key_failovers"] - before["key_failovers"] == 1
+        assert after["key_pool_size"] == 3
+        assert after["key_pool_available"] == 2
+        assert translator._breaker.state == "closed"
+        # キャッシュキーにAPIキーは含まれない
+        assert translator._cache.get(("where are you from", "英→日", "EN", "JA")) == "PRO:where are you from"
+    finally:
+        translator.set_extra_api_keys([])